@@ -1,10 +1,9 @@
-from autoservice_app import create_app, db
-from flask_migrate import Migrate
+from autoservice_app import create_app
 
 app = create_app()
-migrate = Migrate(app, db)
 
 if __name__ == "__main__":
+    # Отладочный сервер для разработки; в production — flask serve (gunicorn)
 
     app.run(
         host="0.0.0.0",
@@ -1,22 +1,88 @@
+import click
 from flask import Flask
+from sqlalchemy import event
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
 db = SQLAlchemy()
-migrate = Migrate()
 
 
-def create_app():
+def create_app(config_object="config.Config"):
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///autoservice.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = 'your_secret_key_here'
+    app.config.from_object(config_object)
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    _apply_sqlite_pragmas(app)
+
+    if app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        from .startup import init_template_cache
+        init_template_cache(app)
+
+    # Счётчики версий таблиц увеличиваются хуками сессии при каждой записи
+    from . import table_versions  # noqa: F401
 
     # Регистрация Blueprint
     from .routes import bp as main_bp
     app.register_blueprint(main_bp)
 
+    from .assets import init_assets
+    init_assets(app)
+
+    if app.config.get('SQL_INSTRUMENTATION'):
+        from .sql_instrumentation import init_sql_instrumentation
+        init_sql_instrumentation(app)
+
+    if app.config.get('METRICS_ENABLED'):
+        from .metrics import init_metrics
+        init_metrics(app)
+
+    from .profiling import init_profiling
+    init_profiling(app)
+
+    if app.config.get('ASYNC_JSON_API'):
+        from .async_views import register_async_views
+        register_async_views(app)
+
+    # Flask-Migrate (alembic) и CLI-команды нужны только под flask CLI:
+    # воркер WSGI-сервера их не импортирует
+    if _running_cli():
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+        from .commands import register_commands
+        register_commands(app)
+
+    if app.config.get('STARTUP_WARMUP'):
+        from .startup import warm_up
+        warm_up(app)
+
     return app
+
+
+def _running_cli():
+    """Приложение создаётся командой flask (flask db, flask serve и т.д.)"""
+    return click.get_current_context(silent=True) is not None
+
+
+def _apply_sqlite_pragmas(app):
+    """Выполнять SQLITE_PRAGMAS при открытии каждого соединения с базой"""
+    with app.app_context():
+        engine = db.engine
+    listen_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS') or {})
+
+
+def _unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def listen_sqlite_pragmas(engine, pragmas):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Встроенные lower() и LIKE в SQLite не знают регистра кириллицы
+        dbapi_connection.create_function("unicode_lower", 1, _unicode_lower, deterministic=True)
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
@@ -0,0 +1,93 @@
+from flask import request
+from .helpers import SecurityHelper, ViewHelper
+from .models import Employee
+
+
+def request_item(req):
+    return {
+        'id': req.id,
+        'car': req.car.display_info if req.car else 'Не указан',
+        'request_date': req.request_date.isoformat() if req.request_date else None,
+        'issues': SecurityHelper.sanitize_input(req.issues),
+    }
+
+
+def repair_item(repair):
+    return {
+        'id': repair.id,
+        'description': SecurityHelper.sanitize_input(repair.description),
+        'car': repair.request.car.display_info if repair.request else 'Не указан',
+        'cost': repair.cost,
+        'parts_count': repair.parts_count,
+        'parts_total': repair.parts_total,
+        'total_with_parts': repair.total_with_parts,
+        'employees': [{
+            'id': emp.id,
+            'name': SecurityHelper.sanitize_input(emp.full_name)
+        } for emp in repair.employees]
+    }
+
+
+def completed_work_item(work):
+    return {
+        'id': work.id,
+        'car': work.car.display_info if work.car else 'Не указан',
+        'repair_id': work.repair_id,
+        'description': SecurityHelper.sanitize_input(work.repair.description if work.repair else ''),
+        'work_description': SecurityHelper.sanitize_input(work.work_description),
+        'total_cost': work.total_cost,
+        'completion_date': work.completion_date.isoformat() if work.completion_date else None,
+    }
+
+
+EMPLOYEES_PAGE_LIMIT = 100
+EMPLOYEES_PAGE_MAX_LIMIT = 500
+
+
+def employee_filter_item(emp_id, full_name, position, experience, schedule, salary, active_repairs_count):
+    """Элемент ответа API фильтрации с защитой от XSS"""
+    return {
+        'id': emp_id,
+        'full_name': SecurityHelper.sanitize_input(full_name),
+        'position': SecurityHelper.sanitize_input(position),
+        'experience': experience,
+        'schedule': SecurityHelper.sanitize_input(schedule),
+        'salary': salary,
+        'formatted_salary': ViewHelper.format_currency(salary),
+        'active_repairs_count': active_repairs_count,
+        'availability': 'free' if active_repairs_count <= Employee.BUSY_THRESHOLD else 'busy'
+    }
+
+
+def employee_filter_args():
+    """Параметры фильтра сотрудников из строки запроса"""
+    limit = request.args.get('limit', EMPLOYEES_PAGE_LIMIT, type=int)
+    return {
+        # Защита от XSS в параметрах запроса
+        'search': SecurityHelper.sanitize_input(request.args.get('search', '')),
+        'position': SecurityHelper.sanitize_input(request.args.get('position', '')),
+        'experience': SecurityHelper.sanitize_input(request.args.get('experience', '')),
+        'schedule': SecurityHelper.sanitize_input(request.args.get('schedule', '')),
+        'availability': request.args.get('availability', ''),
+        'limit': min(max(limit, 1), EMPLOYEES_PAGE_MAX_LIMIT),
+        'offset': max(request.args.get('offset', 0, type=int), 0),
+    }
+
+
+def employee_filter_response(employees_data, total, limit, offset):
+    return {
+        'employees': employees_data,
+        'count': total,
+        'limit': limit,
+        'offset': offset,
+        'has_more': offset + len(employees_data) < total
+    }
+
+
+def employee_filter_rows_data(rows):
+    """Строки (Employee, active_repairs_count, total) -> JSON с защитой от XSS"""
+    return [
+        employee_filter_item(emp.id, emp.full_name, emp.position, emp.experience,
+                             emp.schedule, emp.salary, active_count)
+        for emp, active_count, _ in rows
+    ]
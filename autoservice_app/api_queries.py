@@ -0,0 +1,78 @@
+from . import db
+from .models import Employee, Repair
+from .query_profiles import QueryProfiles
+
+
+def _employee_filter_where(stmt, search='', position='', experience='', schedule='', availability=''):
+    """Условия фильтра сотрудников, общие для выборки страницы и подсчёта"""
+    if search:
+        # Регистр кириллицы не различается (unicode_lower регистрируется для
+        # каждого соединения, см. listen_sqlite_pragmas), % и _ ищутся как текст —
+        # так же, как в индексе сотрудников
+        query = search.lower()
+        stmt = stmt.where(
+            db.func.unicode_lower(Employee.last_name).contains(query, autoescape=True) |
+            db.func.unicode_lower(Employee.first_name).contains(query, autoescape=True) |
+            db.func.unicode_lower(Employee.middle_name).contains(query, autoescape=True)
+        )
+
+    if position:
+        stmt = stmt.where(Employee.position == position)
+
+    if experience == 'junior':
+        stmt = stmt.where(Employee.experience < 3)
+    elif experience == 'middle':
+        stmt = stmt.where(Employee.experience.between(3, 8))
+    elif experience == 'senior':
+        stmt = stmt.where(Employee.experience > 8)
+
+    if schedule:
+        stmt = stmt.where(Employee.schedule == schedule)
+
+    # Фильтр занятости
+    if availability == 'free':
+        stmt = stmt.where(Employee.active_repairs_count <= Employee.BUSY_THRESHOLD)
+    elif availability == 'busy':
+        stmt = stmt.where(Employee.active_repairs_count > Employee.BUSY_THRESHOLD)
+    return stmt
+
+
+def employee_filter_statement(limit=100, offset=0, **filters):
+    """SELECT для фильтра сотрудников: (Employee, active_repairs_count, total)
+
+    Число активных ремонтов хранится в самой строке сотрудника
+    (Employee.active_repairs_count), общее количество найденных считается
+    оконной функцией. Выражение общее для синхронного (db.session)
+    и асинхронного (AsyncSession) вариантов API.
+    """
+    stmt = db.select(
+        Employee,
+        Employee.active_repairs_count,
+        db.func.count().over().label('total'),
+    )
+    stmt = _employee_filter_where(stmt, **filters)
+    return stmt.order_by(Employee.last_name, Employee.first_name, Employee.id).limit(limit).offset(offset)
+
+
+def employee_filter_count_statement(limit=None, offset=None, **filters):
+    """SELECT COUNT(*) по тем же условиям
+
+    Нужен, когда страница пуста: оконная функция не возвращает total,
+    если offset за последней найденной строкой.
+    """
+    return _employee_filter_where(db.select(db.func.count(Employee.id)), **filters)
+
+
+# Таблицы, из которых собираются данные ремонта (для ETag)
+# (сумма и число запчастей хранятся в строке ремонта, поэтому spare_part не нужна)
+REPAIR_DETAILS_TABLES = ("repair", "service_request", "car", "repair_employees", "employee")
+
+
+def repair_details_statement(repair_id):
+    """SELECT ремонта со связями по профилю repair_details"""
+    return repairs_details_statement([repair_id])
+
+
+def repairs_details_statement(repair_ids):
+    """SELECT нескольких ремонтов: связи догружаются selectinload одним IN-запросом на связь"""
+    return db.select(Repair).options(*QueryProfiles.options("repair_details")).where(Repair.id.in_(repair_ids))
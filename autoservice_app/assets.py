@@ -0,0 +1,282 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+
+# Собираемые файлы static/: минифицируются только JS и CSS, остальные копируются
+ASSET_EXTENSIONS = (".js", ".css")
+MANIFEST_FILE = "manifest.json"
+# Ответы с хэшем в имени не меняются никогда: браузер не перепроверяет их год
+ASSET_MAX_AGE = 365 * 24 * 3600
+# Сжатые копии не пишутся для файлов меньше этого размера
+COMPRESS_MIN_SIZE = 256
+
+# Символ перед "/", после которого в JS начинается регулярное выражение, а не деление
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORD_RE = re.compile(r"(?:^|[^\w$])(?:return|typeof|case|do|else|in|of|void|delete|throw)$")
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(source):
+    """Убрать комментарии и лишние пробелы; строки в кавычках не меняются"""
+    parts = _CSS_STRING_RE.split(source)
+    for i in range(0, len(parts), 2):
+        code = _CSS_COMMENT_RE.sub("", parts[i])
+        code = _CSS_SPACE_RE.sub(" ", code)
+        code = _CSS_PUNCT_RE.sub(r"\1", code)
+        parts[i] = code.replace(": ", ":").replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(source):
+    """Осторожная минификация JS: комментарии и отступы убираются, код не переписывается
+
+    Строки, шаблонные строки (включая вложенные ${...}) и регулярные
+    выражения копируются как есть. Перевод строки между операторами
+    сохраняется, поэтому автоматическая расстановка точек с запятой
+    работает так же, как в исходнике.
+    """
+    out = []
+    i, n = 0, len(source)
+    # стек состояний: "code" или "template"; у code — глубина фигурных скобок внутри ${...}
+    stack = [["code", 0]]
+
+    def preceding_code():
+        return "".join(out[-32:]).rstrip()
+
+    def whitespace(newline):
+        # отступы, пустые строки и комментарии сворачиваются в один перевод строки или пробел
+        if out and out[-1] in (" ", "\n"):
+            if newline:
+                out[-1] = "\n"
+        else:
+            out.append("\n" if newline else " ")
+
+    while i < n:
+        state = stack[-1]
+        ch = source[i]
+
+        if state[0] == "template":
+            if ch == "\\":
+                out.append(source[i:i + 2])
+                i += 2
+            elif ch == "`":
+                out.append(ch)
+                stack.pop()
+                i += 1
+            elif source.startswith("${", i):
+                out.append("${")
+                stack.append(["code", 0])
+                i += 2
+            else:
+                out.append(ch)
+                i += 1
+            continue
+
+        if ch in "'\"":
+            end = i + 1
+            while end < n and source[end] != ch:
+                end += 2 if source[end] == "\\" else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif ch == "`":
+            out.append(ch)
+            stack.append(["template", 0])
+            i += 1
+        elif source.startswith("//", i):
+            while i < n and source[i] != "\n":
+                i += 1
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            whitespace("\n" in source[i:end])
+            i = end
+        elif ch == "/":
+            previous = preceding_code()
+            if not previous or previous[-1] in _REGEX_PREFIX or _REGEX_KEYWORD_RE.search(previous):
+                end, in_class = i + 1, False
+                while end < n and (source[end] != "/" or in_class):
+                    if source[end] == "\\":
+                        end += 1
+                    elif source[end] == "[":
+                        in_class = True
+                    elif source[end] == "]":
+                        in_class = False
+                    end += 1
+                end += 1
+                while end < n and source[end].isalpha():
+                    end += 1
+                out.append(source[i:end])
+                i = end
+            else:
+                out.append(ch)
+                i += 1
+        elif ch.isspace():
+            end = i
+            while end < n and source[end].isspace():
+                end += 1
+            whitespace("\n" in source[i:end])
+            i = end
+        else:
+            if ch == "{":
+                state[1] += 1
+            elif ch == "}":
+                if state[1] == 0 and len(stack) > 1:
+                    # конец ${...} — возврат в шаблонную строку
+                    stack.pop()
+                    out.append(ch)
+                    i += 1
+                    continue
+                state[1] -= 1
+            out.append(ch)
+            i += 1
+
+    return "".join(out).strip()
+
+
+MINIFIERS = {".js": minify_js, ".css": minify_css}
+
+
+def assets_directory(app):
+    return app.config.get("ASSETS_DIR") or os.path.join(app.instance_path, "assets")
+
+
+def _compress(path, data):
+    """Сжатые копии .gz и .br рядом с файлом (только если они меньше оригинала)"""
+    sizes = {}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        with open(path + ".gz", "wb") as f:
+            f.write(gz)
+        sizes["gz"] = len(gz)
+    try:
+        import brotli
+    except ImportError:
+        return sizes
+    br = brotli.compress(data, quality=11)
+    if len(br) < len(data):
+        with open(path + ".br", "wb") as f:
+            f.write(br)
+        sizes["br"] = len(br)
+    return sizes
+
+
+def build_assets(app, clean=False):
+    """Собрать static/ в ASSETS_DIR: минификация, хэш содержимого в имени, .gz и .br
+
+    js/repairs.js превращается в js/repairs.<хэш>.js. Соответствие
+    исходных и собранных имён записывается в manifest.json, по нему
+    asset_url() строит ссылки. Файлы прошлых сборок остаются, чтобы
+    открытые у клиентов страницы со старыми ссылками продолжали работать;
+    clean=True удаляет всё, чего нет в новом манифесте.
+    Возвращает {исходное имя: {"file", "source", "size", "gz", "br"}}.
+    """
+    source_root = app.static_folder
+    target_root = assets_directory(app)
+    os.makedirs(target_root, exist_ok=True)
+    manifest, report = {}, {}
+    for root, _, files in os.walk(source_root):
+        for name in sorted(files):
+            source_path = os.path.join(root, name)
+            relative = os.path.relpath(source_path, source_root).replace(os.sep, "/")
+            base, extension = os.path.splitext(relative)
+            with open(source_path, "rb") as f:
+                data = f.read()
+            if extension in ASSET_EXTENSIONS:
+                data = MINIFIERS[extension](data.decode("utf-8")).encode("utf-8")
+
+            built = f"{base}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+            target_path = os.path.join(target_root, built)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with open(target_path, "wb") as f:
+                f.write(data)
+            compressed = _compress(target_path, data) if len(data) >= COMPRESS_MIN_SIZE else {}
+
+            manifest[relative] = built
+            report[relative] = {"file": built, "source": os.path.getsize(source_path),
+                                "size": len(data), **compressed}
+
+    manifest_path = os.path.join(target_root, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    if clean:
+        keep = {MANIFEST_FILE} | {built + suffix for built in manifest.values() for suffix in ("", ".gz", ".br")}
+        for root, _, files in os.walk(target_root):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.relpath(path, target_root).replace(os.sep, "/") not in keep:
+                    os.remove(path)
+    return report
+
+
+def manifest_version(app):
+    """Метка текущей сборки: ссылки в HTML меняются вместе с ней (см. conditional)"""
+    if _manifest(app) is None:
+        return ""
+    return str(app.extensions["assets_manifest"][0])
+
+
+def _manifest(app):
+    """Манифест сборки; перечитывается, если файл изменился (новая сборка без перезапуска)"""
+    path = os.path.join(assets_directory(app), MANIFEST_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = app.extensions.get("assets_manifest")
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            cached = (mtime, json.load(f))
+        app.extensions["assets_manifest"] = cached
+    return cached[1]
+
+
+def asset_url(filename, **values):
+    """Аналог url_for('static', filename=...) для собранных файлов
+
+    Если файл есть в манифесте сборки, ссылка ведёт на версию с хэшем
+    (/assets/js/repairs.<хэш>.js), которую браузер кэширует навсегда.
+    Без сборки (разработка) — обычная ссылка на static/.
+    """
+    manifest = _manifest(current_app)
+    if manifest and filename in manifest:
+        return url_for("assets.asset", filename=manifest[filename], **values)
+    return url_for("static", filename=filename, **values)
+
+
+assets_bp = Blueprint("assets", __name__)
+
+
+@assets_bp.route("/assets/<path:filename>")
+def asset(filename):
+    """Собранный файл: сжатая копия по Accept-Encoding и Cache-Control: immutable"""
+    directory = assets_directory(current_app)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(directory, filename + suffix)):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype,
+                                           max_age=ASSET_MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """asset_url() в шаблонах и маршрут /assets для собранных файлов"""
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.register_blueprint(assets_bp)
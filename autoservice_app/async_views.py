@@ -0,0 +1,87 @@
+import asyncio
+from flask import current_app, jsonify
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from . import db, listen_sqlite_pragmas
+from .api_payloads import employee_filter_args, employee_filter_response, employee_filter_rows_data, repair_item
+from .api_queries import employee_filter_count_statement, employee_filter_statement, repair_details_statement
+
+
+def create_async_session_factory(app):
+    """Фабрика AsyncSession поверх aiosqlite
+
+    Flask выполняет каждую async-view в собственном цикле событий,
+    а соединение aiosqlite привязано к циклу, в котором открыто,
+    поэтому пул не используется (NullPool): соединение открывается
+    и закрывается в пределах запроса.
+    """
+    with app.app_context():
+        url = db.engine.url.set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(url, poolclass=NullPool)
+    listen_sqlite_pragmas(engine.sync_engine, app.config.get('SQLITE_PRAGMAS') or {})
+    # Первое соединение инициализирует диалект под asyncio.Lock, который
+    # привязывается к циклу событий; открываем его заранее, пока нет запросов
+    asyncio.run(_first_connect(engine))
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def _first_connect(engine):
+    async with engine.connect():
+        pass
+
+
+def _async_session():
+    return current_app.extensions["async_db"]()
+
+
+async def api_filter_employees_async():
+    """Асинхронный вариант /api/employees/filter (тот же SQL, тот же ответ)
+
+    Индекс сотрудников в памяти синхронный, поэтому здесь всегда
+    выполняется запрос employee_filter_statement.
+    """
+    try:
+        args = employee_filter_args()
+        async with _async_session() as session:
+            rows = (await session.execute(employee_filter_statement(**args))).all()
+            if rows:
+                total = rows[0].total
+            elif args['offset']:
+                total = (await session.execute(employee_filter_count_statement(**args))).scalar()
+            else:
+                total = 0
+        return jsonify(employee_filter_response(employee_filter_rows_data(rows), total,
+                                                args['limit'], args['offset']))
+    except Exception:
+        current_app.logger.exception("Ошибка фильтрации сотрудников")
+        return jsonify({
+            'error': 'Произошла ошибка при фильтрации сотрудников',
+            'employees': [],
+            'count': 0
+        }), 500
+
+
+async def repair_info_async(repair_id):
+    """Асинхронный вариант /repair_info/<id>"""
+    try:
+        async with _async_session() as session:
+            repair = (await session.execute(repair_details_statement(repair_id))).scalars().first()
+            if repair is None:
+                return jsonify({'error': 'Ремонт не найден'}), 404
+            return jsonify(repair_item(repair))
+    except Exception as e:
+        return jsonify({'error': 'Ремонт не найден'}), 404
+
+
+# Эндпоинты, которые при ASYNC_JSON_API обслуживаются асинхронными view
+ASYNC_VIEWS = {
+    "main.api_filter_employees": api_filter_employees_async,
+    "main.repair_info": repair_info_async,
+}
+
+
+def register_async_views(app):
+    """Заменить синхронные view JSON-эндпоинтов на асинхронные (те же URL)"""
+    app.extensions["async_db"] = create_async_session_factory(app)
+    for endpoint, view in ASYNC_VIEWS.items():
+        app.view_functions[endpoint] = view
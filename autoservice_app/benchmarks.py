@@ -0,0 +1,285 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app
+from . import create_app, db
+from .models import Owner
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _copy_database(source, target):
+    """Копия базы через backup API (учитывает незаписанный WAL) в режиме journal_mode=DELETE"""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode = DELETE")
+    src.close()
+    dst.close()
+
+
+def _benchmark_config(**overrides):
+    """Класс конфигурации: текущие настройки приложения с заменой отдельных ключей"""
+    settings = {key: value for key, value in current_app.config.items() if key.isupper()}
+    # снимки метрик бенчмарка не должны попасть в /metrics рабочего сервера
+    settings["METRICS_ENABLED"] = False
+    settings.update(overrides)
+    return type("BenchmarkConfig", (), settings)
+
+
+def run_sqlite_workload(database_path, pragmas, duration=10.0, readers=8, writers=2):
+    """Смешанная нагрузка на копию базы: читатели — GET /api/requests,
+    писатели — добавление владельца с COMMIT после каждой записи
+
+    Возвращает словарь с числом операций, ошибок и задержками (мс).
+    """
+    workdir = tempfile.mkdtemp(prefix="autoservice-bench-")
+    try:
+        target = os.path.join(workdir, "autoservice.db")
+        _copy_database(database_path, target)
+        app = create_app(_benchmark_config(SQLALCHEMY_DATABASE_URI=f"sqlite:///{target}", SQLITE_PRAGMAS=pragmas))
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {"reads": [], "writes": [], "read_errors": 0, "write_errors": 0}
+
+        def record(kind, seconds, ok):
+            with lock:
+                if ok:
+                    stats[kind + "s"].append(seconds * 1000)
+                else:
+                    stats[kind + "_errors"] += 1
+
+        def reader():
+            client = app.test_client()
+            while not stop.is_set():
+                started = time.perf_counter()
+                response = client.get("/api/requests?limit=50")
+                record("read", time.perf_counter() - started, response.status_code < 500)
+
+        def writer(number):
+            sequence = 0
+            while not stop.is_set():
+                sequence += 1
+                started = time.perf_counter()
+                with app.app_context():
+                    try:
+                        db.session.add(Owner(last_name="Нагрузка", first_name=str(number),
+                                             phone=f"+7999{number:02d}{sequence:07d}"))
+                        db.session.commit()
+                        ok = True
+                    except Exception:
+                        # обычно "database is locked" после истечения ожидания блокировки
+                        db.session.rollback()
+                        ok = False
+                record("write", time.perf_counter() - started, ok)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(number,)) for number in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            db.engine.dispose()
+
+        return {
+            "reads_per_second": len(stats["reads"]) / elapsed,
+            "writes_per_second": len(stats["writes"]) / elapsed,
+            "read_errors": stats["read_errors"],
+            "write_errors": stats["write_errors"],
+            "read_p95_ms": _percentile(stats["reads"], 95),
+            "write_p95_ms": _percentile(stats["writes"], 95),
+            "write_max_ms": max(stats["writes"], default=0.0),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_sqlite_profiles(duration=10.0, readers=8, writers=2):
+    """Сравнить пропускную способность без PRAGMA (прежнее поведение) и с SQLITE_PRAGMAS"""
+    database_path = db.engine.url.database
+    profiles = {
+        "без PRAGMA": {},
+        "SQLITE_PRAGMAS": current_app.config.get("SQLITE_PRAGMAS") or {},
+    }
+    return {
+        name: run_sqlite_workload(database_path, pragmas, duration, readers, writers)
+        for name, pragmas in profiles.items()
+    }
+
+
+# Запросы, которыми страница ремонтов опрашивает JSON API
+JSON_API_URLS = (
+    "/api/employees/filter",
+    "/api/employees/filter?search=ов&limit=20",
+    "/api/employees/filter?availability=free&experience=middle",
+    "/repair_info/{repair_id}",
+)
+
+
+def run_json_api_workload(overrides, requests=2000, concurrency=32):
+    """Прогнать JSON API в concurrency потоках; возвращает запросов/с и задержки (мс)"""
+    from .models import Repair
+
+    app = create_app(_benchmark_config(**overrides))
+    with app.app_context():
+        repair_id = db.session.query(db.func.min(Repair.id)).scalar() or 1
+    urls = [url.format(repair_id=repair_id) for url in JSON_API_URLS]
+
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+    counter = iter(range(requests))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            started = time.perf_counter()
+            response = client.get(urls[number % len(urls)])
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += response.status_code >= 500
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "errors": errors[0],
+    }
+
+
+def compare_json_api(requests=2000, concurrency=32):
+    """Синхронные view (с индексом сотрудников и без) против асинхронных (ASYNC_JSON_API)"""
+    profiles = {
+        "sync, индекс": {"ASYNC_JSON_API": False, "EMPLOYEE_FILTER_INDEX": True},
+        "sync, SQL": {"ASYNC_JSON_API": False, "EMPLOYEE_FILTER_INDEX": False},
+        "async, SQL": {"ASYNC_JSON_API": True, "EMPLOYEE_FILTER_INDEX": False},
+    }
+    return {
+        name: run_json_api_workload(overrides, requests, concurrency)
+        for name, overrides in profiles.items()
+    }
+
+
+# Допустимый рост относительно базовой линии и абсолютные пороги шума
+REGRESSION_THRESHOLD = 0.25
+NOISE_MS = 2.0
+NOISE_KB = 256
+
+
+def _measure_route(app, client, url, repeat):
+    """Замер одного маршрута: медиана времени, запросы SQL, объекты ORM, пик памяти"""
+    import statistics
+    import tracemalloc
+    from sqlalchemy import event
+    from .diagnostics import StatementRecorder
+
+    loaded = [0]
+
+    def count_loaded(target, context):
+        loaded[0] += 1
+
+    def get():
+        # свой контекст приложения на каждый запрос, как у настоящего сервера
+        with app.app_context(), StatementRecorder() as recorder:
+            response = client.get(url)
+            response.get_data()
+            response.close()
+        return response, recorder.count
+
+    get()  # прогрев кэшей справочников и индекса сотрудников
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response, statements = get()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    event.listen(db.Model, "load", count_loaded, propagate=True)
+    try:
+        loaded[0] = 0
+        tracemalloc.start()
+        get()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        event.remove(db.Model, "load", count_loaded)
+
+    return {
+        "url": url,
+        "status": response.status_code,
+        "ms": statistics.median(timings),
+        "statements": statements,
+        "orm_rows": loaded[0],
+        "peak_kb": peak // 1024,
+    }
+
+
+def run_route_benchmarks(database_path, repeat=5, progress=None):
+    """Прогнать все GET-маршруты (diagnostics.iter_get_routes) на указанной базе
+
+    Возвращает {endpoint: метрики}. Маршруты с параметрами берут первую
+    запись таблицы, GET с побочными эффектами не запускаются.
+    """
+    from .diagnostics import iter_get_routes
+
+    app = create_app(_benchmark_config(SQLALCHEMY_DATABASE_URI=f"sqlite:///{database_path}"))
+    client = app.test_client()
+    results = {}
+    for endpoint, url in list(iter_get_routes(app)):
+        results[endpoint] = _measure_route(app, client, url, repeat)
+        if progress:
+            progress(endpoint, results[endpoint])
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Регрессии относительно базовой линии: список строк с описанием
+
+    Число SQL-запросов и объектов ORM на детерминированном наборе данных
+    воспроизводимо, поэтому любой их рост — регрессия. Время и память
+    сравниваются с допуском threshold и порогом шума (NOISE_MS, NOISE_KB).
+    """
+    regressions = []
+    for size, routes in results.items():
+        for endpoint, current in routes.items():
+            base = baseline.get(size, {}).get(endpoint)
+            if base is None:
+                continue
+            where = f"{endpoint} ({size} строк)"
+            if current["status"] != base["status"]:
+                regressions.append(f"{where}: HTTP {base['status']} -> {current['status']}")
+            for metric in ("statements", "orm_rows"):
+                if current[metric] > base[metric]:
+                    regressions.append(f"{where}: {metric} {base[metric]} -> {current[metric]}")
+            for metric, noise in (("ms", NOISE_MS), ("peak_kb", NOISE_KB)):
+                if current[metric] > base[metric] * (1 + threshold) and current[metric] - base[metric] > noise:
+                    regressions.append(f"{where}: {metric} {base[metric]:.1f} -> {current[metric]:.1f}")
+    return regressions
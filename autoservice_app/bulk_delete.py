@@ -0,0 +1,166 @@
+import time
+from collections import namedtuple
+from sqlalchemy import inspect
+from sqlalchemy.orm import RelationshipDirection
+from . import db
+from .models import Car, CompletedWork, Employee, Owner, Repair, ServiceRequest, SparePart, repair_employees
+from .table_versions import bump_versions, counters_version
+
+
+# Сколько корневых строк удаляется в одной транзакции
+DELETE_CHUNK_SIZE = 1000
+
+# Сущности для flask bulk-delete: модель и дата для отбора старых записей (--older-than)
+DeleteSpec = namedtuple("DeleteSpec", "model date_column")
+
+ENTITIES = {
+    "owners": DeleteSpec(Owner, None),
+    "cars": DeleteSpec(Car, None),
+    "requests": DeleteSpec(ServiceRequest, ServiceRequest.request_date),
+    "repairs": DeleteSpec(Repair, Repair.completion_date),
+    "spares": DeleteSpec(SparePart, SparePart.installed_date),
+    "works": DeleteSpec(CompletedWork, CompletedWork.completion_date),
+    "employees": DeleteSpec(Employee, None),
+}
+
+# Узел плана удаления: модель, внешний ключ на родителя (None у корня),
+# дочерние узлы и таблицы связей многие-ко-многим с колонкой на эту модель
+CascadeNode = namedtuple("CascadeNode", "model parent_column children secondaries")
+
+
+def cascade_plan(model):
+    """Дерево каскадного удаления модели по relationship(cascade='delete') из models.py
+
+    Связи многие-ко-многим не каскадируются, но их строки в secondary-таблице
+    ORM удаляет вместе с любой из сторон — они попадают в secondaries.
+    """
+    return _plan_node(model, None, ())
+
+
+def _plan_node(model, parent_column, path):
+    if model in path:
+        raise ValueError(f"Цикл каскадного удаления: {' -> '.join(m.__name__ for m in path + (model,))}")
+    children, secondaries = [], []
+    for relationship in inspect(model).relationships:
+        if relationship.secondary is not None:
+            column = next(remote for local, remote in relationship.local_remote_pairs
+                          if local.table is model.__table__)
+            secondaries.append(column)
+        elif relationship.direction is RelationshipDirection.ONETOMANY and relationship.cascade.delete:
+            (local, remote), = relationship.local_remote_pairs
+            children.append(_plan_node(relationship.mapper.class_, remote, path + (model,)))
+    return CascadeNode(model, parent_column, children, secondaries)
+
+
+def describe_plan(node, indent=0):
+    """Строки плана для вывода в консоль: дочерние таблицы удаляются раньше родителя"""
+    via = f" (по {node.parent_column.table.name}.{node.parent_column.name})" if node.parent_column is not None else ""
+    lines = [f"{'  ' * indent}{node.model.__tablename__}{via}"]
+    for column in node.secondaries:
+        lines.append(f"{'  ' * (indent + 1)}{column.table.name} (по {column.name})")
+    for child in node.children:
+        lines.extend(describe_plan(child, indent + 1))
+    return lines
+
+
+def _release_employees(connection, repair_ids):
+    """Уменьшить счётчики ремонтов сотрудников, снимаемых с удаляемых ремонтов"""
+    def released(condition):
+        return db.select(db.func.count()).select_from(repair_employees).join(
+            Repair, Repair.id == repair_employees.c.repair_id
+        ).where(
+            repair_employees.c.employee_id == Employee.id,
+            repair_employees.c.repair_id.in_(repair_ids),
+            condition,
+        ).scalar_subquery()
+
+    assigned = db.select(repair_employees.c.employee_id).where(repair_employees.c.repair_id.in_(repair_ids))
+    connection.execute(
+        db.update(Employee.__table__).where(Employee.id.in_(assigned)).values(
+            active_repairs_count=Employee.active_repairs_count - released(Repair.completion_date.is_(None)),
+            completed_repairs_count=Employee.completed_repairs_count - released(Repair.completion_date.isnot(None)),
+        )
+    )
+
+
+def _release_parts(connection, part_ids):
+    """Вычесть удаляемые запчасти из суммы и числа запчастей их ремонтов"""
+    def removed(value):
+        return db.select(value).where(
+            SparePart.repair_id == Repair.id, SparePart.id.in_(part_ids)
+        ).scalar_subquery()
+
+    affected = db.select(SparePart.repair_id).where(SparePart.id.in_(part_ids))
+    connection.execute(
+        db.update(Repair.__table__).where(Repair.id.in_(affected)).values(
+            parts_total=Repair.parts_total - removed(db.func.coalesce(db.func.sum(SparePart.cost * SparePart.quantity), 0.0)),
+            parts_count=Repair.parts_count - removed(db.func.count()),
+        )
+    )
+
+
+def _delete_node(connection, node, ids, deleted):
+    """Удалить строки узла с id из ids (список или подзапрос), начиная с потомков"""
+    model = node.model
+    for child in node.children:
+        child_ids = db.select(child.model.id).where(child.parent_column.in_(ids))
+        _delete_node(connection, child, child_ids, deleted)
+
+    for column in node.secondaries:
+        # Сотрудники переживают удаление ремонта — их счётчики нужно уменьшить
+        if column.table is repair_employees and model is Repair:
+            _release_employees(connection, ids)
+        result = connection.execute(db.delete(column.table).where(column.in_(ids)))
+        deleted[column.table.name] = deleted.get(column.table.name, 0) + result.rowcount
+
+    result = connection.execute(db.delete(model.__table__).where(model.id.in_(ids)))
+    deleted[model.__tablename__] = deleted.get(model.__tablename__, 0) + result.rowcount
+
+
+def bulk_delete(model, *criteria, chunk_size=DELETE_CHUNK_SIZE, progress=None):
+    """Удалить строки model по условиям вместе со всем, что удаляется каскадом
+
+    В отличие от db.session.delete() строки не загружаются в сессию:
+    id корневых строк выбираются пачками по chunk_size, для каждой пачки
+    выполняются DELETE ... WHERE ... IN (подзапрос) по дереву cascade_plan
+    от листьев к корню и COMMIT. Память ограничена одной пачкой id.
+    Денормализованные счётчики сотрудников и суммы запчастей ремонтов,
+    которые переживают удаление, уменьшаются в той же транзакции.
+    progress(roots, deleted, seconds) вызывается после каждой пачки.
+
+    Возвращает словарь {таблица: удалено строк} и время в секундах.
+    """
+    plan = cascade_plan(model)
+    tables = {model.__tablename__}
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        tables.add(node.model.__tablename__)
+        tables.update(column.table.name for column in node.secondaries)
+        stack.extend(node.children)
+    if repair_employees.name in tables:
+        tables.add(counters_version(Employee.__tablename__))
+    if model is SparePart:
+        tables.add(Repair.__tablename__)
+
+    select_ids = db.select(model.id).where(*criteria).order_by(model.id).limit(chunk_size)
+    deleted, roots = {}, 0
+    started = time.perf_counter()
+    try:
+        while True:
+            connection = db.session.connection()
+            ids = connection.execute(select_ids).scalars().all()
+            if not ids:
+                break
+            if model is SparePart:
+                _release_parts(connection, ids)
+            _delete_node(connection, plan, ids, deleted)
+            bump_versions(tables, connection)
+            db.session.commit()
+            roots += len(ids)
+            if progress:
+                progress(roots, deleted, time.perf_counter() - started)
+    except Exception:
+        db.session.rollback()
+        raise
+    return deleted, time.perf_counter() - started
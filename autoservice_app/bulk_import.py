@@ -0,0 +1,305 @@
+import csv
+import json
+import time
+from collections import namedtuple
+from datetime import date
+from sqlalchemy import insert, select
+from . import db
+from .models import Car, CompletedWork, Employee, Owner, Repair, ServiceRequest, SparePart, repair_employees
+from .table_versions import bump_versions
+
+
+# Строк в одном executemany и строк между COMMIT
+IMPORT_BATCH_SIZE = 10000
+IMPORT_COMMIT_EVERY = 200000
+
+# Настройки SQLite на время загрузки; после импорта прежние значения возвращаются.
+# synchronous=OFF безопасен для загрузки: при сбое импорт просто повторяют
+# (INSERT OR IGNORE пропускает уже загруженные строки). Внешние ключи
+# отключены, потому что нарушение не отменяется OR IGNORE и откатило бы всю
+# пачку: ссылки по id проверяются до вставки по множествам существующих
+# ключей, а новые строки, найденные PRAGMA foreign_key_check после загрузки, удаляются
+LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "foreign_keys": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",  # 256 МБ
+}
+
+
+def _text(value):
+    return str(value).strip()
+
+
+def _int(value):
+    return int(value)
+
+
+def _float(value):
+    return float(str(value).replace(',', '.'))
+
+
+def _date(value):
+    return date.fromisoformat(str(value)[:10])
+
+
+# Поле входного файла: имя колонки, преобразование, обязательность и значение по умолчанию
+Field = namedtuple("Field", "name convert required default", defaults=(False, None))
+
+# Ссылка по естественному ключу: поле файла -> колонка внешнего ключа,
+# словарь ключ -> id строится одним запросом перед загрузкой
+Lookup = namedtuple("Lookup", "source target key_column id_column")
+
+ImportSpec = namedtuple("ImportSpec", "table fields lookups")
+
+
+_OWNER_BY_PHONE = Lookup("owner_phone", "owner_id", Owner.phone, Owner.id)
+_CAR_BY_NUMBER = Lookup("car_number", "car_id", Car.number, Car.id)
+_EMPLOYEE_BY_PHONE = Lookup("employee_phone", "employee_id", Employee.phone, Employee.id)
+
+
+ENTITIES = {
+    "owners": ImportSpec(Owner.__table__, [
+        Field("last_name", _text, True),
+        Field("first_name", _text, True),
+        Field("middle_name", _text),
+        Field("phone", _text, True),
+    ], []),
+    "cars": ImportSpec(Car.__table__, [
+        Field("number", _text, True),
+        Field("brand", _text, True),
+        Field("release_date", _date, True),
+    ], [_OWNER_BY_PHONE]),
+    "employees": ImportSpec(Employee.__table__, [
+        Field("last_name", _text, True),
+        Field("first_name", _text, True),
+        Field("middle_name", _text),
+        Field("birth_date", _date, True),
+        Field("address", _text, True),
+        Field("phone", _text, True),
+        Field("position", _text, True),
+        Field("salary", _float, True),
+        Field("experience", _int, True),
+        Field("schedule", _text, True),
+        Field("bonus", _float, False, 0.0),
+    ], []),
+    # У обращений, ремонтов, запчастей и работ нет естественного ключа:
+    # id переносится из старой системы, чтобы на них можно было сослаться
+    "requests": ImportSpec(ServiceRequest.__table__, [
+        Field("id", _int),
+        Field("request_date", _date, True),
+        Field("issues", _text, True),
+    ], [_CAR_BY_NUMBER]),
+    "repairs": ImportSpec(Repair.__table__, [
+        Field("id", _int),
+        Field("request_id", _int, True),
+        Field("description", _text, True),
+        Field("completion_date", _date),
+        Field("cost", _float, False, 0.0),
+    ], []),
+    "spares": ImportSpec(SparePart.__table__, [
+        Field("id", _int),
+        Field("repair_id", _int, True),
+        Field("name", _text, True),
+        Field("number", _text, True),
+        Field("cost", _float, False, 0.0),
+        Field("quantity", _int, False, 1),
+        Field("installed_date", _date),
+    ], []),
+    "works": ImportSpec(CompletedWork.__table__, [
+        Field("id", _int),
+        Field("repair_id", _int, True),
+        Field("total_cost", _float, True),
+        Field("completion_date", _date),
+        Field("work_description", _text),
+    ], [_CAR_BY_NUMBER]),
+    "repair_employees": ImportSpec(repair_employees, [
+        Field("repair_id", _int, True),
+        Field("assigned_date", _date),
+    ], [_EMPLOYEE_BY_PHONE]),
+}
+
+
+def detect_format(path):
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def iter_records(stream, file_format):
+    """Построчное чтение CSV (с заголовком) или JSON Lines без загрузки файла в память"""
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _reference_keys(table):
+    """Колонка внешнего ключа -> множество id, на которые она может ссылаться"""
+    return {
+        fk.parent.name: set(db.session.execute(select(fk.column)).scalars())
+        for fk in table.foreign_keys
+    }
+
+
+def _violating_rowids(connection, table):
+    """rowid строк таблицы, нарушающих внешние ключи"""
+    rows = connection.exec_driver_sql(f"PRAGMA foreign_key_check({table.name})").fetchall()
+    return {row[1] for row in rows}
+
+
+def _convert(record, spec, maps, keys):
+    """Строка файла -> параметры INSERT; ValueError, если строку нельзя загрузить"""
+    row = {}
+    for field in spec.fields:
+        value = record.get(field.name)
+        if value is None or value == "":
+            if field.required:
+                raise ValueError(f"нет значения {field.name}")
+            row[field.name] = field.default
+            continue
+        try:
+            row[field.name] = field.convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"неверное значение {field.name}={value!r}")
+
+    for lookup in spec.lookups:
+        key = record.get(lookup.source)
+        if key not in (None, ""):
+            target_id = maps[lookup.source].get(_text(key))
+            if target_id is None:
+                raise ValueError(f"не найден {lookup.source}={key!r}")
+        elif record.get(lookup.target) not in (None, ""):
+            target_id = _int(record[lookup.target])
+        else:
+            raise ValueError(f"нет ни {lookup.source}, ни {lookup.target}")
+        row[lookup.target] = target_id
+
+    for column, existing in keys.items():
+        if row.get(column) is not None and row[column] not in existing:
+            raise ValueError(f"нет записи для {column}={row[column]}")
+    return row
+
+
+def import_records(entity, records, batch_size=IMPORT_BATCH_SIZE, commit_every=IMPORT_COMMIT_EVERY,
+                   progress=None, errors=None):
+    """Загрузить поток записей в таблицу сущности
+
+    Строки вставляются через executemany (INSERT OR IGNORE — дубликаты
+    по уникальным ключам пропускаются) пачками по batch_size, COMMIT
+    выполняется раз в commit_every строк. Внешние ключи по телефону
+    и госномеру разрешаются через словари в памяти, построенные одним
+    запросом. Строки со ссылкой на несуществующий id пропускаются как
+    ошибочные. progress(read, inserted, skipped, seconds) вызывается после
+    каждой пачки, errors(line, message) — для каждой пропущенной строки.
+
+    Возвращает словарь read / inserted / skipped / fk_violations /
+    fk_preexisting / seconds. fk_violations — загруженные строки, всё же
+    нарушившие внешние ключи (например, родительская запись удалена во время
+    загрузки); они удалены из таблицы. Удаляются только строки из диапазона
+    rowid этой загрузки, которых не было среди нарушений до неё;
+    fk_preexisting — нарушения, бывшие в таблице раньше, их импорт не трогает.
+    """
+    spec = ENTITIES[entity]
+    maps = {
+        lookup.source: dict(db.session.query(lookup.key_column, lookup.id_column).all())
+        for lookup in spec.lookups
+    }
+    keys = _reference_keys(spec.table)
+    db.session.remove()
+
+    stmt = insert(spec.table).prefix_with("OR IGNORE")
+    # Явный id строки — это её rowid; без него SQLite выдаёт rowid после максимального
+    id_column = "id" if "id" in spec.table.c and spec.table.c.id.primary_key else None
+    read = inserted = skipped = uncommitted = 0
+    first_rowid = None
+    started = time.perf_counter()
+
+    with db.engine.connect() as connection:
+        previous = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in LOAD_PRAGMAS
+        }
+        for name, value in LOAD_PRAGMAS.items():
+            connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+        last_before = connection.exec_driver_sql(f"SELECT max(rowid) FROM {spec.table.name}").scalar() or 0
+        violations_before = _violating_rowids(connection, spec.table)
+        connection.commit()
+
+        def flush(batch):
+            nonlocal inserted, uncommitted, first_rowid
+            if id_column:
+                ids = [row[id_column] for row in batch if row.get(id_column) is not None]
+                if ids:
+                    first_rowid = min(ids) if first_rowid is None else min(first_rowid, *ids)
+            inserted += connection.execute(stmt, batch).rowcount
+            uncommitted += len(batch)
+            if uncommitted >= commit_every:
+                bump_versions([spec.table.name], connection)
+                connection.commit()
+                uncommitted = 0
+            if progress:
+                progress(read, inserted, skipped, time.perf_counter() - started)
+
+        try:
+            batch = []
+            for read, record in enumerate(records, 1):
+                try:
+                    batch.append(_convert(record, spec, maps, keys))
+                except ValueError as e:
+                    skipped += 1
+                    if errors:
+                        errors(read, str(e))
+                    continue
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+
+            # Диапазон rowid этой загрузки: от наименьшего явного id (или следующего
+            # за прежним максимумом) до нынешнего максимума
+            last_rowid = connection.exec_driver_sql(f"SELECT max(rowid) FROM {spec.table.name}").scalar() or 0
+            low = last_before + 1 if first_rowid is None else min(first_rowid, last_before + 1)
+            violations = _violating_rowids(connection, spec.table)
+            rowids = sorted(
+                rowid for rowid in violations
+                if low <= rowid <= last_rowid and rowid not in violations_before
+            )
+            for start in range(0, len(rowids), 500):
+                chunk = rowids[start:start + 500]
+                connection.exec_driver_sql(
+                    f"DELETE FROM {spec.table.name} WHERE rowid IN ({','.join('?' * len(chunk))})",
+                    tuple(chunk),
+                )
+            inserted -= len(rowids)
+            fk_violations = len(rowids)
+            fk_preexisting = len(violations) - len(rowids)
+
+            bump_versions([spec.table.name], connection)
+            if spec.table.name in (Repair.__tablename__, repair_employees.name):
+                # Денормализованные счётчики при загрузке в обход ORM не поддерживаются — сверяем
+                Employee.reconcile_repair_counters(connection)
+            if spec.table.name == SparePart.__tablename__:
+                Repair.reconcile_parts(connection)
+            connection.commit()
+            # Статистика планировщика по выборке, чтобы не читать всю таблицу
+            connection.exec_driver_sql("PRAGMA analysis_limit = 1000")
+            connection.exec_driver_sql(f"ANALYZE {spec.table.name}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            for name, value in previous.items():
+                connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+            connection.commit()
+
+    return {
+        "read": read,
+        "inserted": inserted,
+        "skipped": skipped,
+        "fk_violations": fk_violations,
+        "fk_preexisting": fk_preexisting,
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,324 @@
+import click
+from flask import current_app
+from . import db
+from .benchmarks import REGRESSION_THRESHOLD
+from .bulk_delete import DELETE_CHUNK_SIZE, ENTITIES as DELETE_ENTITIES, bulk_delete, cascade_plan, describe_plan
+from .bulk_import import (
+    ENTITIES, IMPORT_BATCH_SIZE, IMPORT_COMMIT_EVERY, detect_format, import_records, iter_records
+)
+
+
+def register_commands(app):
+    """Регистрация CLI-команд приложения (flask <команда>)"""
+    app.cli.add_command(check_query_budget_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(benchmark_sqlite_command)
+    app.cli.add_command(serve_command)
+    app.cli.add_command(benchmark_async_command)
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(bulk_delete_command)
+    app.cli.add_command(benchmark_routes_command)
+    app.cli.add_command(startup_report_command)
+    app.cli.add_command(build_assets_command)
+
+
+@click.command("check-query-budget")
+def check_query_budget_command():
+    """Проверить число SQL-запросов на каждой странице"""
+    from .diagnostics import check_query_budgets
+
+    failed = False
+    for endpoint, url, status_code, count, budget in check_query_budgets(current_app):
+        ok = count <= budget and status_code < 400
+        failed = failed or not ok
+        status = "OK" if ok else "ОШИБКА"
+        click.echo(f"{status:7} {endpoint:32} {url:28} HTTP {status_code} запросов: {count} (бюджет {budget})")
+
+    if failed:
+        raise click.ClickException("Бюджет SQL-запросов превышен")
+
+
+@click.command("check-query-plans")
+@click.option("--min-rows", default=1000, show_default=True,
+              help="Минимальный размер таблицы, для которой полный SCAN считается ошибкой")
+def check_query_plans_command(min_rows):
+    """Проверить планы запросов всех страниц через EXPLAIN QUERY PLAN"""
+    from .diagnostics import check_query_plans
+
+    violations = check_query_plans(current_app, min_rows=min_rows)
+    for endpoint, table, rows, statement in violations:
+        click.echo(f"SCAN {table} ({rows} строк) на {endpoint}:")
+        click.echo(f"    {' '.join(statement.split())[:300]}")
+
+    if violations:
+        raise click.ClickException(f"Найдено полных сканирований: {len(violations)}")
+    click.echo("Полных сканирований больших таблиц не найдено")
+
+
+@click.command("import-data")
+@click.argument("entity", type=click.Choice(list(ENTITIES)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]),
+              help="Формат файла (по умолчанию — по расширению)")
+@click.option("--batch-size", default=IMPORT_BATCH_SIZE, show_default=True, help="Строк в одном executemany")
+@click.option("--commit-every", default=IMPORT_COMMIT_EVERY, show_default=True, help="Строк между COMMIT")
+def import_data_command(entity, path, file_format, batch_size, commit_every):
+    """Массовая загрузка данных из CSV или JSON Lines
+
+    Загружать в порядке зависимостей: owners, employees, cars, requests,
+    repairs, spares, works, repair_employees. Автомобили ссылаются на
+    владельца через owner_phone, обращения и работы на автомобиль через
+    car_number, назначения на сотрудника через employee_phone.
+    """
+
+    file_format = file_format or detect_format(path)
+    shown_errors = 0
+
+    def rate(read, seconds):
+        return f"{read / seconds if seconds else 0:,.0f}".replace(",", " ")
+
+    def progress(read, inserted, skipped, seconds):
+        click.echo(f"  прочитано {read}, добавлено {inserted}, пропущено {skipped} ({rate(read, seconds)} строк/с)")
+
+    def errors(line, message):
+        nonlocal shown_errors
+        # Первые ошибки показываем, остальные только считаем
+        if shown_errors < 20:
+            click.echo(f"  строка {line}: {message}", err=True)
+        shown_errors += 1
+
+    with open(path, encoding="utf-8", newline="") as stream:
+        result = import_records(entity, iter_records(stream, file_format), batch_size=batch_size,
+                                commit_every=commit_every, progress=progress, errors=errors)
+
+    ignored = result["read"] - result["skipped"] - result["inserted"]
+    click.echo(f"Импорт {entity}: прочитано {result['read']}, добавлено {result['inserted']}, "
+               f"дубликатов {ignored}, с ошибками {result['skipped']} "
+               f"за {result['seconds']:.1f} с ({rate(result['read'], result['seconds'])} строк/с)")
+    if result["fk_preexisting"]:
+        click.echo(f"Внимание: в таблице {entity} уже было {result['fk_preexisting']} строк со ссылками "
+                   f"на несуществующие записи (PRAGMA foreign_key_check({entity})); импорт их не менял",
+                   err=True)
+    if result["fk_violations"]:
+        click.echo(f"Ошибка: {result['fk_violations']} загруженных строк ссылались на несуществующие записи "
+                   f"(PRAGMA foreign_key_check({entity})) и удалены", err=True)
+        raise SystemExit(1)
+
+
+@click.command("benchmark-sqlite")
+@click.option("--duration", default=10.0, show_default=True, help="Длительность каждого прогона, с")
+@click.option("--readers", default=8, show_default=True, help="Потоков-читателей")
+@click.option("--writers", default=2, show_default=True, help="Потоков-писателей")
+def benchmark_sqlite_command(duration, readers, writers):
+    """Сравнить пропускную способность SQLite с SQLITE_PRAGMAS и без них
+
+    Нагрузка выполняется на временной копии текущей базы.
+    """
+    from .benchmarks import compare_sqlite_profiles
+
+    results = compare_sqlite_profiles(duration=duration, readers=readers, writers=writers)
+    click.echo(f"{'профиль':16} {'чтений/с':>9} {'записей/с':>10} {'ошибок':>7} "
+               f"{'p95 чтения':>11} {'p95 записи':>11} {'макс. записи':>13}")
+    for name, result in results.items():
+        errors = result["read_errors"] + result["write_errors"]
+        click.echo(f"{name:16} {result['reads_per_second']:9.0f} {result['writes_per_second']:10.0f} {errors:7} "
+                   f"{result['read_p95_ms']:9.1f}мс {result['write_p95_ms']:9.1f}мс {result['write_max_ms']:11.1f}мс")
+
+
+@click.command("benchmark-async")
+@click.option("--requests", "requests_count", default=2000, show_default=True, help="Запросов на профиль")
+@click.option("--concurrency", default=32, show_default=True, help="Одновременных клиентов")
+def benchmark_async_command(requests_count, concurrency):
+    """Сравнить синхронные и асинхронные (ASYNC_JSON_API) JSON-эндпоинты"""
+    from .benchmarks import compare_json_api
+
+    results = compare_json_api(requests=requests_count, concurrency=concurrency)
+    click.echo(f"{'профиль':14} {'запросов/с':>11} {'p50':>9} {'p95':>9} {'ошибок':>7}")
+    for name, result in results.items():
+        click.echo(f"{name:14} {result['requests_per_second']:11.0f} {result['p50_ms']:7.1f}мс "
+                   f"{result['p95_ms']:7.1f}мс {result['errors']:7}")
+
+
+@click.command("serve")
+@click.option("--bind", help="Адрес и порт, например 0.0.0.0:5001 (SERVER_BIND)")
+@click.option("--workers", type=int, help="Число процессов-воркеров (SERVER_WORKERS, по умолчанию — по числу ядер)")
+@click.option("--threads", type=int, help="Потоков в каждом воркере (SERVER_THREADS)")
+@click.option("--max-requests", type=int, help="Перезапускать воркер после N запросов (SERVER_MAX_REQUESTS)")
+@click.option("--graceful-timeout", type=int, help="Сколько секунд воркер дообрабатывает запросы при перезапуске")
+def serve_command(bind, workers, threads, max_requests, graceful_timeout):
+    """Запустить production-сервер (gunicorn) вместо отладочного app.run()"""
+    from .assets import build_assets
+    from .metrics import clear_metrics_directory
+    from .server import AutoserviceServer, server_options
+    from .startup import warm_up
+
+    options = server_options(current_app.config, bind=bind, workers=workers, threads=threads,
+                             max_requests=max_requests, graceful_timeout=graceful_timeout)
+    click.echo(f"Запуск на {options['bind']}: воркеров {options['workers']}, потоков {options['threads']}")
+    clear_metrics_directory(current_app)
+    built = build_assets(current_app)
+    click.echo(f"Статика: собрано файлов {len(built)}")
+    # Шаблоны компилируются в мастере до fork, воркеры получают их готовыми
+    warmed = warm_up(current_app)
+    click.echo(f"Прогрев: шаблонов {warmed['templates']} за {warmed['seconds'] * 1000:.0f} мс")
+    AutoserviceServer(current_app._get_current_object(), options).run()
+
+
+@click.command("reconcile-counters")
+def reconcile_counters_command():
+    """Пересчитать денормализованные счётчики
+
+    Счётчики активных и завершённых ремонтов сотрудников, сумма и число
+    запчастей ремонтов. Они поддерживаются приложением при каждой записи;
+    команда нужна после правок базы в обход приложения.
+    """
+    from .models import Employee, Repair
+
+    results = {
+        "счётчики ремонтов сотрудников": Employee.reconcile_repair_counters(),
+        "суммы запчастей ремонтов": Repair.reconcile_parts(),
+    }
+    db.session.commit()
+    for name, fixed in results.items():
+        click.echo(f"{name}: исправлено {fixed}" if fixed else f"{name}: расхождений нет")
+
+
+@click.command("bulk-delete")
+@click.argument("entity", type=click.Choice(list(DELETE_ENTITIES)))
+@click.option("--id", "ids", type=int, multiple=True, help="id удаляемой записи (можно повторять)")
+@click.option("--older-than", type=int, help="Удалить записи старше N дней (по дате записи)")
+@click.option("--chunk-size", default=DELETE_CHUNK_SIZE, show_default=True, help="Записей в одной транзакции")
+@click.option("--dry-run", is_flag=True, help="Только показать план и число записей")
+def bulk_delete_command(entity, ids, older_than, chunk_size, dry_run):
+    """Удалить записи вместе со всем, что удаляется каскадом
+
+    Например, flask bulk-delete works --older-than 365 или
+    flask bulk-delete owners --id 12. Зависимые записи удаляются
+    запросами DELETE ... IN (подзапрос) без загрузки в память.
+    """
+    from datetime import datetime, timedelta
+
+    spec = DELETE_ENTITIES[entity]
+    criteria = []
+    if ids:
+        criteria.append(spec.model.id.in_(ids))
+    if older_than is not None:
+        if spec.date_column is None:
+            raise click.UsageError(f"У {entity} нет даты для --older-than")
+        criteria.append(spec.date_column < datetime.utcnow().date() - timedelta(days=older_than))
+    if not criteria:
+        raise click.UsageError("Укажите --id или --older-than")
+
+    click.echo("План удаления (дочерние таблицы удаляются раньше родительских):")
+    for line in describe_plan(cascade_plan(spec.model)):
+        click.echo(f"  {line}")
+    matched = db.session.execute(db.select(db.func.count()).select_from(spec.model).where(*criteria)).scalar()
+    click.echo(f"Найдено записей {entity}: {matched}")
+    if dry_run or not matched:
+        return
+
+    def progress(roots, deleted, seconds):
+        click.echo(f"  {roots}/{matched} ({seconds:.1f} с): " + ", ".join(f"{t} {n}" for t, n in deleted.items()))
+
+    deleted, seconds = bulk_delete(spec.model, *criteria, chunk_size=chunk_size, progress=progress)
+    click.echo(f"Удалено за {seconds:.1f} с: " + ", ".join(f"{t} {n}" for t, n in deleted.items()))
+
+
+@click.command("benchmark-routes")
+@click.option("--sizes", default="1000,10000", show_default=True,
+              help="Строк в каждой таблице, через запятую (например, 1000,10000,100000,1000000)")
+@click.option("--repeat", default=5, show_default=True, help="Замеров времени на маршрут")
+@click.option("--baseline", "baseline_path",
+              help="Файл базовой линии (по умолчанию instance/benchmarks/routes-baseline.json)")
+@click.option("--save", is_flag=True, help="Записать результаты как новую базовую линию")
+@click.option("--threshold", default=REGRESSION_THRESHOLD, show_default=True,
+              help="Допустимый рост времени и памяти (0.25 = 25%)")
+@click.option("--rebuild", is_flag=True, help="Пересоздать наборы данных")
+def benchmark_routes_command(sizes, repeat, baseline_path, save, threshold, rebuild):
+    """Бенчмарк всех GET-маршрутов на детерминированных наборах данных
+
+    Наборы данных создаются один раз в instance/benchmarks. Для каждого
+    маршрута записываются медиана времени, число SQL-запросов, число
+    загруженных объектов ORM и пик памяти (tracemalloc). Без --save
+    результаты сравниваются с базовой линией; при регрессии команда
+    завершается с ошибкой. Время зависит от машины, поэтому базовая
+    линия хранится локально и записывается на той же машине.
+    """
+    import json
+    import os
+    from .benchmarks import compare_with_baseline, run_route_benchmarks
+    from .datasets import ensure_dataset
+
+    directory = os.path.join(current_app.instance_path, "benchmarks")
+    baseline_path = baseline_path or os.path.join(directory, "routes-baseline.json")
+    results = {}
+    for size in [int(value) for value in sizes.split(",") if value.strip()]:
+        def built(table, inserted, seconds):
+            click.echo(f"  {table}: {inserted} строк ({seconds:.1f} с)")
+
+        click.echo(f"Набор данных {size} строк на таблицу")
+        path = ensure_dataset(directory, size, rebuild=rebuild, progress=built)
+
+        def measured(endpoint, result):
+            click.echo(f"  {endpoint:30} HTTP {result['status']} {result['ms']:8.1f}мс "
+                       f"запросов {result['statements']:3} объектов ORM {result['orm_rows']:7} "
+                       f"память {result['peak_kb']:8} КБ")
+
+        results[str(size)] = run_route_benchmarks(path, repeat=repeat, progress=measured)
+
+    if save:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as stream:
+            json.dump(results, stream, ensure_ascii=False, indent=2, sort_keys=True)
+        click.echo(f"Базовая линия записана в {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        click.echo(f"Базовой линии {baseline_path} нет — запустите с --save")
+        return
+    with open(baseline_path, encoding="utf-8") as stream:
+        baseline = json.load(stream)
+    regressions = compare_with_baseline(results, baseline, threshold)
+    for line in regressions:
+        click.echo(f"РЕГРЕССИЯ {line}", err=True)
+    if regressions:
+        raise click.ClickException(f"Регрессий производительности: {len(regressions)}")
+    click.echo("Регрессий относительно базовой линии нет")
+
+
+@click.command("startup-report")
+def startup_report_command():
+    """Время холодного старта: импорт, create_app, прогрев и первый запрос
+
+    Каждый режим замеряется в новом процессе: без кэша байт-кода шаблонов,
+    с заполненным кэшем и с прогревом, как у воркеров flask serve.
+    Для каждого маршрута показано время первого и повторного запроса.
+    """
+    from .startup import startup_report
+
+    for mode, result in startup_report(current_app).items():
+        click.echo(f"{mode}: импорт {result['import_ms']:.0f} мс, create_app {result['create_app_ms']:.0f} мс, "
+                   f"прогрев {result['warm_up_ms']:.0f} мс (шаблонов {result['templates']}), "
+                   f"до первого ответа {result['first_request_ms']:.0f} мс")
+        for url, route in result["routes"].items():
+            click.echo(f"    {url:28} HTTP {route['status']} первый {route['first_ms']:7.1f}мс "
+                       f"повторный {route['steady_ms']:7.1f}мс")
+
+
+@click.command("build-assets")
+@click.option("--clean", is_flag=True, help="Удалить файлы прошлых сборок, которых нет в новом манифесте")
+def build_assets_command(clean):
+    """Собрать статику: минификация JS/CSS, хэш содержимого в имени, копии .gz и .br
+
+    Собранные файлы отдаются по /assets/... с Cache-Control: immutable,
+    ссылки на них строит asset_url() в шаблонах. flask serve выполняет
+    сборку перед запуском сам.
+    """
+    from .assets import assets_directory, build_assets
+
+    report = build_assets(current_app, clean=clean)
+    for name, item in report.items():
+        click.echo(f"{name:24} -> {item['file']:32} {item['source']:7} -> {item['size']:7} байт, "
+                   f"gz {item.get('gz', '-'):>6}, br {item.get('br', '-'):>6}")
+    click.echo(f"Собрано в {assets_directory(current_app)}")
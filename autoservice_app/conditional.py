@@ -0,0 +1,97 @@
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, request, session
+from . import db
+from .assets import manifest_version
+from .metrics import Metrics
+from .models import TableVersion
+
+
+def _templates_version(app):
+    """Отпечаток шаблонов: после обновления шаблонов старые ETag не совпадут
+
+    Считается один раз на процесс по времени изменения файлов, поэтому
+    у всех воркеров одного развёртывания он одинаковый.
+    """
+    version = app.extensions.get("templates_version")
+    if version is None:
+        stamps = []
+        for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                stamps.append(f"{os.path.relpath(path, app.root_path)}:{os.stat(path).st_mtime_ns}")
+        version = hashlib.sha1("|".join(sorted(stamps)).encode()).hexdigest()[:12]
+        app.extensions["templates_version"] = version
+    return version
+
+
+def page_validators(tables):
+    """(ETag, Last-Modified) страницы, которая читает таблицы tables
+
+    ETag складывается из счётчиков изменений таблиц (table_version),
+    max(id) каждой таблицы — он замечает и вставки в обход приложения, —
+    отпечатка шаблонов и сборки статики (ссылки asset_url), адреса страницы с параметрами и ожидающих
+    flash-сообщений (после POST страница не совпадёт с прежней).
+    Last-Modified — время последнего изменения любой из таблиц.
+    Всё читается одним SELECT из скалярных подзапросов по первичным ключам.
+    """
+    tables = tuple(tables)
+    # версии счётчиков (table_versions.counters_version) — без таблицы в схеме
+    id_tables = [db.metadata.tables[name] for name in tables
+                 if name in db.metadata.tables and "id" in db.metadata.tables[name].c]
+    row = db.session.execute(db.select(
+        db.select(db.func.max(TableVersion.updated_at)).where(
+            TableVersion.table_name.in_(tables)
+        ).scalar_subquery(),
+        *[db.select(TableVersion.version).where(TableVersion.table_name == name).scalar_subquery()
+          for name in tables],
+        *[db.select(db.func.max(table.c.id)).scalar_subquery() for table in id_tables],
+    )).one()
+    last_modified, versions, max_ids = row[0], row[1:len(tables) + 1], row[len(tables) + 1:]
+
+    payload = "|".join([
+        ",".join(f"{table}:{version or 0}" for table, version in zip(tables, versions)),
+        ",".join(f"{table.name}:{max_id}" for table, max_id in zip(id_tables, max_ids)),
+        _templates_version(current_app),
+        manifest_version(current_app),
+        request.full_path,
+        repr(session.get("_flashes", ())),
+    ])
+    return hashlib.sha1(payload.encode()).hexdigest()[:20], last_modified
+
+
+def conditional_page(*tables):
+    """Декоратор GET-страницы: ETag / Last-Modified и 304 без выполнения view
+
+    Если копия клиента актуальна, ответ 304 отдаётся до любых запросов ORM.
+    Актуальность проверяется только по If-None-Match: Last-Modified не
+    учитывает max(id), шаблоны, сборку статики и flash-сообщения, поэтому
+    запрос с одним If-Modified-Since получает полную страницу. При
+    ожидающем flash-сообщении страница отдаётся всегда, иначе оно не будет
+    показано. POST обрабатывается как обычно.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            etag, last_modified = page_validators(tables)
+            not_modified = not session.get("_flashes") and request.if_none_match.contains(etag)
+            Metrics.inc("autoservice_cache_requests_total", cache="conditional_get",
+                        result="hit" if not_modified else "miss")
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Браузер хранит страницу, но перед показом сверяет её с сервером
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import random
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, insert
+from . import db
+from .models import Car, CompletedWork, Employee, Owner, Repair, ServiceRequest, SparePart, repair_employees
+
+
+# Набор данных не зависит от текущей даты: все даты отсчитываются от неё
+REFERENCE_DATE = date(2026, 1, 1)
+DATASET_SEED = 20260101
+DATASET_BATCH = 10000
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Кузнецов", "Смирнов", "Попов", "Васильев", "Соколов",
+              "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов"]
+FIRST_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артем", "Илья",
+               "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Павел", "Тимофей"]
+MIDDLE_NAMES = ["Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", "Игоревич",
+                "Олегович", "Владимирович", "Николаевич", "Викторович"]
+BRANDS = ["Toyota", "BMW", "Audi", "Ford", "Honda", "Nissan", "Mercedes", "Volkswagen", "Hyundai", "Kia",
+          "Lada", "Chevrolet", "Renault", "Mazda", "Skoda"]
+POSITIONS = ["Механик", "Менеджер", "Электрик", "Слесарь", "Диагност", "Мастер", "Консультант",
+             "Старший механик", "Приемщик", "Шиномонтажник"]
+SCHEDULES = ["5/2", "2/2", "сменный", "гибкий"]
+ISSUES = ["Замена масла", "Ремонт тормозной системы", "Диагностика двигателя", "Замена фильтров",
+          "Ремонт подвески", "Замена аккумулятора", "Балансировка колес", "Ремонт КПП", "Кузовной ремонт"]
+SPARE_NAMES = ["Фильтр масляный", "Свеча зажигания", "Тормозной диск", "Фара", "Ремень ГРМ",
+               "Аккумулятор", "Шина", "Тормозная колодка", "Амортизатор", "Стартер", "Генератор"]
+
+
+def schema_fingerprint():
+    """Отпечаток схемы моделей: кэшированный набор данных пересоздаётся после миграций"""
+    columns = sorted(
+        f"{table.name}.{column.name}" for table in db.metadata.tables.values() for column in table.columns
+    )
+    return hashlib.sha1("|".join(columns).encode()).hexdigest()[:8]
+
+
+def dataset_path(directory, rows, seed=DATASET_SEED):
+    return os.path.join(directory, f"dataset-{rows}-{seed}-{schema_fingerprint()}.db")
+
+
+def _name(rng, i):
+    return {
+        "last_name": f"{rng.choice(LAST_NAMES)}{i}",
+        "first_name": f"{rng.choice(FIRST_NAMES)}",
+        "middle_name": f"{rng.choice(MIDDLE_NAMES)}",
+    }
+
+
+def _car_number(i):
+    letters = "ABEKMHOPCTYX"
+    return f"{letters[i % 12]}{letters[i // 12 % 12]}{i:07d}"
+
+
+def _days_before(rng, days):
+    return REFERENCE_DATE - timedelta(days=rng.randint(1, days))
+
+
+def _generate(rows, seed):
+    """Строки всех таблиц по порядку зависимостей: (таблица, итератор словарей)"""
+    rng = random.Random(seed)
+    # для выполненных работ нужны автомобиль обращения и дата завершения ремонта
+    request_car = []
+    repair_state = []
+
+    def owners():
+        for i in range(1, rows + 1):
+            yield {**_name(rng, i), "phone": f"+79{i:09d}"}
+
+    def cars():
+        for i in range(1, rows + 1):
+            yield {"number": _car_number(i), "brand": rng.choice(BRANDS),
+                   "release_date": date(2000, 1, 1) + timedelta(days=rng.randint(0, 8000)),
+                   "owner_id": rng.randint(1, rows)}
+
+    def employees():
+        for i in range(1, rows + 1):
+            yield {**_name(rng, i), "phone": f"+78{i:09d}",
+                   "birth_date": date(1970, 1, 1) + timedelta(days=rng.randint(0, 15000)),
+                   "address": f"г. Москва, ул. Ленина, д. {rng.randint(1, 200)}",
+                   "position": rng.choice(POSITIONS), "salary": float(rng.randint(30000, 120000)),
+                   "experience": rng.randint(1, 30), "schedule": rng.choice(SCHEDULES),
+                   "bonus": float(rng.randint(0, 20000))}
+
+    def requests():
+        for i in range(1, rows + 1):
+            car_id = rng.randint(1, rows)
+            request_car.append(car_id)
+            yield {"car_id": car_id, "request_date": _days_before(rng, 365),
+                   "issues": f"{rng.choice(ISSUES)} - {rng.choice(['срочно', 'планово', 'по гарантии'])}"}
+
+    def repairs():
+        for i in range(1, rows + 1):
+            request_id = rng.randint(1, rows)
+            completion_date = _days_before(rng, 180) if rng.random() < 0.5 else None
+            cost = float(rng.randint(1000, 50000))
+            repair_state.append((request_id, completion_date, cost))
+            yield {"request_id": request_id, "description": f"Ремонт {i}: {rng.choice(ISSUES)}",
+                   "completion_date": completion_date, "cost": cost}
+
+    def assignments():
+        # 1–2 сотрудника на ремонт
+        for repair_id in range(1, rows + 1):
+            first = rng.randint(1, rows)
+            yield {"repair_id": repair_id, "employee_id": first, "assigned_date": REFERENCE_DATE}
+            second = rng.randint(1, rows)
+            if second != first and rng.random() < 0.5:
+                yield {"repair_id": repair_id, "employee_id": second, "assigned_date": REFERENCE_DATE}
+
+    def spares():
+        for i in range(1, rows + 1):
+            yield {"repair_id": rng.randint(1, rows),
+                   "name": f"{rng.choice(SPARE_NAMES)} {rng.choice(['оригинал', 'аналог'])}",
+                   "number": f"SP-{i:07d}", "cost": float(rng.randint(500, 15000)),
+                   "quantity": rng.randint(1, 5), "installed_date": _days_before(rng, 30)}
+
+    def works():
+        for repair_id, (request_id, completion_date, cost) in enumerate(repair_state, 1):
+            if completion_date is not None:
+                yield {"car_id": request_car[request_id - 1], "repair_id": repair_id,
+                       "total_cost": cost, "completion_date": completion_date,
+                       "work_description": f"Выполнено: ремонт {repair_id}"}
+
+    return [
+        (Owner.__table__, owners), (Car.__table__, cars), (Employee.__table__, employees),
+        (ServiceRequest.__table__, requests), (Repair.__table__, repairs), (repair_employees, assignments),
+        (SparePart.__table__, spares), (CompletedWork.__table__, works),
+    ]
+
+
+def build_dataset(path, rows, seed=DATASET_SEED, progress=None):
+    """Создать базу SQLite с детерминированным набором данных (rows строк в каждой таблице)
+
+    Один и тот же seed даёт одинаковые данные на любой машине, поэтому
+    результаты бенчмарков сравнимы между запусками. Схема создаётся по
+    моделям, строки вставляются через executemany, денормализованные
+    счётчики сверяются в конце, затем выполняется ANALYZE.
+    progress(table, inserted, seconds) вызывается после каждой таблицы.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    started = time.perf_counter()
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("PRAGMA synchronous = OFF")
+            connection.exec_driver_sql("PRAGMA journal_mode = MEMORY")
+        with engine.begin() as connection:
+            for table, rows_of in _generate(rows, seed):
+                inserted, batch = 0, []
+                for row in rows_of():
+                    batch.append(row)
+                    if len(batch) >= DATASET_BATCH:
+                        connection.execute(insert(table), batch)
+                        inserted += len(batch)
+                        batch = []
+                if batch:
+                    connection.execute(insert(table), batch)
+                    inserted += len(batch)
+                if progress:
+                    progress(table.name, inserted, time.perf_counter() - started)
+            Employee.reconcile_repair_counters(connection)
+            Repair.reconcile_parts(connection)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    except Exception:
+        engine.dispose()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    engine.dispose()
+    return path
+
+
+def ensure_dataset(directory, rows, seed=DATASET_SEED, rebuild=False, progress=None):
+    """Путь к набору данных, созданному при первом обращении и переиспользуемому дальше"""
+    os.makedirs(directory, exist_ok=True)
+    path = dataset_path(directory, rows, seed)
+    if rebuild or not os.path.exists(path):
+        build_dataset(path, rows, seed, progress)
+    return path
@@ -0,0 +1,179 @@
+import re
+from sqlalchemy import event, text
+from . import db
+
+
+# Максимальное число SQL-запросов на один GET каждой страницы.
+# Бюджет не зависит от размера страницы: связи грузятся через QueryProfiles.
+# Страницы с conditional_page тратят один запрос на ETag; ответ 304 — только его.
+ROUTE_QUERY_BUDGETS = {
+    "main.index": 0,
+    "main.owners": 2,
+    "main.cars": 3,
+    "main.requests": 4,
+    "main.repairs": 9,
+    "main.spares": 4,
+    "main.employees": 2,
+    "main.works": 4,
+    "main.api_filter_employees": 1,
+    "main.repair_info": 2,
+    "main.api_requests": 1,
+    "main.api_active_repairs": 2,
+    "main.api_works": 2,
+    "main.api_employee_options": 1,
+    "main.api_repairs": 3,
+}
+
+
+# Таблицы, которые страница законно читает целиком (несортированные
+# справочники и выпадающие списки): полный SCAN по ним не считается ошибкой
+PLAN_SCAN_ALLOWED = {
+    "main.owners": {"owner"},
+    "main.cars": {"car", "owner"},
+    "main.requests": {"car"},
+    "main.repairs": {"service_request", "employee"},
+    "main.spares": {"repair", "spare_part"},
+    "main.employees": {"employee"},
+    # итоги по всей истории считаются агрегатом по таблице
+    "main.works": {"completed_work"},
+    # индекс сотрудников строится одним чтением всей таблицы
+    "main.api_filter_employees": {"employee"},
+}
+
+# SCAN CONSTANT ROW — SELECT без FROM (например, из одних подзапросов), это не таблица
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)')
+_ALIAS_RE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS\s+(\w+))?', re.IGNORECASE)
+
+
+class StatementRecorder:
+    """Контекстный менеджер, записывающий все SQL-запросы к движку"""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        if self.engine is None:
+            self.engine = db.engine
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        return False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+def sample_route_args(endpoint):
+    """Аргументы URL для страниц с параметрами (берём первую запись таблицы)
+
+    Маршруты с параметрами, которых здесь нет, пропускаются: среди них
+    есть GET с побочными эффектами (например, завершение ремонта).
+    """
+    from .models import Repair
+
+    if endpoint == "main.repair_info":
+        repair_id = db.session.query(db.func.min(Repair.id)).scalar()
+        return {"repair_id": repair_id} if repair_id else None
+    if endpoint == "main.api_repairs":
+        # пакет из первых ремонтов — число запросов не должно зависеть от размера пакета
+        ids = db.session.execute(db.select(Repair.id).order_by(Repair.id).limit(50)).scalars().all()
+        return {"ids": ",".join(map(str, ids))}
+    return None
+
+
+def iter_get_routes(app):
+    """Все GET-маршруты приложения с подставленными аргументами"""
+    from flask import url_for
+
+    with app.test_request_context():
+        for rule in app.url_map.iter_rules():
+            if "GET" not in rule.methods or rule.endpoint == "static":
+                continue
+            args = sample_route_args(rule.endpoint)
+            if args is None and not rule.arguments:
+                args = {}
+            if args is None:
+                continue
+            yield rule.endpoint, url_for(rule.endpoint, **args)
+
+
+def check_query_budgets(app):
+    """Прогнать все GET-страницы и сравнить число запросов с бюджетом
+
+    Бюджет относится к установившемуся режиму: перед замером страница
+    запрашивается один раз, чтобы прогреть кэш справочников и индекс
+    сотрудников. Возвращает список кортежей (endpoint, url, status, count, budget).
+    """
+    results = []
+    client = app.test_client()
+    for endpoint, url in list(iter_get_routes(app)):
+        if endpoint not in ROUTE_QUERY_BUDGETS:
+            continue
+        # свой контекст приложения на каждый запрос, как у настоящего сервера:
+        # иначе g (и версии таблиц в нём) переживает запрос
+        with app.app_context():
+            client.get(url).get_data()
+        with app.app_context(), StatementRecorder() as recorder:
+            response = client.get(url)
+            # потоковые страницы выполняют запросы по мере чтения тела ответа
+            response.get_data()
+        results.append((endpoint, url, response.status_code, recorder.count, ROUTE_QUERY_BUDGETS[endpoint]))
+    return results
+
+
+def _table_aliases(statement):
+    """Соответствие псевдоним -> таблица для FROM/JOIN в запросе"""
+    aliases = {}
+    for table, alias in _ALIAS_RE.findall(statement):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def explain_full_scans(statement, parameters):
+    """Таблицы, которые план запроса читает полным SCAN без индекса"""
+    aliases = _table_aliases(statement)
+    scans = set()
+    with db.engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    for row in plan:
+        detail = row[-1]
+        match = _SCAN_RE.match(detail)
+        if match and "USING" not in detail:
+            scans.add(aliases.get(match.group(1), match.group(1)))
+    return scans
+
+
+def check_query_plans(app, min_rows=1000):
+    """Выполнить EXPLAIN QUERY PLAN для всех запросов GET-страниц
+
+    Возвращает список нарушений (endpoint, таблица, строк в таблице, запрос):
+    полный SCAN таблицы, в которой не меньше min_rows строк.
+    """
+    table_rows = {
+        table.name: db.session.execute(text(f'SELECT count(*) FROM "{table.name}"')).scalar()
+        for table in db.metadata.sorted_tables
+    }
+
+    violations = []
+    client = app.test_client()
+    for endpoint, url in list(iter_get_routes(app)):
+        with app.app_context(), StatementRecorder() as recorder:
+            client.get(url).get_data()
+        allowed = PLAN_SCAN_ALLOWED.get(endpoint, set())
+        for statement, parameters in recorder.statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            for table in sorted(explain_full_scans(statement, parameters)):
+                rows = table_rows.get(table, 0)
+                if rows >= min_rows and table not in allowed:
+                    violations.append((endpoint, table, rows, statement))
+    return violations
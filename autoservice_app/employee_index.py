@@ -0,0 +1,177 @@
+import threading
+from . import db
+from .metrics import Metrics
+from .models import Employee
+from .table_versions import counters_version, versions_key
+
+
+# Таблицы, от которых зависит индекс: при изменении любой из них он перестраивается.
+# Занятость берётся из счётчика Employee.active_repairs_count, поэтому кроме
+# самой таблицы employee индекс зависит от версии её счётчиков (назначения
+# и завершение ремонтов)
+INDEX_TABLES = (Employee.__tablename__, counters_version(Employee.__tablename__))
+
+# Длина n-грамм для поиска по имени: короткие запросы (до 3 символов)
+# отвечаются одним словарём, длинные — пересечением триграмм
+NGRAM_SIZE = 3
+
+
+def experience_level(years):
+    """Уровень стажа в терминах фильтра: junior / middle / senior"""
+    if years < 3:
+        return 'junior'
+    if years <= 8:
+        return 'middle'
+    return 'senior'
+
+
+def _iter_bits(mask):
+    """Номера установленных битов в порядке возрастания"""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield byte_index * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+class EmployeeIndex:
+    """Индекс сотрудников в памяти процесса для /api/employees/filter
+
+    Каждому сотруднику соответствует номер бита. Для должности, графика,
+    уровня стажа, занятости и n-грамм имени хранятся битовые маски
+    (целые числа Python), поэтому любая комбинация фильтров сводится
+    к нескольким операциям AND. Индекс строится одним SQL-запросом
+    и перестраивается, когда меняется версия любой из таблиц INDEX_TABLES
+    (см. table_versions) — в том числе после записи в другом процессе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._version = None
+        self._rows = []
+        self._names = []
+        self._all = 0
+        self._free = 0
+        self._by_position = {}
+        self._by_schedule = {}
+        self._by_experience = {}
+        self._grams = {}
+
+    def invalidate(self):
+        """Сбросить индекс — он будет перестроен при следующем поиске"""
+        with self._lock:
+            self._reset()
+
+    def search(self, search='', position='', experience='', schedule='', availability='',
+               limit=100, offset=0):
+        """Найти сотрудников по фильтрам
+
+        Возвращает (строки страницы, общее количество найденных).
+        """
+        version = versions_key(INDEX_TABLES)
+        with self._lock:
+            if self._version != version:
+                Metrics.inc("autoservice_cache_requests_total", cache="employee_index", result="miss")
+                self._build()
+                self._version = version
+            else:
+                Metrics.inc("autoservice_cache_requests_total", cache="employee_index", result="hit")
+
+            mask = self._all
+            if position:
+                mask &= self._by_position.get(position, 0)
+            if schedule:
+                mask &= self._by_schedule.get(schedule, 0)
+            if experience in ('junior', 'middle', 'senior'):
+                mask &= self._by_experience.get(experience, 0)
+            if availability == 'free':
+                mask &= self._free
+            elif availability == 'busy':
+                mask &= self._all & ~self._free
+            if search:
+                mask = self._match_name(search.lower(), mask)
+
+            total = bin(mask).count('1')
+            # Биты идут в порядке сортировки по имени, поэтому страница — первые offset + limit битов
+            indexes = []
+            for index in _iter_bits(mask):
+                if len(indexes) >= offset + limit:
+                    break
+                indexes.append(index)
+            indexes = indexes[offset:]
+
+            return [self._rows[i] for i in indexes], total
+
+    def _match_name(self, query, mask):
+        if len(query) <= NGRAM_SIZE:
+            return mask & self._grams.get(query, 0)
+
+        for start in range(len(query) - NGRAM_SIZE + 1):
+            mask &= self._grams.get(query[start:start + NGRAM_SIZE], 0)
+            if not mask:
+                return 0
+
+        # Триграммы дают кандидатов, точное совпадение проверяем по каждой части имени
+        exact = 0
+        for index in _iter_bits(mask):
+            if any(query in part for part in self._names[index]):
+                exact |= 1 << index
+        return exact
+
+    def _build(self):
+        rows = db.session.query(
+            Employee.id, Employee.last_name, Employee.first_name, Employee.middle_name,
+            Employee.position, Employee.experience, Employee.schedule, Employee.salary,
+            Employee.active_repairs_count,
+        ).order_by(
+            Employee.last_name, Employee.first_name, Employee.id
+        ).all()
+
+        self._reset()
+        for (emp_id, last_name, first_name, middle_name, position,
+             experience, schedule, salary, active_count) in rows:
+            self._append({
+                'id': emp_id,
+                'last_name': last_name,
+                'first_name': first_name,
+                'middle_name': middle_name,
+                'position': position,
+                'experience': experience,
+                'schedule': schedule,
+                'salary': salary,
+                'active_repairs_count': active_count,
+            })
+
+    def _append(self, row):
+        index = len(self._rows)
+        bit = 1 << index
+
+        row['full_name'] = f"{row['last_name']} {row['first_name']} {row['middle_name'] or ''}".strip()
+        self._rows.append(row)
+
+        self._all |= bit
+        if row['active_repairs_count'] <= Employee.BUSY_THRESHOLD:
+            self._free |= bit
+        self._by_position[row['position']] = self._by_position.get(row['position'], 0) | bit
+        self._by_schedule[row['schedule']] = self._by_schedule.get(row['schedule'], 0) | bit
+        level = experience_level(row['experience'])
+        self._by_experience[level] = self._by_experience.get(level, 0) | bit
+
+        parts = tuple(
+            (part or '').lower() for part in (row['last_name'], row['first_name'], row['middle_name'])
+        )
+        self._names.append(parts)
+        grams = set()
+        for part in parts:
+            for size in range(1, NGRAM_SIZE + 1):
+                for start in range(len(part) - size + 1):
+                    grams.add(part[start:start + size])
+        for gram in grams:
+            self._grams[gram] = self._grams.get(gram, 0) | bit
+
+
+employee_index = EmployeeIndex()
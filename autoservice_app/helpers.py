@@ -0,0 +1,87 @@
+import html
+import re
+
+
+class SecurityHelper:
+
+    @staticmethod
+    def sanitize_input(input_string):
+        """Защита от XSS и HTML injection"""
+        if input_string is None:
+            return ""
+        # Экранирование HTML символов
+        sanitized = html.escape(str(input_string))
+        # Удаление потенциально опасных тегов
+        sanitized = re.sub(r'<script.*?>.*?</script>', '', sanitized, flags=re.IGNORECASE)
+        sanitized = re.sub(r'javascript:', '', sanitized, flags=re.IGNORECASE)
+        sanitized = re.sub(r'on\w+=', '', sanitized, flags=re.IGNORECASE)
+        return sanitized
+
+    @staticmethod
+    def validate_phone(phone):
+        """Валидация номера телефона"""
+        if not phone:
+            return False
+        # Российский формат номеров
+        pattern = r'^(\+7|8)[\d\-\(\)\s]{10,15}$'
+        return bool(re.match(pattern, str(phone)))
+
+    @staticmethod
+    def validate_email(email):
+        """Валидация email (если добавите в будущем)"""
+        if not email:
+            return True
+        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        return bool(re.match(pattern, str(email)))
+
+    @staticmethod
+    def sanitize_sql_identifier(identifier):
+        """Защита от SQL injection для идентификаторов"""
+        # Разрешаем только буквы, цифры и подчеркивания
+        if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', str(identifier)):
+            return identifier
+        raise ValueError("Invalid SQL identifier")
+
+
+class ViewHelper:
+    """Класс-помощник для улучшения отображения данных"""
+
+    @staticmethod
+    def format_currency(amount):
+        if amount is None:
+            return "0.00 ₽"
+        return f"{amount:,.2f} ₽".replace(',', ' ')
+
+    @staticmethod
+    def get_repair_display_data(repairs, repair_type):
+        """Подготовка данных для отображения ремонтов"""
+        display_data = []
+        for repair in repairs:
+            if repair_type == 'active':
+                display_data.append({
+                    'id': repair.id,
+                    'description': SecurityHelper.sanitize_input(repair.description),
+                    'start_date': repair.formatted_start_date,
+                    'car': repair.request.car.display_info if repair.request else 'Не указан',
+                    'cost': repair.cost or 0,
+                    'request_date': repair.request.formatted_request_date if repair.request else '',
+                    'parts_count': repair.parts_count,
+                    'employees': repair.employees,
+                    'employees_count': len(repair.employees),
+                    'repair_obj': repair
+                })
+            else:  # completed
+                display_data.append({
+                    'id': repair.id,
+                    'car': repair.car.display_info if repair.car else 'Не указан',
+                    'description': SecurityHelper.sanitize_input(
+                        repair.repair.description if repair.repair else ''
+                    ),
+                    'total_cost': repair.total_cost,
+                    'completion_date': repair.formatted_completion_date,
+                    'work_description': SecurityHelper.sanitize_input(repair.work_description),
+                    'parts_count': repair.repair.parts_count if repair.repair else 0,
+                    'employees': repair.repair.employees if repair.repair else [],
+                    'employees_count': len(repair.repair.employees) if repair.repair else 0
+                })
+        return display_data
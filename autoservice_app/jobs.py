@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from . import db
+from .models import CompletedWork, Job
+from .processes import process_alive
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Задача отменена пользователем (бросается из JobContext.check_cancelled)"""
+
+
+def _update_job(job_id, *conditions, **values):
+    """Обновить строку задачи в отдельной короткой транзакции
+
+    Состояние задачи пишется мимо db.session, чтобы не фиксировать
+    незавершённую работу обработчика. Возвращает число обновлённых строк.
+    """
+    with db.engine.begin() as connection:
+        return connection.execute(
+            db.update(Job.__table__).where(Job.id == job_id, *conditions).values(**values)
+        ).rowcount
+
+
+class JobContext:
+    """Связь обработчика задачи с её строкой в таблице job
+
+    progress() и check_cancelled() вызываются между транзакциями
+    обработчика (например, из progress-колбэка bulk_delete).
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def progress(self, message):
+        _update_job(self.job_id, message=message[:255])
+
+    def cancelled(self):
+        with db.engine.connect() as connection:
+            return bool(connection.execute(
+                db.select(Job.cancel_requested).where(Job.id == self.job_id)
+            ).scalar())
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Фоновые задачи в пуле потоков текущего процесса
+
+    Обработчики регистрируются декоратором register(kind). submit()
+    записывает задачу в таблицу job и сразу возвращает её — работа идёт
+    в потоке пула (JOB_WORKERS потоков на процесс), HTTP-запрос не ждёт.
+    Статус, прогресс, результат и отмена хранятся в таблице, поэтому
+    их видно из любого воркера gunicorn. Ожидающую задачу, процесс
+    которой завершился (перезапуск воркера), забирает себе другой процесс
+    (resume_queued); выполнявшаяся в нём задача помечается как прерванная.
+    """
+
+    _registry = {}
+    _executors = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, kind):
+        """Декоратор обработчика: handler(context, **params) -> результат (JSON)"""
+        def decorator(func):
+            cls._registry[kind] = func
+            return func
+        return decorator
+
+    @classmethod
+    def kinds(cls):
+        return sorted(cls._registry)
+
+    @classmethod
+    def submit(cls, kind, **params):
+        """Поставить задачу в очередь и вернуть её строку (Job)"""
+        if kind not in cls._registry:
+            raise KeyError(f"Неизвестный тип задачи: {kind}")
+        job = Job(kind=kind, status=Job.QUEUED, params=json.dumps(params, ensure_ascii=False),
+                  worker_pid=os.getpid())
+        db.session.add(job)
+        db.session.commit()
+        app = current_app._get_current_object()
+        cls._executor(app).submit(cls._run, app, job.id)
+        return job
+
+    @classmethod
+    def get(cls, job_id):
+        """Строка задачи (None, если такой нет)"""
+        job = db.session.get(Job, job_id)
+        if job is not None and not job.is_finished and job.worker_pid and not process_alive(job.worker_pid):
+            if job.status == Job.QUEUED:
+                cls._claim(current_app._get_current_object(), job.id, job.worker_pid)
+            else:
+                _update_job(job_id, Job.status == Job.RUNNING,
+                            status=Job.FAILED, error="Процесс, выполнявший задачу, завершился",
+                            finished_at=datetime.utcnow())
+            db.session.refresh(job)
+        return job
+
+    @classmethod
+    def resume_queued(cls, app):
+        """Забрать в пул этого процесса ожидающие задачи завершившихся процессов
+
+        Вызывается при старте воркера: задачи, поставленные в очередь
+        воркером, который перезапустился до их начала, иначе не выполнились
+        бы никогда. Возвращает число забранных задач.
+        """
+        with app.app_context():
+            rows = db.session.execute(
+                db.select(Job.id, Job.worker_pid).where(Job.status == Job.QUEUED)
+            ).all()
+            db.session.remove()
+            return sum(cls._claim(app, job_id, pid) for job_id, pid in rows
+                       if pid != os.getpid() and (pid is None or not process_alive(pid)))
+
+    @classmethod
+    def _claim(cls, app, job_id, pid):
+        # Условие на прежний pid: из нескольких процессов задачу забирает только один
+        owner = Job.worker_pid.is_(None) if pid is None else Job.worker_pid == pid
+        claimed = _update_job(job_id, Job.status == Job.QUEUED, owner, worker_pid=os.getpid())
+        if claimed:
+            cls._executor(app).submit(cls._run, app, job_id)
+        return claimed
+
+    @classmethod
+    def cancel(cls, job_id):
+        """Отменить задачу: ожидающая снимается сразу, выполняемая — при следующей проверке"""
+        _update_job(job_id, Job.status == Job.QUEUED,
+                    status=Job.CANCELLED, cancel_requested=True, finished_at=datetime.utcnow())
+        _update_job(job_id, Job.status == Job.RUNNING, cancel_requested=True)
+        return cls.get(job_id)
+
+    @classmethod
+    def _executor(cls, app):
+        # Пул создаётся лениво в каждом процессе: потоки мастера не переживают fork
+        pid = os.getpid()
+        with cls._lock:
+            executor = cls._executors.get(pid)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=app.config.get("JOB_WORKERS", 2),
+                                              thread_name_prefix="job")
+                cls._executors = {pid: executor}
+            return executor
+
+    @classmethod
+    def _run(cls, app, job_id):
+        with app.app_context():
+            started = _update_job(job_id, Job.status == Job.QUEUED,
+                                  status=Job.RUNNING, started_at=datetime.utcnow())
+            if not started:
+                return  # отменена, пока ждала в очереди
+            job = db.session.get(Job, job_id)
+            kind, params = job.kind, json.loads(job.params or "{}")
+            db.session.close()
+
+            try:
+                result = cls._registry[kind](JobContext(job_id), **params)
+            except JobCancelled:
+                db.session.rollback()
+                _update_job(job_id, status=Job.CANCELLED, finished_at=datetime.utcnow())
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("Ошибка фоновой задачи %s #%s", kind, job_id)
+                _update_job(job_id, status=Job.FAILED, error=str(e), finished_at=datetime.utcnow())
+            else:
+                _update_job(job_id, status=Job.SUCCEEDED, finished_at=datetime.utcnow(),
+                            result=json.dumps(result, ensure_ascii=False, default=str))
+
+
+@JobRunner.register("cleanup_works")
+def _cleanup_works(context, days=365):
+    def progress(roots, deleted, seconds):
+        context.progress(f"Удалено записей: {roots}")
+        context.check_cancelled()
+
+    return {"deleted": CompletedWork.cleanup_old_records(days=days, progress=progress)}
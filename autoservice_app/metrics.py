@@ -0,0 +1,417 @@
+import atexit
+import fcntl
+import hmac
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from flask import Blueprint, abort, current_app, request
+from . import db
+from .processes import process_alive
+
+
+logger = logging.getLogger(__name__)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SQL_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Имя метрики -> (тип, описание, границы корзин гистограммы)
+METRICS = {
+    "autoservice_http_requests_total": (
+        "counter", "HTTP-запросы по endpoint, методу и коду ответа", None),
+    "autoservice_http_request_duration_seconds": (
+        "histogram", "Время ответа, включая отдачу тела потоковых страниц", LATENCY_BUCKETS),
+    "autoservice_http_response_size_bytes": (
+        "histogram", "Размер тела ответа", SIZE_BUCKETS),
+    "autoservice_sql_statements_per_request": (
+        "histogram", "Число SQL-запросов за HTTP-запрос", SQL_COUNT_BUCKETS),
+    "autoservice_sql_duration_seconds": (
+        "histogram", "Суммарное время SQL за HTTP-запрос", SQL_SECONDS_BUCKETS),
+    "autoservice_sql_statements_total": (
+        "counter", "SQL-запросы, выполненные при обработке HTTP-запросов", None),
+    "autoservice_db_pool_checkout_seconds": (
+        "histogram", "Ожидание соединения из пула SQLAlchemy", POOL_WAIT_BUCKETS),
+    "autoservice_db_pool_checked_out": (
+        "gauge", "Соединения, выданные из пула сейчас", None),
+    "autoservice_cache_requests_total": (
+        "counter", "Обращения к кэшам: result=hit|miss", None),
+}
+
+ARCHIVE_FILE = "archive.json"
+LOCK_FILE = "metrics.lock"
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """Метрики процесса и их объединение между воркерами gunicorn
+
+    Каждый процесс считает в памяти и раз в METRICS_FLUSH_INTERVAL секунд
+    записывает снимок в METRICS_DIR/<pid>-<метка>.json. /metrics складывает
+    снимки всех процессов: счётчики и гистограммы суммируются, показатели
+    (gauge) берутся только у живых процессов. Снимки завершившихся
+    воркеров (перезапуск по max_requests) переносятся в archive.json,
+    поэтому счётчики не убывают.
+    """
+
+    _lock = threading.Lock()
+    _pid = None
+    _file = None
+    _counters = {}
+    _histograms = {}
+    _gauges = {}
+    _directory = None
+    _interval = 1.0
+    _writer_pid = None
+
+    @classmethod
+    def configure(cls, directory, interval):
+        cls._directory = directory
+        cls._interval = interval
+
+    @classmethod
+    def _check_process(cls):
+        # После fork значения мастера не наследуются: у воркера свой снимок
+        pid = os.getpid()
+        if cls._pid != pid:
+            cls._pid = pid
+            cls._file = f"{pid}-{time.time_ns()}.json"
+            cls._counters, cls._histograms = {}, {}
+
+    @classmethod
+    def inc(cls, name, value=1, **labels):
+        key = _key(name, labels)
+        with cls._lock:
+            cls._check_process()
+            cls._counters[key] = cls._counters.get(key, 0) + value
+
+    @classmethod
+    def observe(cls, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = _key(name, labels)
+        with cls._lock:
+            cls._check_process()
+            histogram = cls._histograms.get(key)
+            if histogram is None:
+                histogram = cls._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @classmethod
+    def gauge(cls, name, callback):
+        """Показатель, который вычисляется в момент записи снимка: callback() -> значение"""
+        cls._gauges[name] = callback
+
+    @classmethod
+    def snapshot(cls):
+        with cls._lock:
+            cls._check_process()
+            counters = [[name, list(labels), value] for (name, labels), value in cls._counters.items()]
+            histograms = [[name, list(labels), list(buckets), total, count]
+                          for (name, labels), (buckets, total, count) in cls._histograms.items()]
+        gauges = []
+        for name, callback in cls._gauges.items():
+            try:
+                gauges.append([name, [], callback()])
+            except Exception:
+                logger.exception("Ошибка показателя %s", name)
+        return {"pid": os.getpid(), "counters": counters, "histograms": histograms, "gauges": gauges}
+
+    @classmethod
+    def start_writer(cls):
+        """Фоновая запись снимка процесса (один поток на процесс)"""
+        if cls._directory is None or cls._writer_pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._writer_pid == os.getpid():
+                return
+            cls._writer_pid = os.getpid()
+        os.makedirs(cls._directory, exist_ok=True)
+        threading.Thread(target=cls._write_loop, name="metrics-writer", daemon=True).start()
+        atexit.register(cls.flush)
+
+    @classmethod
+    def _write_loop(cls):
+        while True:
+            time.sleep(cls._interval)
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        if cls._directory is None or cls._writer_pid != os.getpid():
+            return
+        snapshot = cls.snapshot()
+        path = os.path.join(cls._directory, cls._file)
+        try:
+            # каталог могли удалить после старта (flask serve очищает его перед запуском)
+            os.makedirs(cls._directory, exist_ok=True)
+            _write_json(path, snapshot)
+        except OSError as e:
+            logger.warning("Ошибка записи метрик %s: %s", path, e)
+
+    @classmethod
+    def collect(cls):
+        """Метрики всех процессов: словарь снимка в формате snapshot()"""
+        cls.flush()
+        if cls._directory is None or not os.path.isdir(cls._directory):
+            return cls.snapshot()
+        with open(os.path.join(cls._directory, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(cls._directory, ARCHIVE_FILE)
+            archive = _read(archive_path) or {"counters": [], "histograms": []}
+            live, dead = [], []
+            for name in os.listdir(cls._directory):
+                if not name.endswith(".json") or name == ARCHIVE_FILE:
+                    continue
+                snapshot = _read(os.path.join(cls._directory, name))
+                if snapshot is None:
+                    continue
+                alive = snapshot["pid"] == os.getpid() or process_alive(snapshot["pid"])
+                (live if alive else dead).append((name, snapshot))
+
+            if dead:
+                archive = _merge([archive] + [snapshot for _, snapshot in dead], gauges=False)
+                _write_json(archive_path, archive)
+                for name, _ in dead:
+                    os.remove(os.path.join(cls._directory, name))
+        return _merge([archive] + [snapshot for _, snapshot in live])
+
+
+def _write_json(path, data):
+    """Атомарная запись: временный файл со своим именем в том же каталоге и os.replace
+
+    Снимок одного процесса пишут и фоновый поток, и flush() из /metrics
+    или atexit, поэтому общий путь "<имя>.tmp" мог бы достаться двоим сразу.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots, gauges=True):
+    counters, histograms, gauge_values = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", ()):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot.get("histograms", ()):
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+        if gauges:
+            for name, labels, value in snapshot.get("gauges", ()):
+                key = (name, tuple(map(tuple, labels)))
+                gauge_values[key] = gauge_values.get(key, 0) + value
+    return {
+        "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+        "histograms": [[name, list(labels), *values] for (name, labels), values in histograms.items()],
+        "gauges": [[name, list(labels), value] for (name, labels), value in gauge_values.items()],
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    """Текстовый формат Prometheus (version 0.0.4)"""
+    series = {}
+    for kind in ("counters", "histograms", "gauges"):
+        for item in snapshot.get(kind, ()):
+            series.setdefault(item[0], []).append(item)
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for item in sorted(series.get(name, ()), key=lambda item: item[1]):
+            labels = [tuple(pair) for pair in item[1]]
+            if kind == "histogram":
+                _, _, counts, total, count = item
+                cumulative = 0
+                for bound, bucket in zip((*buckets, "+Inf"), counts):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{_labels(labels, [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {_number(item[2])}")
+    return "\n".join(lines) + "\n"
+
+
+class _ResponseBody:
+    """Тело ответа, которое считает байты и по close() записывает метрики запроса"""
+
+    def __init__(self, iterable, record):
+        self._iterable = iterable
+        self._record = record
+        self._size = 0
+
+    def __iter__(self):
+        for chunk in self._iterable:
+            self._size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            self._record(self._size)
+
+
+class MetricsMiddleware:
+    """WSGI-обёртка: время ответа от вызова приложения до закрытия тела и его размер
+
+    Для потоковых страниц время включает рендеринг всего шаблона.
+    Endpoint берётся из environ (его кладёт before_request), SQL — из
+    статистики sql_instrumentation, которая сохраняется в environ в teardown.
+    Файлы (send_file через wsgi.file_wrapper, например /assets) возвращаются
+    серверу без обёртки, чтобы он мог отдать их через sendfile(): для них
+    время — до возврата из приложения, размер — из Content-Length.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        Metrics.start_writer()
+        started = time.perf_counter()
+        status, length = [], []
+
+        def metrics_start_response(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(" ", 1)[0]]
+            length[:] = [value for name, value in headers if name.lower() == "content-length"]
+            return start_response(status_line, headers, exc_info)
+
+        def record(size):
+            _record_request(environ, status[0] if status else "500", time.perf_counter() - started, size)
+
+        try:
+            iterable = self.wsgi_app(environ, metrics_start_response)
+        except Exception:
+            record(0)
+            raise
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(iterable, file_wrapper):
+            record(int(length[0]) if length and length[0].isdigit() else 0)
+            return iterable
+        return _ResponseBody(iterable, record)
+
+
+def _record_request(environ, status, seconds, size):
+    endpoint = environ.get("autoservice.endpoint") or "unmatched"
+    Metrics.inc("autoservice_http_requests_total", endpoint=endpoint, method=environ["REQUEST_METHOD"], status=status)
+    Metrics.observe("autoservice_http_request_duration_seconds", seconds, endpoint=endpoint)
+    Metrics.observe("autoservice_http_response_size_bytes", size, endpoint=endpoint)
+    queries = environ.get("autoservice.sql_queries")
+    if queries is not None:
+        Metrics.inc("autoservice_sql_statements_total", queries.count, endpoint=endpoint)
+        Metrics.observe("autoservice_sql_statements_per_request", queries.count, endpoint=endpoint)
+        Metrics.observe("autoservice_sql_duration_seconds", queries.seconds, endpoint=endpoint)
+
+
+def _remember_endpoint():
+    request.environ["autoservice.endpoint"] = request.endpoint or "unmatched"
+
+
+def _instrument_pool(engine):
+    """Время получения соединения: Connection берёт его через engine.raw_connection()"""
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            Metrics.observe("autoservice_db_pool_checkout_seconds", time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+    # engine.pool заменяется при dispose() (после fork), поэтому читается при каждом снимке
+    Metrics.gauge("autoservice_db_pool_checked_out",
+                  lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0)
+
+
+def metrics_directory(app):
+    return app.config.get("METRICS_DIR") or os.path.join(app.instance_path, "metrics")
+
+
+def clear_metrics_directory(app):
+    """Удалить снимки прошлого запуска сервера (вызывается перед стартом воркеров)"""
+    shutil.rmtree(metrics_directory(app), ignore_errors=True)
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """Метрики всех воркеров в текстовом формате Prometheus
+
+    Нужен заголовок Authorization: Bearer <METRICS_TOKEN>. Без токена
+    маршрут открыт, только если явно задан METRICS_PUBLIC (например,
+    порт приложения доступен лишь из внутренней сети), иначе — 404.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        if not current_app.config.get("METRICS_PUBLIC"):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+        abort(403)
+    response = current_app.response_class(render(Metrics.collect()),
+                                          mimetype="text/plain; version=0.0.4")
+    response.cache_control.no_store = True
+    return response
+
+
+def init_metrics(app):
+    """Метрики приложения: /metrics, время и размер ответов, SQL, пул соединений, кэши"""
+    Metrics.configure(metrics_directory(app), app.config.get("METRICS_FLUSH_INTERVAL", 1.0))
+    with app.app_context():
+        _instrument_pool(db.engine)
+    app.before_request(_remember_endpoint)
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+    app.register_blueprint(metrics_bp)
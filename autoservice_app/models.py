@@ -1,12 +1,16 @@
 from datetime import datetime
+from sqlalchemy.ext.hybrid import hybrid_property
 from . import db
+from .pagination import sort_key
 
 
 # Таблица для связи многие-ко-многим между ремонтами и сотрудниками
 repair_employees = db.Table('repair_employees',
     db.Column('repair_id', db.Integer, db.ForeignKey('repair.id'), primary_key=True),
     db.Column('employee_id', db.Integer, db.ForeignKey('employee.id'), primary_key=True),
-    db.Column('assigned_date', db.Date, default=datetime.utcnow)
+    db.Column('assigned_date', db.Date, default=datetime.utcnow),
+    # Первичный ключ (repair_id, employee_id) не помогает искать ремонты сотрудника
+    db.Index('ix_repair_employees_employee_id', 'employee_id', 'repair_id')
 )
 
 
@@ -30,6 +34,9 @@ class Owner(db.Model):
 
 class Car(db.Model):
     __tablename__ = 'car'
+    __table_args__ = (
+        db.Index('ix_car_owner_id', 'owner_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(20), unique=True, nullable=False)
@@ -49,6 +56,10 @@ class Car(db.Model):
 
 class ServiceRequest(db.Model):
     __tablename__ = 'service_request'
+    __table_args__ = (
+        db.Index('ix_service_request_car_id', 'car_id'),
+        db.Index('ix_service_request_request_date_id', 'request_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     car_id = db.Column(db.Integer, db.ForeignKey('car.id'), nullable=False)
@@ -66,12 +77,21 @@ class ServiceRequest(db.Model):
 
 class Repair(db.Model):
     __tablename__ = 'repair'
+    __table_args__ = (
+        db.Index('ix_repair_request_id', 'request_id'),
+        db.Index('ix_repair_completion_date_id', 'completion_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     request_id = db.Column(db.Integer, db.ForeignKey('service_request.id'), nullable=False)
     description = db.Column(db.Text, nullable=False)
     completion_date = db.Column(db.Date)
     cost = db.Column(db.Float, default=0.0)
+    # Сумма и число запчастей ремонта (денормализация spare_part).
+    # Меняются вместе с добавлением и удалением запчасти (adjust_parts),
+    # сверяются командой flask reconcile-counters
+    parts_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    parts_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     spare_parts = db.relationship('SparePart', backref='repair', lazy=True, cascade='all, delete-orphan')
     completed_works = db.relationship('CompletedWork', backref='repair', lazy=True, cascade='all, delete-orphan')
     # Связь многие-ко-многим с сотрудниками
@@ -97,22 +117,68 @@ class Repair(db.Model):
     def formatted_completion_date(self):
         return self.completion_date.strftime("%d.%m.%Y") if self.completion_date else "В процессе"
 
-    @property
+    @hybrid_property
     def total_with_parts(self):
         """Общая стоимость ремонта с учетом запчастей"""
-        parts_cost = sum(part.total_cost for part in self.spare_parts)
-        return self.cost + parts_cost
+        return (self.cost or 0.0) + (self.parts_total or 0.0)
+
+    @total_with_parts.expression
+    def total_with_parts(cls):
+        return db.func.coalesce(cls.cost, 0.0) + cls.parts_total
+
+    @classmethod
+    def adjust_parts(cls, repair_id, amount, count):
+        """Изменить сумму и число запчастей ремонта одним UPDATE в текущей транзакции"""
+        db.session.execute(
+            db.update(cls).where(cls.id == repair_id).values(
+                parts_total=cls.parts_total + amount,
+                parts_count=cls.parts_count + count,
+            )
+        )
+
+    @classmethod
+    def reconcile_parts(cls, connection=None):
+        """Пересчитать сумму и число запчастей всех ремонтов по spare_part
+
+        Один UPDATE с коррелированными подзапросами; обновляются только
+        строки с расхождением (сумма сравнивается с точностью до копейки).
+        Возвращает число исправленных ремонтов.
+        """
+        from .table_versions import bump_versions
+
+        parts = db.select(SparePart).where(SparePart.repair_id == cls.id)
+        total = parts.with_only_columns(
+            db.func.coalesce(db.func.sum(SparePart.cost * SparePart.quantity), 0.0)
+        ).scalar_subquery()
+        count = parts.with_only_columns(db.func.count()).scalar_subquery()
+        stmt = db.update(cls.__table__).where(
+            db.or_(db.func.abs(cls.parts_total - total) >= 0.005, cls.parts_count != count)
+        ).values(parts_total=total, parts_count=count)
+
+        if connection is None:
+            connection = db.session.connection()
+        fixed = connection.execute(stmt).rowcount
+        if fixed:
+            bump_versions([cls.__tablename__], connection)
+        return fixed
 
     @property
     def assigned_employees_names(self):
         """Список имен назначенных сотрудников"""
         return [emp.full_name for emp in self.employees]
 
+    def _counter_deltas(self, sign):
+        """Изменения счётчиков сотрудника при назначении (+1) или снятии (-1)"""
+        if self.is_completed:
+            return {'completed': sign}
+        return {'active': sign}
+
     def assign_employee(self, employee_id):
         """Назначить сотрудника на ремонт"""
         employee = Employee.query.get(employee_id)
         if employee and employee not in self.employees:
             self.employees.append(employee)
+            Employee.adjust_repair_counters([employee.id], **self._counter_deltas(1))
             return True
         return False
 
@@ -121,12 +187,17 @@ class Repair(db.Model):
         employee = Employee.query.get(employee_id)
         if employee and employee in self.employees:
             self.employees.remove(employee)
+            Employee.adjust_repair_counters([employee.id], **self._counter_deltas(-1))
             return True
         return False
 
 
 class SparePart(db.Model):
     __tablename__ = 'spare_part'
+    __table_args__ = (
+        db.Index('ix_spare_part_repair_id', 'repair_id'),
+        db.Index('ix_spare_part_installed_date_id', 'installed_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     repair_id = db.Column(db.Integer, db.ForeignKey('repair.id'), nullable=False)
@@ -150,6 +221,14 @@ class SparePart(db.Model):
 
 class Employee(db.Model):
     __tablename__ = 'employee'
+    __table_args__ = (
+        db.Index('ix_employee_name', 'last_name', 'first_name', 'id'),
+        db.Index('ix_employee_position', 'position'),
+        db.Index('ix_employee_schedule', 'schedule'),
+    )
+
+    # Сотрудник с большим числом активных ремонтов считается занятым
+    BUSY_THRESHOLD = 2
 
     id = db.Column(db.Integer, primary_key=True)
     last_name = db.Column(db.String(64), nullable=False)
@@ -163,6 +242,11 @@ class Employee(db.Model):
     experience = db.Column(db.Integer, nullable=False)
     schedule = db.Column(db.String(64), nullable=False)
     bonus = db.Column(db.Float, default=0.0)
+    # Счётчики ремонтов сотрудника (денормализация repair_employees + repair.completion_date).
+    # Меняются в той же транзакции, что и назначения (adjust_repair_counters),
+    # сверяются командой flask reconcile-counters
+    active_repairs_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_repairs_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def __repr__(self):
         return f'<Employee {self.last_name} {self.first_name}>'
@@ -178,16 +262,68 @@ class Employee(db.Model):
     @property
     def current_repairs_count(self):
         """Количество активных ремонтов сотрудника"""
-        return len([r for r in self.repairs if not r.is_completed])
+        return self.active_repairs_count
 
-    @property
-    def completed_repairs_count(self):
-        """Количество завершенных ремонтов сотрудника"""
-        return len([r for r in self.repairs if r.is_completed])
+    @classmethod
+    def adjust_repair_counters(cls, employee_ids, active=0, completed=0):
+        """Изменить счётчики ремонтов сотрудников в текущей транзакции
+
+        employee_ids — список id или подзапрос, возвращающий employee_id.
+        Выполняется один UPDATE с приращением (count = count + delta),
+        поэтому одновременные назначения не теряют друг друга.
+        """
+        if not (active or completed):
+            return
+        if isinstance(employee_ids, (list, tuple, set)) and not employee_ids:
+            return
+        from .table_versions import VERSIONED_TABLES_OPTION, counters_version
+
+        db.session.execute(
+            db.update(cls).where(cls.id.in_(employee_ids)).values(
+                active_repairs_count=cls.active_repairs_count + active,
+                completed_repairs_count=cls.completed_repairs_count + completed,
+            ),
+            # меняются только счётчики — справочники сотрудников остаются в кэше
+            execution_options={VERSIONED_TABLES_OPTION: [counters_version(cls.__tablename__)]},
+        )
+
+    @classmethod
+    def reconcile_repair_counters(cls, connection=None):
+        """Пересчитать счётчики ремонтов всех сотрудников по repair_employees
+
+        Один UPDATE с коррелированными подзапросами; обновляются только
+        строки с расхождением. Возвращает число исправленных сотрудников.
+        """
+        from .table_versions import bump_versions, counters_version
+
+        def repairs_count(condition):
+            return db.select(db.func.count()).select_from(repair_employees).join(
+                Repair, Repair.id == repair_employees.c.repair_id
+            ).where(
+                repair_employees.c.employee_id == cls.id, condition
+            ).scalar_subquery()
+
+        active = repairs_count(Repair.completion_date.is_(None))
+        completed = repairs_count(Repair.completion_date.isnot(None))
+        stmt = db.update(cls.__table__).where(
+            db.or_(cls.active_repairs_count != active, cls.completed_repairs_count != completed)
+        ).values(active_repairs_count=active, completed_repairs_count=completed)
+
+        if connection is None:
+            connection = db.session.connection()
+        fixed = connection.execute(stmt).rowcount
+        if fixed:
+            bump_versions([counters_version(cls.__tablename__)], connection)
+        return fixed
 
 
 class CompletedWork(db.Model):
     __tablename__ = 'completed_work'
+    __table_args__ = (
+        db.Index('ix_completed_work_car_id', 'car_id'),
+        db.Index('ix_completed_work_repair_id', 'repair_id'),
+        db.Index('ix_completed_work_completion_date_id', 'completion_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     car_id = db.Column(db.Integer, db.ForeignKey('car.id'), nullable=False)
@@ -204,13 +340,69 @@ class CompletedWork(db.Model):
         return self.completion_date.strftime("%d.%m.%Y") if self.completion_date else "Не указана"
 
     @classmethod
-    def cleanup_old_records(cls, days=365):
+    def cleanup_old_records(cls, days=365, progress=None):
+        """Удалить выполненные работы старше days дней (пачками, без загрузки в сессию)"""
         from datetime import timedelta
+        from .bulk_delete import bulk_delete
         cutoff_date = datetime.utcnow().date() - timedelta(days=days)
-        old_records = cls.query.filter(cls.completion_date < cutoff_date).all()
+        deleted, _ = bulk_delete(cls, cls.completion_date < cutoff_date, progress=progress)
+        return deleted.get(cls.__tablename__, 0)
+
+
+# Ключ курсорной пагинации работ (pagination.sort_key): работы без даты
+# завершения идут в конце, а страницы читаются по индексу без сортировки
+db.Index('ix_completed_work_completion_key_id', sort_key(CompletedWork.completion_date), CompletedWork.id)
 
-        for record in old_records:
-            db.session.delete(record)
 
-        db.session.commit()
-        return len(old_records)
\ No newline at end of file
+class TableVersion(db.Model):
+    """Счётчик изменений таблицы
+
+    Увеличивается в той же транзакции, что и запись в таблицу
+    (см. table_versions), поэтому по нему можно проверять
+    актуальность кэшей во всех процессах приложения.
+    """
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name} {self.version}>'
+
+
+class Job(db.Model):
+    """Фоновая задача (см. jobs.JobRunner)
+
+    Строка создаётся при постановке в очередь и обновляется исполнителем,
+    поэтому статус виден из любого процесса приложения.
+    """
+    __tablename__ = 'job'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=QUEUED)
+    params = db.Column(db.Text)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    message = db.Column(db.String(255))
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    # Процесс, в пуле которого выполняется задача
+    worker_pid = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
@@ -0,0 +1,155 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, func, literal_column, tuple_
+from . import db
+
+
+# Значение ключа для NULL в колонке даты: по убыванию такие строки идут последними.
+# В запрос подставляется литералом, а не параметром, — иначе SQLite не
+# использует индекс по выражению (см. CompletedWork)
+NULL_DATE_KEY = date.min
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не подходит к ключу страницы (ответ 400)"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("Неизвестный тип значения в курсоре")
+    if not isinstance(value, (str, int, float)):
+        raise ValueError("Неизвестный тип значения в курсоре")
+    return value
+
+
+def sort_key(column):
+    """Выражение ключа пагинации для колонки: NULL в дате заменяется на NULL_DATE_KEY
+
+    Сравнение (ключ) < (курсор) с NULL всегда ложно, поэтому без замены
+    строки без даты не попали бы ни на одну страницу.
+    """
+    if column.nullable and isinstance(column.type, Date) and not isinstance(column.type, DateTime):
+        return func.coalesce(column, literal_column(f"'{NULL_DATE_KEY.isoformat()}'"), type_=column.type)
+    return column
+
+
+def _valid_key(values, columns):
+    if len(values) != len(columns):
+        return False
+    for value, column in zip(values, columns):
+        expected = column.type.python_type
+        if expected is float and isinstance(value, int):
+            continue
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            return False
+    return True
+
+
+def encode_cursor(values, direction):
+    """Непрозрачный токен курсора: ключ строки и направление перехода"""
+    payload = json.dumps([direction, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Разобрать токен курсора; для повреждённого токена возвращает None"""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ("next", "prev") or not isinstance(values, list):
+            return None
+        return direction, [_decode_value(v) for v in values]
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+class KeysetPage:
+    """Страница курсорной пагинации"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, total_is_approximate=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_approximate = total_is_approximate
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def to_dict(self):
+        return {
+            "next_cursor": self.next_cursor,
+            "prev_cursor": self.prev_cursor,
+            "total": self.total,
+            "total_is_approximate": self.total_is_approximate,
+        }
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=100):
+    """Курсорная пагинация по убыванию ключа (columns)
+
+    Последняя колонка ключа должна быть уникальной (обычно id), тогда
+    порядок стабилен даже при совпадающих датах. Вместо OFFSET используется
+    условие (ключ) < (ключ последней строки), поэтому любая страница
+    стоит столько же, сколько первая, а COUNT(*) не выполняется.
+    Колонки даты, допускающие NULL, сортируются по sort_key(); строки без
+    даты идут в конце. Для повреждённого курсора бросается InvalidCursor.
+    """
+    decoded = decode_cursor(cursor)
+    if cursor and (decoded is None or not _valid_key(decoded[1], columns)):
+        raise InvalidCursor(cursor)
+
+    keys = [sort_key(column) for column in columns]
+    key = tuple_(*keys) if len(keys) > 1 else keys[0]
+
+    def key_value(values):
+        return tuple_(*values) if len(values) > 1 else values[0]
+
+    def row_key(item):
+        values = []
+        for column, k in zip(columns, keys):
+            value = getattr(item, column.key)
+            values.append(NULL_DATE_KEY if value is None and k is not column else value)
+        return values
+
+    if decoded is None or decoded[0] == "next":
+        if decoded is not None:
+            query = query.filter(key < key_value(decoded[1]))
+        rows = query.order_by(*[k.desc() for k in keys]).limit(per_page + 1).all()
+        items = rows[:per_page]
+        next_cursor = encode_cursor(row_key(items[-1]), "next") if len(rows) > per_page else None
+        prev_cursor = encode_cursor(row_key(items[0]), "prev") if decoded is not None and items else None
+    else:
+        query = query.filter(key > key_value(decoded[1]))
+        rows = query.order_by(*[k.asc() for k in keys]).limit(per_page + 1).all()
+        items = list(reversed(rows[:per_page]))
+        prev_cursor = encode_cursor(row_key(items[0]), "prev") if len(rows) > per_page else None
+        next_cursor = encode_cursor(row_key(items[-1]), "next") if items else None
+
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def approximate_count(model):
+    """Приблизительное число строк таблицы: максимальный id (без полного COUNT)"""
+    return db.session.query(db.func.max(model.id)).scalar() or 0
@@ -0,0 +1,13 @@
+import os
+
+
+def process_alive(pid):
+    """Жив ли процесс pid на этой машине (сигнал 0 ничего не посылает, только проверяет)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # процесс есть, но принадлежит другому пользователю
+        return True
+    return True
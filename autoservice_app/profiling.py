@@ -0,0 +1,176 @@
+import cProfile
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+
+
+logger = logging.getLogger(__name__)
+
+
+# Заголовок запроса со значением PROFILE_TOKEN, включающий профилирование
+PROFILE_HEADER = "X-Profile"
+# В ответ возвращается имя файлов профиля (без расширения)
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_UNSAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class StackSampler:
+    """Статистический профиль одного потока: раз в interval секунд снимается его стек
+
+    Результат — счётчик свёрнутых стеков ("корень;...;лист" -> число
+    срабатываний), формат collapsed-stack для flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _short_path(filename):
+    # site-packages/flask/app.py вместо полного пути — короче и одинаково на всех машинах
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+class RequestProfile:
+    """cProfile и сэмплер стеков для одного HTTP-запроса"""
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+
+    def start(self):
+        self.sampler.start()
+        self.profiler.enable()
+
+    def finish(self, directory):
+        self.profiler.disable()
+        self.sampler.stop()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.name)
+        self.profiler.dump_stats(base + ".prof")
+        self.sampler.write(base + ".folded")
+        return base, time.perf_counter() - self.started
+
+
+def _profile_requested(app):
+    """Профилировать ли текущий запрос: путь из PROFILE_PATHS или верный токен в заголовке"""
+    if request.path in app.config.get("PROFILE_PATHS", ()):
+        return True
+    token = app.config.get("PROFILE_TOKEN")
+    value = request.headers.get(PROFILE_HEADER)
+    return bool(token and value and hmac.compare_digest(value.encode(), token.encode()))
+
+
+def _profile_name():
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    endpoint = _UNSAFE_NAME_RE.sub("_", request.endpoint or "unknown")
+    return f"{stamp}-{endpoint}-{os.getpid()}"
+
+
+def _prune(directory, keep):
+    """Оставить только keep последних профилей (пары .prof + .folded)"""
+    try:
+        names = sorted({os.path.splitext(name)[0] for name in os.listdir(directory)
+                        if name.endswith((".prof", ".folded"))})
+    except FileNotFoundError:
+        return
+    for name in names[:-keep] if keep else []:
+        for extension in (".prof", ".folded"):
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _start_profile():
+    app = current_app
+    if not _profile_requested(app):
+        return
+    profile = RequestProfile(_profile_name(), app.config.get("PROFILE_SAMPLE_INTERVAL", 0.001))
+    g.request_profile = profile
+    profile.start()
+
+
+def _attach_profile(response):
+    profile = g.pop("request_profile", None)
+    if profile is None:
+        return response
+    response.headers[PROFILE_ID_HEADER] = profile.name
+    app = current_app._get_current_object()
+    method, path = request.method, request.path
+    # Запись — после отдачи ответа целиком, чтобы в профиль попал
+    # и потоковый рендеринг шаблона
+    response.call_on_close(lambda: _save_profile(app, profile, method, path))
+    return response
+
+
+def _discard_profile(exc):
+    # after_request не вызывался (необработанная ошибка) — профиль всё равно сохраняется
+    profile = g.pop("request_profile", None)
+    if profile is not None:
+        _save_profile(current_app, profile, request.method, request.path)
+
+
+def _save_profile(app, profile, method, path):
+    directory = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+    try:
+        base, seconds = profile.finish(directory)
+        _prune(directory, app.config.get("PROFILE_KEEP", 200))
+        app.logger.info("Профиль %s %s (%.0f мс): %s.prof, %s.folded",
+                        method, path, seconds * 1000, base, base)
+    except Exception:
+        logger.exception("Ошибка записи профиля %s", profile.name)
+
+
+def init_profiling(app):
+    """Профилирование отдельных запросов по заголовку X-Profile или PROFILE_PATHS
+
+    Когда профилирование не запрошено, на запрос тратится одна проверка
+    пути и заголовка. Иначе весь запрос — view, ORM и рендеринг шаблона —
+    проходит под cProfile и сэмплером стеков; результат сохраняется в
+    PROFILE_DIR как <имя>.prof (pstats) и <имя>.folded (flamegraph).
+    """
+    if not app.config.get("PROFILE_TOKEN") and not app.config.get("PROFILE_PATHS"):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_attach_profile)
+    app.teardown_request(_discard_profile)
@@ -0,0 +1,96 @@
+from sqlalchemy.orm import configure_mappers, joinedload, selectinload
+from .models import Car, CompletedWork, Repair, ServiceRequest, SparePart
+
+
+class QueryProfiles:
+    """Именованные профили загрузки связанных объектов для страниц
+
+    Каждый профиль описывает, какие связи нужно подгрузить заранее
+    (joinedload для "многие-к-одному", selectinload для коллекций),
+    чтобы страница выполняла постоянное число SQL-запросов независимо
+    от количества строк.
+    """
+
+    _registry = {}
+
+    @classmethod
+    def register(cls, name):
+        """Декоратор регистрации фабрики опций загрузки"""
+        def decorator(factory):
+            cls._registry[name] = factory
+            return factory
+        return decorator
+
+    @classmethod
+    def options(cls, name):
+        if name not in cls._registry:
+            raise ValueError(f"Неизвестный профиль запроса: {name}")
+        # backref-атрибуты появляются только после конфигурации мапперов
+        configure_mappers()
+        return cls._registry[name]()
+
+    @classmethod
+    def apply(cls, query, name):
+        """Применить профиль к запросу"""
+        return query.options(*cls.options(name))
+
+    @classmethod
+    def names(cls):
+        return sorted(cls._registry)
+
+
+@QueryProfiles.register("repairs_active_list")
+def _repairs_active_list():
+    return (
+        joinedload(Repair.request).joinedload(ServiceRequest.car),
+        selectinload(Repair.employees),
+    )
+
+
+@QueryProfiles.register("repairs_completed_list")
+def _repairs_completed_list():
+    return (
+        joinedload(CompletedWork.car),
+        joinedload(CompletedWork.repair).selectinload(Repair.employees),
+    )
+
+
+@QueryProfiles.register("repair_details")
+def _repair_details():
+    return _repairs_active_list()
+
+
+@QueryProfiles.register("repair_choices")
+def _repair_choices():
+    return (
+        joinedload(Repair.request).joinedload(ServiceRequest.car),
+    )
+
+
+@QueryProfiles.register("requests_list")
+def _requests_list():
+    return (
+        joinedload(ServiceRequest.car),
+    )
+
+
+@QueryProfiles.register("cars_list")
+def _cars_list():
+    return (
+        joinedload(Car.owner),
+    )
+
+
+@QueryProfiles.register("spares_list")
+def _spares_list():
+    return (
+        joinedload(SparePart.repair).joinedload(Repair.request).joinedload(ServiceRequest.car),
+    )
+
+
+@QueryProfiles.register("works_list")
+def _works_list():
+    return (
+        joinedload(CompletedWork.car).joinedload(Car.owner),
+        joinedload(CompletedWork.repair).selectinload(Repair.spare_parts),
+    )
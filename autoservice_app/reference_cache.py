@@ -0,0 +1,114 @@
+import json
+from . import db
+from .metrics import Metrics
+from .models import Car, Employee, Owner
+from .table_versions import versions_key
+
+
+class ReferenceCache:
+    """Кэш справочных данных для выпадающих списков и фильтров
+
+    Каждый набор зарегистрирован вместе со списком таблиц, из которых
+    он строится. Значение хранится в памяти процесса вместе с версиями
+    этих таблиц и перестраивается, только когда какая-то из них
+    изменилась (версии увеличиваются при записи, см. table_versions).
+    Значения — обычные словари и списки, а не объекты ORM, поэтому
+    их можно отдавать в шаблоны любого запроса.
+    """
+
+    _registry = {}
+    _values = {}
+
+    @classmethod
+    def register(cls, name, *tables):
+        """Декоратор регистрации загрузчика набора данных"""
+        def decorator(loader):
+            cls._registry[name] = (tables, loader)
+            return loader
+        return decorator
+
+    @classmethod
+    def version(cls, name):
+        """Версии таблиц, от которых зависит набор"""
+        if name not in cls._registry:
+            raise ValueError(f"Неизвестный справочник: {name}")
+        tables, _ = cls._registry[name]
+        return versions_key(tables)
+
+    @classmethod
+    def get(cls, name):
+        version = cls.version(name)
+        cached = cls._values.get(name)
+        if cached is not None and cached[0] == version:
+            Metrics.inc("autoservice_cache_requests_total", cache=f"reference:{name}", result="hit")
+            return cached[1]
+        Metrics.inc("autoservice_cache_requests_total", cache=f"reference:{name}", result="miss")
+        _, loader = cls._registry[name]
+        value = loader()
+        cls._values[name] = (version, value)
+        return value
+
+    @classmethod
+    def names(cls):
+        return sorted(cls._registry)
+
+
+def _full_name(last_name, first_name, middle_name):
+    return f"{last_name} {first_name} {middle_name or ''}".strip()
+
+
+@ReferenceCache.register("employee_positions", "employee")
+def _employee_positions():
+    rows = db.session.query(Employee.position).distinct().order_by(Employee.position).all()
+    return [row[0] for row in rows]
+
+
+@ReferenceCache.register("employee_schedules", "employee")
+def _employee_schedules():
+    rows = db.session.query(Employee.schedule).distinct().order_by(Employee.schedule).all()
+    return [row[0] for row in rows]
+
+
+@ReferenceCache.register("employees", "employee")
+def _employees():
+    rows = db.session.query(
+        Employee.id, Employee.last_name, Employee.first_name, Employee.middle_name,
+        Employee.position, Employee.experience, Employee.schedule, Employee.salary,
+    ).order_by(Employee.last_name, Employee.first_name, Employee.id).all()
+    return [
+        {
+            'id': emp_id,
+            'full_name': _full_name(last_name, first_name, middle_name),
+            'position': position,
+            'experience': experience,
+            'schedule': schedule,
+            'salary': salary,
+        }
+        for emp_id, last_name, first_name, middle_name, position, experience, schedule, salary in rows
+    ]
+
+
+@ReferenceCache.register("employee_options", "employee")
+def _employee_options():
+    """Готовое JSON-тело для окна назначения сотрудника"""
+    # Подпись вставляется на странице как текст (new Option), а не как HTML
+    options = [
+        {'id': emp['id'], 'label': f"{emp['full_name']} ({emp['position']}, стаж: {emp['experience']}л.)"}
+        for emp in ReferenceCache.get("employees")
+    ]
+    return json.dumps({'employees': options}, ensure_ascii=False)
+
+
+@ReferenceCache.register("cars", "car")
+def _cars():
+    rows = db.session.query(Car.id, Car.number, Car.brand).order_by(Car.id).all()
+    return [{'id': car_id, 'number': number, 'brand': brand} for car_id, number, brand in rows]
+
+
+@ReferenceCache.register("owners", "owner")
+def _owners():
+    rows = db.session.query(Owner.id, Owner.last_name, Owner.first_name).order_by(Owner.id).all()
+    return [
+        {'id': owner_id, 'last_name': last_name, 'first_name': first_name}
+        for owner_id, last_name, first_name in rows
+    ]
@@ -1,97 +1,112 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from markupsafe import escape
+from flask import (
+    Blueprint, current_app, render_template, stream_template, request, redirect, url_for, flash,
+    get_flashed_messages, jsonify
+)
+from markupsafe import Markup, escape
 from datetime import datetime
 from . import db
 from .models import Owner, Car, Employee, ServiceRequest, Repair, SparePart, CompletedWork, repair_employees
-import html
-import re
+from .api_payloads import (
+    completed_work_item, employee_filter_args, employee_filter_item, employee_filter_response,
+    employee_filter_rows_data, repair_item, request_item
+)
+from .api_queries import (
+    REPAIR_DETAILS_TABLES, employee_filter_count_statement, employee_filter_statement, repair_details_statement,
+    repairs_details_statement
+)
+from .conditional import conditional_page
+from .employee_index import employee_index
+from .helpers import SecurityHelper, ViewHelper
+from .jobs import JobRunner
+from .pagination import InvalidCursor, approximate_count, keyset_paginate
+from .query_profiles import QueryProfiles
+from .reference_cache import ReferenceCache
+from .table_versions import versions_etag
+import json
 
 bp = Blueprint("main", __name__)
 
 
-class SecurityHelper:
-
-    @staticmethod
-    def sanitize_input(input_string):
-        """Защита от XSS и HTML injection"""
-        if input_string is None:
-            return ""
-        # Экранирование HTML символов
-        sanitized = html.escape(str(input_string))
-        # Удаление потенциально опасных тегов
-        sanitized = re.sub(r'<script.*?>.*?</script>', '', sanitized, flags=re.IGNORECASE)
-        sanitized = re.sub(r'javascript:', '', sanitized, flags=re.IGNORECASE)
-        sanitized = re.sub(r'on\w+=', '', sanitized, flags=re.IGNORECASE)
-        return sanitized
-
-    @staticmethod
-    def validate_phone(phone):
-        """Валидация номера телефона"""
-        if not phone:
-            return False
-        # Российский формат номеров
-        pattern = r'^(\+7|8)[\d\-\(\)\s]{10,15}$'
-        return bool(re.match(pattern, str(phone)))
-
-    @staticmethod
-    def validate_email(email):
-        """Валидация email (если добавите в будущем)"""
-        if not email:
-            return True
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, str(email)))
-
-    @staticmethod
-    def sanitize_sql_identifier(identifier):
-        """Защита от SQL injection для идентификаторов"""
-        # Разрешаем только буквы, цифры и подчеркивания
-        if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', str(identifier)):
-            return identifier
-        raise ValueError("Invalid SQL identifier")
-
-
-class ViewHelper:
-    """Класс-помощник для улучшения отображения данных"""
-
-    @staticmethod
-    def format_currency(amount):
-        if amount is None:
-            return "0.00 ₽"
-        return f"{amount:,.2f} ₽".replace(',', ' ')
-
-    @staticmethod
-    def get_repair_display_data(repairs, repair_type):
-        """Подготовка данных для отображения ремонтов"""
-        display_data = []
-        for repair in repairs:
-            if repair_type == 'active':
-                display_data.append({
-                    'id': repair.id,
-                    'description': SecurityHelper.sanitize_input(repair.description),
-                    'start_date': repair.formatted_start_date,
-                    'car': repair.request.car.display_info if repair.request else 'Не указан',
-                    'cost': repair.cost or 0,
-                    'request_date': repair.request.formatted_request_date if repair.request else '',
-                    'parts_count': len(repair.spare_parts),
-                    'employees': repair.employees,
-                    'employees_count': len(repair.employees),
-                    'repair_obj': repair
-                })
-            else:  # completed
-                display_data.append({
-                    'id': repair.id,
-                    'car': repair.car.display_info if repair.car else 'Не указан',
-                    'description': SecurityHelper.sanitize_input(
-                        repair.repair.description if repair.repair else ''
-                    ),
-                    'total_cost': repair.total_cost,
-                    'completion_date': repair.formatted_completion_date,
-                    'work_description': SecurityHelper.sanitize_input(repair.work_description),
-                    'parts_count': len(repair.repair.spare_parts) if repair.repair else 0,
-                    'employees': repair.repair.employees if repair.repair else [],
-                    'employees_count': len(repair.repair.employees) if repair.repair else 0
-                })
-        return display_data
+# Сколько строк ORM забирает из курсора за раз при потоковой отдаче
+STREAM_CHUNK_ROWS = 500
+# Минимальный размер фрагмента HTML, отправляемого клиенту
+STREAM_BUFFER_SIZE = 16 * 1024
+
+
+def _buffered(chunks, size=STREAM_BUFFER_SIZE):
+    """Склеивает мелкие фрагменты Jinja в блоки, чтобы не писать в сокет на каждую строку"""
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_list_page(template, rows_name, rows_query, **context):
+    """Отрисовка страницы-списка
+
+    При включённом STREAM_LIST_PAGES строки читаются из курсора порциями
+    (yield_per) и HTML отдаётся по мере отрисовки через stream_template:
+    браузер получает шапку таблицы сразу, а память воркера не растёт
+    с размером таблицы. Иначе — обычный render_template со всеми строками.
+    """
+    if current_app.config.get('STREAM_LIST_PAGES'):
+        # Сессия сохраняется до отрисовки потока: flash-сообщения забираем
+        # из неё сейчас (шаблон получит их из кэша запроса), иначе они
+        # останутся в cookie и будут показаны снова
+        get_flashed_messages()
+        context[rows_name] = rows_query.yield_per(STREAM_CHUNK_ROWS)
+        return current_app.response_class(_buffered(stream_template(template, **context)),
+                                          mimetype='text/html')
+    context[rows_name] = rows_query.all()
+    return render_template(template, **context)
+
+
+# ---------- Курсорная пагинация ----------
+PAGE_SIZE = 100
+API_PAGE_MAX_LIMIT = 500
+
+
+@bp.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    """Повреждённый или подделанный курсор — ошибка запроса, а не сервера"""
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'Неверный курсор страницы'}), 400
+    return 'Неверный курсор страницы', 400
+
+
+def _requests_page(cursor, per_page=PAGE_SIZE):
+    """Обращения по убыванию (дата, id)"""
+    return keyset_paginate(QueryProfiles.apply(ServiceRequest.query, "requests_list"),
+                           [ServiceRequest.request_date, ServiceRequest.id], cursor, per_page)
+
+
+def _active_repairs_page(cursor, per_page=PAGE_SIZE):
+    """Активные ремонты по убыванию id (даты завершения у них нет)"""
+    query = QueryProfiles.apply(Repair.query, "repairs_active_list").filter(Repair.completion_date.is_(None))
+    return keyset_paginate(query, [Repair.id], cursor, per_page)
+
+
+def _completed_works_page(cursor, profile, per_page=PAGE_SIZE):
+    """Выполненные работы по убыванию (дата завершения, id)"""
+    return keyset_paginate(QueryProfiles.apply(CompletedWork.query, profile),
+                           [CompletedWork.completion_date, CompletedWork.id], cursor, per_page)
+
+
+def _active_repairs_count():
+    return db.session.query(db.func.count(Repair.id)).filter(Repair.completion_date.is_(None)).scalar()
+
+
+def _api_page_args():
+    """Параметры JSON-пагинации: курсор, размер страницы и нужен ли точный total"""
+    cursor = request.args.get('cursor')
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), API_PAGE_MAX_LIMIT)
+    with_count = request.args.get('count', '') in ('1', 'true', 'exact')
+    return cursor, limit, with_count
 
 
 # ---------- Главная ----------
@@ -102,6 +117,7 @@ def index():
 
 # ---------- Владельцы ----------
 @bp.route("/owners", methods=["GET", "POST"])
+@conditional_page("owner")
 def owners():
     if request.method == "POST":
         try:
@@ -130,12 +146,12 @@ def owners():
             flash('Ошибка при добавлении владельца', 'error')
         return redirect(url_for("main.owners"))
 
-    owners = Owner.query.all()
-    return render_template("owners.html", owners=owners, helper=ViewHelper())
+    return render_list_page("owners.html", "owners", Owner.query, helper=ViewHelper())
 
 
 # ---------- Автомобили ----------
 @bp.route("/cars", methods=["GET", "POST"])
+@conditional_page("car", "owner")
 def cars():
     if request.method == "POST":
         try:
@@ -157,13 +173,14 @@ def cars():
             flash('Ошибка при добавлении автомобиля', 'error')
         return redirect(url_for("main.cars"))
 
-    cars = Car.query.all()
-    owners = Owner.query.all()
-    return render_template("cars.html", cars=cars, owners=owners, helper=ViewHelper())
+    owners = ReferenceCache.get("owners")
+    return render_list_page("cars.html", "cars", QueryProfiles.apply(Car.query, "cars_list"),
+                            owners=owners, helper=ViewHelper())
 
 
 # ---------- Обращения ----------
 @bp.route("/requests", methods=["GET", "POST"])
+@conditional_page("service_request", "car")
 def requests():
     if request.method == "POST":
         try:
@@ -182,17 +199,14 @@ def requests():
             flash('Ошибка при добавлении обращения', 'error')
         return redirect(url_for("main.requests"))
 
-    # Пагинация для обращений
-    page = request.args.get('page', 1, type=int)
-    per_page = 100
-
-    requests_pagination = ServiceRequest.query.order_by(
-        ServiceRequest.request_date.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Курсорная пагинация для обращений, общее количество — приблизительное
+    requests_page = _requests_page(request.args.get('cursor'))
+    requests_page.total = approximate_count(ServiceRequest)
+    requests_page.total_is_approximate = True
 
-    cars = Car.query.all()
+    cars = ReferenceCache.get("cars")
     return render_template("requests.html",
-                           requests_pagination=requests_pagination,
+                           requests_page=requests_page,
                            cars=cars,
                            helper=ViewHelper())
 
@@ -211,14 +225,13 @@ def repairs():
                 cost=float(request.form.get("cost", 0.0)),
             )
 
-            # Добавляем выбранных сотрудников
-            employee_ids = request.form.getlist('employee_ids')
-            for emp_id in employee_ids:
-                employee = Employee.query.get(emp_id)
-                if employee:
-                    repair.employees.append(employee)
+            # Добавляем выбранных сотрудников одним запросом
+            employee_ids = {int(emp_id) for emp_id in request.form.getlist('employee_ids') if emp_id.isdigit()}
+            employees = Employee.query.filter(Employee.id.in_(employee_ids)).all() if employee_ids else []
+            repair.employees.extend(employees)
 
             db.session.add(repair)
+            Employee.adjust_repair_counters([employee.id for employee in employees], active=1)
             db.session.commit()
             flash('Ремонт успешно добавлен', 'success')
         except Exception as e:
@@ -226,42 +239,34 @@ def repairs():
             flash('Ошибка при добавлении ремонта', 'error')
         return redirect(url_for("main.repairs"))
 
-    # Пагинация для активных ремонтов
-    page = request.args.get('page', 1, type=int)
-    per_page = 100
-
-    # Активные ремонты (без даты завершения) с пагинацией
-    active_repairs_pagination = Repair.query.filter(
-        Repair.completion_date.is_(None)
-    ).order_by(Repair.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    # Активные ремонты (без даты завершения) с курсорной пагинацией;
+    # их немного, поэтому точный счётчик по индексу completion_date дешёвый
+    active_page = _active_repairs_page(request.args.get('cursor'))
+    active_page.total = _active_repairs_count()
 
-    # Завершённые ремонты (тоже с пагинацией)
-    completed_page = request.args.get('completed_page', 1, type=int)
-    completed_repairs_pagination = CompletedWork.query.order_by(
-        CompletedWork.completion_date.desc()
-    ).paginate(page=completed_page, per_page=per_page, error_out=False)
+    # Завершённые ремонты: история растёт, поэтому счётчик приблизительный
+    completed_page = _completed_works_page(request.args.get('completed_cursor'), "repairs_completed_list")
+    completed_page.total = approximate_count(CompletedWork)
+    completed_page.total_is_approximate = True
 
     # Обращения без активных ремонтов
     active_request_ids = [r.request_id for r in Repair.query.filter(Repair.completion_date.is_(None)).all()]
-    requests_ = ServiceRequest.query.filter(~ServiceRequest.id.in_(active_request_ids)).all()
+    requests_ = QueryProfiles.apply(ServiceRequest.query, "requests_list").filter(
+        ~ServiceRequest.id.in_(active_request_ids)
+    ).all()
 
-    # Получаем всех сотрудников для начальной загрузки
-    employees = Employee.query.order_by(Employee.last_name, Employee.first_name).all()
+    # Сотрудники для начальной загрузки и значения фильтров — из кэша справочников
+    employees = ReferenceCache.get("employees")
+    positions = ReferenceCache.get("employee_positions")
+    schedules = ReferenceCache.get("employee_schedules")
 
-    # Получаем уникальные значения для фильтров
-    positions = db.session.query(Employee.position).distinct().order_by(Employee.position).all()
-    positions = [p[0] for p in positions]
-
-    schedules = db.session.query(Employee.schedule).distinct().order_by(Employee.schedule).all()
-    schedules = [s[0] for s in schedules]
-
-    active_display = ViewHelper.get_repair_display_data(active_repairs_pagination.items, 'active')
-    completed_display = ViewHelper.get_repair_display_data(completed_repairs_pagination.items, 'completed')
+    active_display = ViewHelper.get_repair_display_data(active_page.items, 'active')
+    completed_display = ViewHelper.get_repair_display_data(completed_page.items, 'completed')
 
     return render_template(
         "repairs.html",
-        active_repairs_pagination=active_repairs_pagination,
-        completed_repairs_pagination=completed_repairs_pagination,
+        active_page=active_page,
+        completed_page=completed_page,
         active_display=active_display,
         completed_display=completed_display,
         requests=requests_,
@@ -275,82 +280,40 @@ def repairs():
 # ---------- API для фильтрации сотрудников ----------
 @bp.route("/api/employees/filter", methods=["GET"])
 def api_filter_employees():
-    """API для фильтрации сотрудников без перезагрузки страницы"""
-    try:
-        # Защита от XSS в параметрах запроса
-        search_query = SecurityHelper.sanitize_input(request.args.get('search', ''))
-        position_filter = SecurityHelper.sanitize_input(request.args.get('position', ''))
-        experience_filter = SecurityHelper.sanitize_input(request.args.get('experience', ''))
-        schedule_filter = SecurityHelper.sanitize_input(request.args.get('schedule', ''))
-        availability_filter = request.args.get('availability', '')
-
-        # Базовый запрос
-        employees_query = Employee.query
-
-        # Применяем фильтры с защитой
-        if search_query:
-            employees_query = employees_query.filter(
-                (Employee.last_name.ilike(f'%{search_query}%')) |
-                (Employee.first_name.ilike(f'%{search_query}%')) |
-                (Employee.middle_name.ilike(f'%{search_query}%'))
-            )
+    """API для фильтрации сотрудников без перезагрузки страницы
 
-        if position_filter:
-            employees_query = employees_query.filter(Employee.position == position_filter)
-
-        if experience_filter:
-            if experience_filter == 'junior':
-                employees_query = employees_query.filter(Employee.experience < 3)
-            elif experience_filter == 'middle':
-                employees_query = employees_query.filter(Employee.experience.between(3, 8))
-            elif experience_filter == 'senior':
-                employees_query = employees_query.filter(Employee.experience > 8)
-
-        if schedule_filter:
-            employees_query = employees_query.filter(Employee.schedule == schedule_filter)
-
-        # Получаем сотрудников ДО фильтрации занятости
-        employees_before_availability = employees_query.all()
-
-        # Фильтр занятости - УПРОЩЕННАЯ РЕАЛИЗАЦИЯ
-        if availability_filter:
-            filtered_employees = []
-            for emp in employees_before_availability:
-                active_repairs_count = len([r for r in emp.repairs if not r.is_completed])
-
-                if availability_filter == 'free' and active_repairs_count <= 2:
-                    filtered_employees.append(emp)
-                elif availability_filter == 'busy' and active_repairs_count > 2:
-                    filtered_employees.append(emp)
-        else:
-            filtered_employees = employees_before_availability
-
-        # Преобразуем в JSON с защитой от XSS
-        employees_data = []
-        for emp in filtered_employees:
-            # Подсчет активных ремонтов для каждого сотрудника
-            active_repairs_count = len([r for r in emp.repairs if not r.is_completed])
-
-            employees_data.append({
-                'id': emp.id,
-                'full_name': SecurityHelper.sanitize_input(emp.full_name),
-                'position': SecurityHelper.sanitize_input(emp.position),
-                'experience': emp.experience,
-                'schedule': SecurityHelper.sanitize_input(emp.schedule),
-                'salary': emp.salary,
-                'formatted_salary': ViewHelper.format_currency(emp.salary),
-                'active_repairs_count': active_repairs_count,
-                'availability': 'free' if active_repairs_count <= 2 else 'busy'
-            })
+    Выполняет один SQL-запрос при любом числе сотрудников
+    (см. api_queries.employee_filter_statement).
 
-        return jsonify({
-            'employees': employees_data,
-            'count': len(employees_data)
-        })
+    Если включён EMPLOYEE_FILTER_INDEX, ответ строится по индексу
+    в памяти (см. employee_index); из базы читаются только версии таблиц.
+    """
+    try:
+        args = employee_filter_args()
+
+        if current_app.config.get('EMPLOYEE_FILTER_INDEX'):
+            rows, total = employee_index.search(**args)
+            employees_data = [
+                employee_filter_item(row['id'], row['full_name'], row['position'], row['experience'],
+                                     row['schedule'], row['salary'], row['active_repairs_count'])
+                for row in rows
+            ]
+            return jsonify(employee_filter_response(employees_data, total, args['limit'], args['offset']))
+
+        rows = db.session.execute(employee_filter_statement(**args)).all()
+        if rows:
+            total = rows[0].total
+        elif args['offset']:
+            # страница за последней строкой: окно пустое, считаем отдельно
+            total = db.session.execute(employee_filter_count_statement(**args)).scalar()
+        else:
+            total = 0
+        return jsonify(employee_filter_response(employee_filter_rows_data(rows), total,
+                                                args['limit'], args['offset']))
 
-    except Exception as e:
+    except Exception:
         # Логируем ошибку для отладки
-        print(f"Ошибка фильтрации сотрудников: {e}")
+        current_app.logger.exception("Ошибка фильтрации сотрудников")
         # Защита от утечки информации об ошибках
         return jsonify({
             'error': 'Произошла ошибка при фильтрации сотрудников',
@@ -359,6 +322,24 @@ def api_filter_employees():
         }), 500
 
 
+# ---------- Список сотрудников для формы назначения ----------
+@bp.route("/api/employees/options")
+def api_employee_options():
+    """Список сотрудников для общего окна назначения на ремонт
+
+    Страница ремонтов загружает его один раз, а не рендерит <select>
+    со всеми сотрудниками в каждой строке. Тело ответа берётся из кэша
+    справочников, ETag — версия таблицы сотрудников: повторный запрос
+    браузера с If-None-Match получает 304 без выборки сотрудников.
+    """
+    version, = ReferenceCache.version("employee_options")
+    response = current_app.response_class(ReferenceCache.get("employee_options"), mimetype='application/json')
+    response.set_etag(f"employees-{version}")
+    # Браузер хранит ответ, но перед использованием сверяет ETag
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 # ---------- Назначение сотрудника на ремонт ----------
 @bp.route("/assign_employee/<int:repair_id>", methods=["POST"])
 def assign_employee(repair_id):
@@ -411,7 +392,15 @@ def remove_employee(repair_id, employee_id):
 def complete_repair(repair_id):
     try:
         repair = Repair.query.get_or_404(repair_id)
+        if repair.is_completed:
+            flash('Ремонт уже завершен', 'warning')
+            return redirect(url_for("main.repairs"))
         repair.completion_date = datetime.utcnow()
+        # Активный ремонт назначенных сотрудников становится завершённым
+        Employee.adjust_repair_counters(
+            db.select(repair_employees.c.employee_id).where(repair_employees.c.repair_id == repair.id),
+            active=-1, completed=1,
+        )
 
         completed = CompletedWork(
             car_id=repair.request.car_id,
@@ -432,6 +421,7 @@ def complete_repair(repair_id):
 
 # ---------- Запчасти ----------
 @bp.route("/spares", methods=["GET", "POST"])
+@conditional_page("spare_part", "repair", "service_request", "car")
 def spares():
     if request.method == "POST":
         try:
@@ -440,7 +430,7 @@ def spares():
             number = SecurityHelper.sanitize_input(request.form["number"])
 
             spare = SparePart(
-                repair_id=request.form["repair_id"],
+                repair_id=int(request.form["repair_id"]),
                 name=name,
                 number=number,
                 cost=float(request.form.get("cost", 0.0)),
@@ -448,6 +438,7 @@ def spares():
                 installed_date=datetime.utcnow()
             )
             db.session.add(spare)
+            Repair.adjust_parts(spare.repair_id, spare.total_cost, 1)
             db.session.commit()
             flash('Запчасть успешно добавлена', 'success')
         except Exception as e:
@@ -455,9 +446,18 @@ def spares():
             flash('Ошибка при добавлении запчасти', 'error')
         return redirect(url_for("main.spares"))
 
-    spares = SparePart.query.order_by(SparePart.installed_date.desc()).all()
-    repairs = Repair.query.all()
-    return render_template("spares.html", spares=spares, repairs=repairs, helper=ViewHelper())
+    # Статистика считается в SQL: при потоковой отдаче список запчастей читается один раз
+    stats = db.session.query(
+        db.func.count(SparePart.id).label('count'),
+        db.func.coalesce(db.func.sum(SparePart.cost * SparePart.quantity), 0.0).label('total'),
+        db.func.count(db.distinct(SparePart.repair_id)).label('repairs_count'),
+    ).one()
+    spares = QueryProfiles.apply(SparePart.query, "spares_list").order_by(
+        SparePart.installed_date.desc(), SparePart.id.desc()
+    )
+    repairs = QueryProfiles.apply(Repair.query, "repair_choices").all()
+    return render_list_page("spares.html", "spares", spares,
+                            repairs=repairs, stats=stats, helper=ViewHelper())
 
 
 # ---------- Удаление запчасти ----------
@@ -465,6 +465,7 @@ def spares():
 def delete_spare(spare_id):
     try:
         spare = SparePart.query.get_or_404(spare_id)
+        Repair.adjust_parts(spare.repair_id, -spare.total_cost, -1)
         db.session.delete(spare)
         db.session.commit()
         flash('Запчасть успешно удалена', 'success')
@@ -476,6 +477,7 @@ def delete_spare(spare_id):
 
 # ---------- Сотрудники ----------
 @bp.route("/employees", methods=["GET", "POST"])
+@conditional_page("employee")
 def employees():
     if request.method == "POST":
         try:
@@ -514,15 +516,27 @@ def employees():
             flash('Ошибка при добавлении сотрудника', 'error')
         return redirect(url_for("main.employees"))
 
-    employees = Employee.query.all()
-    return render_template("employees.html", employees=employees, helper=ViewHelper())
+    return render_list_page("employees.html", "employees", Employee.query, helper=ViewHelper())
 
 
 # ---------- Выполненные работы ----------
 @bp.route("/works")
+@conditional_page("completed_work", "car", "owner", "repair", "spare_part")
 def works():
-    works = CompletedWork.query.order_by(CompletedWork.completion_date.desc()).all()
-    return render_template("works.html", works=works, helper=ViewHelper())
+    # Итоги считаются одним агрегатом в SQL, а не суммированием в шаблоне
+    stats = db.session.query(
+        db.func.count(CompletedWork.id).label('count'),
+        db.func.coalesce(db.func.sum(CompletedWork.total_cost), 0.0).label('total'),
+        db.func.coalesce(db.func.avg(CompletedWork.total_cost), 0.0).label('average'),
+    ).one()
+
+    works_page = _completed_works_page(request.args.get('cursor'), "works_list")
+    works_page.total = stats.count
+
+    return render_template("works.html",
+                           works_page=works_page,
+                           stats=stats,
+                           helper=ViewHelper())
 
 
 # ---------- Удаление выполненной работы ----------
@@ -542,30 +556,135 @@ def delete_completed_work(work_id):
 # ---------- Очистка старых записей ----------
 @bp.route("/cleanup-works", methods=["POST"])
 def cleanup_works():
+    """Очистка выполняется фоновой задачей: ответ возвращается сразу"""
     try:
-        deleted_count = CompletedWork.cleanup_old_records(days=365)
-        flash(f'Удалено {deleted_count} старых записей', 'success')
-    except Exception as e:
-        flash('Ошибка при очистке старых записей', 'error')
+        job = JobRunner.submit("cleanup_works", days=365)
+        flash(Markup('Очистка старых записей запущена: <a href="{}">задача №{}</a>').format(
+            url_for("main.job_status", job_id=job.id), job.id), 'success')
+    except Exception:
+        current_app.logger.exception("Ошибка запуска очистки")
+        flash('Ошибка при запуске очистки старых записей', 'error')
     return redirect(url_for('main.works'))
 
 
+# ---------- Фоновые задачи ----------
+def _job_item(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'message': job.message,
+        'result': json.loads(job.result) if job.result else None,
+        'error': SecurityHelper.sanitize_input(job.error) if job.error else None,
+        'cancel_requested': job.cancel_requested,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@bp.route("/jobs/<int:job_id>")
+def job_status(job_id):
+    """Статус фоновой задачи (опрашивается клиентом до завершения)"""
+    job = JobRunner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Задача не найдена'}), 404
+    response = jsonify(_job_item(job))
+    response.cache_control.no_store = True
+    return response
+
+
+@bp.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    """Отменить фоновую задачу"""
+    job = JobRunner.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Задача не найдена'}), 404
+    return jsonify(_job_item(job))
+
+
 # ---------- Получение информации о ремонте для AJAX ----------
 @bp.route("/repair_info/<int:repair_id>")
 def repair_info(repair_id):
     """API для получения информации о ремонте"""
     try:
-        repair = Repair.query.get_or_404(repair_id)
-        return jsonify({
-            'id': repair.id,
-            'description': SecurityHelper.sanitize_input(repair.description),
-            'car': repair.request.car.display_info if repair.request else 'Не указан',
-            'cost': repair.cost,
-            'parts_count': len(repair.spare_parts),
-            'employees': [{
-                'id': emp.id,
-                'name': SecurityHelper.sanitize_input(emp.full_name)
-            } for emp in repair.employees]
-        })
+        repair = db.session.execute(repair_details_statement(repair_id)).scalars().first()
+        if repair is None:
+            return jsonify({'error': 'Ремонт не найден'}), 404
+        return jsonify(repair_item(repair))
     except Exception as e:
-        return jsonify({'error': 'Ремонт не найден'}), 404
\ No newline at end of file
+        return jsonify({'error': 'Ремонт не найден'}), 404
+
+
+# ---------- Пакетная выдача ремонтов ----------
+REPAIRS_BATCH_MAX_IDS = 200
+
+
+def _parse_ids(values):
+    """Список id из ?ids=1,2,3 и/или ?ids=1&ids=2 без повторов, в порядке запроса"""
+    ids = []
+    for value in values:
+        ids.extend(int(part) for part in value.split(',') if part.strip())
+    return list(dict.fromkeys(ids))
+
+
+@bp.route("/api/repairs")
+def api_repairs():
+    """Несколько ремонтов за один HTTP-запрос: ?ids=1,2,3
+
+    Ремонты со связями загружаются одним запросом (профиль repair_details).
+    ETag строится из версий таблиц и списка id ещё до обращения к ORM,
+    поэтому неизменившийся набор с If-None-Match получает 304 без выборки.
+    """
+    try:
+        ids = _parse_ids(request.args.getlist('ids'))
+    except ValueError:
+        return jsonify({'error': 'Параметр ids должен содержать целые числа через запятую'}), 400
+    if len(ids) > REPAIRS_BATCH_MAX_IDS:
+        return jsonify({'error': f'Не больше {REPAIRS_BATCH_MAX_IDS} ремонтов за запрос'}), 400
+
+    etag = versions_etag(REPAIR_DETAILS_TABLES, *ids)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        repairs = {}
+        if ids:
+            repairs = {repair.id: repair for repair in db.session.execute(repairs_details_statement(ids)).scalars()}
+        response = jsonify({
+            'repairs': [repair_item(repairs[repair_id]) for repair_id in ids if repair_id in repairs],
+            'missing': [repair_id for repair_id in ids if repair_id not in repairs],
+        })
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+# ---------- JSON-списки с курсорной пагинацией ----------
+@bp.route("/api/requests")
+def api_requests():
+    """Обращения постранично: ?cursor=<токен>&limit=<n>&count=1"""
+    cursor, limit, with_count = _api_page_args()
+    page = _requests_page(cursor, limit)
+    if with_count:
+        page.total = db.session.query(db.func.count(ServiceRequest.id)).scalar()
+    return jsonify({'items': [request_item(req) for req in page.items], **page.to_dict()})
+
+
+@bp.route("/api/repairs/active")
+def api_active_repairs():
+    """Активные ремонты постранично: ?cursor=<токен>&limit=<n>&count=1"""
+    cursor, limit, with_count = _api_page_args()
+    page = _active_repairs_page(cursor, limit)
+    if with_count:
+        page.total = _active_repairs_count()
+    return jsonify({'items': [repair_item(repair) for repair in page.items], **page.to_dict()})
+
+
+@bp.route("/api/works")
+def api_works():
+    """Выполненные работы постранично: ?cursor=<токен>&limit=<n>&count=1"""
+    cursor, limit, with_count = _api_page_args()
+    page = _completed_works_page(cursor, "repairs_completed_list", limit)
+    if with_count:
+        page.total = db.session.query(db.func.count(CompletedWork.id)).scalar()
+    return jsonify({'items': [completed_work_item(work) for work in page.items], **page.to_dict()})
\ No newline at end of file
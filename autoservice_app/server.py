@@ -0,0 +1,68 @@
+import multiprocessing
+from gunicorn.app.base import BaseApplication
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .jobs import JobRunner
+
+
+def default_workers():
+    """По одному воркеру на ядро: запросы в основном ждут SQLite, а не процессор"""
+    return multiprocessing.cpu_count()
+
+
+def server_options(config, **overrides):
+    """Настройки gunicorn из конфигурации приложения (SERVER_*) и параметров команды"""
+    options = {
+        "bind": config.get("SERVER_BIND", "0.0.0.0:5001"),
+        "workers": config.get("SERVER_WORKERS") or default_workers(),
+        "threads": config.get("SERVER_THREADS", 4),
+        "max_requests": config.get("SERVER_MAX_REQUESTS", 1000),
+        "max_requests_jitter": config.get("SERVER_MAX_REQUESTS_JITTER", 100),
+        "timeout": config.get("SERVER_TIMEOUT", 60),
+        "graceful_timeout": config.get("SERVER_GRACEFUL_TIMEOUT", 30),
+        "preload_app": True,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    options["worker_class"] = "gthread" if options["threads"] > 1 else "sync"
+    return options
+
+
+class AutoserviceServer(BaseApplication):
+    """Production-сервер на gunicorn
+
+    Приложение создаётся один раз в мастер-процессе (preload_app) и
+    наследуется воркерами через fork. Соединения SQLite нельзя делить
+    между процессами, поэтому после fork каждый воркер сбрасывает
+    унаследованный пул и открывает свои соединения (post_fork).
+    Воркер перезапускается после max_requests запросов (с разбросом
+    max_requests_jitter, чтобы воркеры не уходили на перезапуск разом),
+    а при остановке или SIGHUP успевает дообработать запросы за
+    graceful_timeout секунд. Ожидающие задачи перезапущенного воркера
+    забирает себе новый воркер (JobRunner.resume_queued).
+    """
+
+    def __init__(self, app, options):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_fork", self._post_fork)
+
+    def load(self):
+        return self.application
+
+    def _post_fork(self, server, worker):
+        with self.application.app_context():
+            # close=False: соединения мастера не закрываются, а просто забываются
+            db.engine.dispose(close=False)
+        try:
+            resumed = JobRunner.resume_queued(self.application)
+        except SQLAlchemyError as e:
+            # таблицы job ещё нет (не применены миграции) — сервер всё равно запускается
+            worker.log.warning("Ожидающие задачи не проверены: %s", e)
+        else:
+            if resumed:
+                worker.log.info("Забрано ожидающих задач: %d", resumed)
@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from collections import deque
+from flask import Blueprint, current_app, g, has_request_context, render_template, request
+from sqlalchemy import event
+from . import db
+
+
+# Сколько последних запросов хранит панель /debug/queries (в памяти процесса)
+DEBUG_HISTORY_SIZE = 50
+
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement):
+    """Запрос без конкретных значений: IN (?, ?, ?) -> IN (?...), литералы -> ?"""
+    statement = _STRING_RE.sub("?", statement)
+    statement = _NUMBER_RE.sub("?", statement)
+    statement = _IN_LIST_RE.sub("(?...)", statement)
+    return _SPACE_RE.sub(" ", statement).strip()
+
+
+class RequestQueries:
+    """SQL-запросы одного HTTP-запроса: число, время и повторы"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}  # нормализованный запрос -> [число, секунды]
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.setdefault(normalize_statement(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold):
+        """Запросы, повторённые больше threshold раз — признак N+1"""
+        return sorted(
+            ((statement, count, seconds) for statement, (count, seconds) in self.statements.items()
+             if count > threshold),
+            key=lambda item: -item[1],
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    # запросы вне HTTP-запроса (CLI, фоновые задачи) не учитываются
+    if has_request_context() and "sql_queries" in g:
+        g.sql_queries.add(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # после ошибки after_cursor_execute не вызывается — снимаем отметку времени
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+class QueryLog:
+    """Последние запросы процесса для панели /debug/queries"""
+
+    _entries = deque(maxlen=DEBUG_HISTORY_SIZE)
+    _lock = threading.Lock()
+
+    @classmethod
+    def add(cls, entry):
+        with cls._lock:
+            cls._entries.appendleft(entry)
+
+    @classmethod
+    def entries(cls):
+        with cls._lock:
+            return list(cls._entries)
+
+
+def _start_request():
+    g.sql_queries = RequestQueries()
+
+
+def _add_server_timing(response):
+    queries = g.get("sql_queries")
+    if queries is not None:
+        # Потоковые страницы выполняют часть запросов уже после отправки
+        # заголовков: в Server-Timing попадает то, что сделано до них
+        total = (time.perf_counter() - queries.started) * 1000
+        response.headers.add("Server-Timing", f'sql;dur={queries.seconds * 1000:.1f};desc="{queries.count} SQL"')
+        response.headers.add("Server-Timing", f"app;dur={total:.1f}")
+    return response
+
+
+def _finish_request(exc):
+    queries = g.pop("sql_queries", None)
+    if queries is None:
+        return
+    # для метрик: MetricsMiddleware записывает их после отдачи тела ответа
+    request.environ["autoservice.sql_queries"] = queries
+    app = current_app
+    repeated = queries.repeated(app.config.get("SQL_REPEAT_THRESHOLD", 10))
+    for statement, count, seconds in repeated:
+        app.logger.warning("Возможный N+1 в %s %s: запрос выполнен %d раз (%.1f мс): %s",
+                           request.method, request.path, count, seconds * 1000, statement[:300])
+    if app.config.get("DEBUG_QUERIES_PANEL") and request.endpoint != "debug_queries.panel":
+        QueryLog.add({
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "count": queries.count,
+            "sql_ms": queries.seconds * 1000,
+            "total_ms": (time.perf_counter() - queries.started) * 1000,
+            "statements": sorted(
+                ((statement, count, seconds * 1000) for statement, (count, seconds) in queries.statements.items()),
+                key=lambda item: -item[2],
+            ),
+            "repeated": {statement for statement, _, _ in repeated},
+        })
+
+
+debug_bp = Blueprint("debug_queries", __name__)
+
+
+@debug_bp.route("/debug/queries")
+def panel():
+    """Последние запросы процесса: число SQL, время, повторяющиеся запросы"""
+    return render_template("debug_queries.html", entries=QueryLog.entries(),
+                           threshold=current_app.config.get("SQL_REPEAT_THRESHOLD", 10))
+
+
+def init_sql_instrumentation(app):
+    """Учёт SQL по запросам: заголовок Server-Timing, журнал N+1 и панель /debug/queries
+
+    События before/after_cursor_execute вешаются на движок приложения,
+    статистика текущего запроса хранится в g.
+    """
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    app.before_request(_start_request)
+    app.after_request(_add_server_timing)
+    app.teardown_request(_finish_request)
+    if app.config.get("DEBUG_QUERIES_PANEL"):
+        app.register_blueprint(debug_bp)
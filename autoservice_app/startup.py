@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.orm import configure_mappers
+
+
+# Маршруты, время первого ответа которых показывает flask startup-report
+STARTUP_ROUTES = ("/repairs", "/spares", "/works", "/employees", "/api/employees/filter")
+
+# Код, который выполняется в отдельном процессе: холодный старт нельзя
+# измерить в процессе, где модули и шаблоны уже загружены
+_MEASURE_SCRIPT = r"""
+import json, sys, time
+started = time.perf_counter()
+from autoservice_app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+warm = None
+if sys.argv[1] == "1":
+    from autoservice_app.startup import warm_up
+    warm = warm_up(app)
+ready = time.perf_counter()
+client = app.test_client()
+routes = {}
+for url in sys.argv[2:]:
+    timings = []
+    for _ in range(2):
+        request_started = time.perf_counter()
+        with app.app_context():
+            response = client.get(url)
+            response.get_data()
+            response.close()
+        timings.append((time.perf_counter() - request_started) * 1000)
+    routes[url] = {"status": response.status_code, "first_ms": timings[0], "steady_ms": timings[1]}
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "warm_up_ms": (ready - created) * 1000 if warm else 0.0,
+    "templates": warm["templates"] if warm else 0,
+    "first_request_ms": (ready - started) * 1000 + routes[sys.argv[2]]["first_ms"],
+    "routes": routes,
+}))
+"""
+
+
+def init_template_cache(app):
+    """Кэш байт-кода Jinja на диске: шаблоны компилируются один раз на развёртывание
+
+    Новый процесс (воркер без preload, перезапуск, команда CLI) загружает
+    готовый байт-код вместо разбора и компиляции исходника шаблона.
+    Jinja сверяет контрольную сумму исходника, поэтому изменённый шаблон
+    перекомпилируется сам.
+    """
+    directory = app.config.get("TEMPLATE_CACHE_DIR") or os.path.join(app.instance_path, "jinja-cache")
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def warm_up(app):
+    """Подготовить процесс к первому запросу: скомпилировать все шаблоны и настроить мапперы
+
+    flask serve вызывает её в мастер-процессе до fork, поэтому воркеры
+    наследуют готовые шаблоны и первый запрос в них не медленнее остальных.
+    Соединения с базой здесь не открываются — их нельзя делить между процессами.
+    Возвращает {"templates": число шаблонов, "seconds": время}.
+    """
+    started = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates() if name.endswith(".html")]
+    for name in names:
+        app.jinja_env.get_template(name)
+    configure_mappers()
+    return {"templates": len(names), "seconds": time.perf_counter() - started}
+
+
+def measure_startup(app, warm=False, template_cache_dir=None, routes=STARTUP_ROUTES):
+    """Холодный старт в новом процессе: импорт, create_app, прогрев и первые запросы
+
+    Возвращает словарь с временем каждой стадии (мс) и временем первого
+    и повторного запроса для каждого маршрута.
+    """
+    env = dict(os.environ, METRICS_ENABLED="0")
+    if template_cache_dir is not None:
+        env["TEMPLATE_CACHE_DIR"] = template_cache_dir
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SCRIPT, "1" if warm else "0", *routes],
+        cwd=os.path.dirname(app.root_path), env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Процесс замера завершился с ошибкой:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def startup_report(app, routes=STARTUP_ROUTES):
+    """Замеры холодного старта в трёх режимах, каждый в новом процессе
+
+    - «без кэша»: пустой кэш байт-кода, шаблоны компилируются из исходников;
+    - «кэш байт-кода»: кэш заполнен предыдущим замером;
+    - «прогрев»: как в flask serve — warm_up() до первого запроса.
+    Кэш байт-кода замеров временный и не трогает кэш приложения.
+    """
+    directory = tempfile.mkdtemp(prefix="jinja-cache-")
+    try:
+        return {
+            "без кэша": measure_startup(app, template_cache_dir=directory, routes=routes),
+            "кэш байт-кода": measure_startup(app, template_cache_dir=directory, routes=routes),
+            "прогрев": measure_startup(app, warm=True, template_cache_dir=directory, routes=routes),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
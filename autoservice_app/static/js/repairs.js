@@ -71,24 +71,20 @@ class EmployeeFilter {
             if (this.filters.availability) params.append('availability', this.filters.availability);
 
             const response = await fetch(`/api/employees/filter?${params}`);
-
             if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+                throw new Error('Ошибка сервера');
             }
 
             const data = await response.json();
 
-            // Проверяем, есть ли ошибка в ответе
-            if (data.error) {
-                throw new Error(data.error);
-            }
-
             // Сохраняем выбранные чекбоксы
             const selectedEmployees = this.getSelectedEmployees();
 
             // Обновляем контейнер
             container.innerHTML = this.renderEmployees(data.employees);
-            countElement.textContent = `Найдено сотрудников: ${data.count}`;
+            countElement.textContent = data.has_more
+                ? `Найдено сотрудников: ${data.count} (показаны первые ${data.employees.length})`
+                : `Найдено сотрудников: ${data.count}`;
 
             // Восстанавливаем выбранные чекбоксы
             this.restoreSelectedEmployees(selectedEmployees);
@@ -101,7 +97,7 @@ class EmployeeFilter {
             container.innerHTML = `
                 <div class="alert alert-danger">
                     <i class="bi bi-exclamation-triangle"></i>
-                    Ошибка загрузки сотрудников: ${this.sanitizeInput(error.message)}
+                    Ошибка загрузки сотрудников. Пожалуйста, попробуйте позже.
                 </div>
             `;
         } finally {
@@ -133,12 +129,12 @@ class EmployeeFilter {
                                            id="emp_${emp.id}"
                                            ${emp.availability === 'busy' ? 'data-bs-toggle="tooltip" data-bs-title="Занят многими ремонтами"' : ''}>
                                     <label class="form-check-label w-100" for="emp_${emp.id}">
-                                        <div class="fw-bold">${this.sanitizeInput(emp.full_name)}</div>
+                                        <div class="fw-bold">${emp.full_name}</div>
                                         <div class="small text-muted">
-                                            <div>${this.sanitizeInput(emp.position)}</div>
+                                            <div>${emp.position}</div>
                                             <div>Стаж: ${emp.experience} лет</div>
-                                            <div>График: ${this.sanitizeInput(emp.schedule)}</div>
-                                            <div class="text-success">З/п: ${this.sanitizeInput(emp.formatted_salary)}</div>
+                                            <div>График: ${emp.schedule}</div>
+                                            <div class="text-success">З/п: ${emp.formatted_salary}</div>
                                             <div class="${emp.availability === 'busy' ? 'availability-busy' : 'availability-free'}">
                                                 🛠️ Активных ремонтов: ${emp.active_repairs_count}
                                                 ${emp.availability === 'busy' ? ' 🔥' : ' ✅'}
@@ -207,12 +203,48 @@ class EmployeeFilter {
 
         this.filterEmployees();
     }
+}
+
+class EmployeeAssignPicker {
+    constructor(modal) {
+        this.form = modal.querySelector('#assignEmployeeForm');
+        this.select = modal.querySelector('#assignEmployeeSelect');
+        this.title = modal.querySelector('#assignEmployeeTitle');
+        this.options = null;
+
+        modal.addEventListener('show.bs.modal', (e) => {
+            const button = e.relatedTarget;
+            this.form.action = button.dataset.action;
+            this.title.textContent = `Назначить сотрудника на ремонт #${button.dataset.repairId}`;
+            this.load();
+        });
+    }
 
-    sanitizeInput(input) {
-        // Базовая защита от XSS на клиенте
-        const div = document.createElement('div');
-        div.textContent = input;
-        return div.innerHTML;
+    load() {
+        // Список запрашивается один раз за страницу; браузер сверяет его по ETag
+        if (!this.options) {
+            this.options = fetch('/api/employees/options')
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(data => this.render(data.employees))
+                .catch(error => {
+                    console.error('Ошибка загрузки сотрудников:', error);
+                    this.select.options[0].textContent = 'Не удалось загрузить сотрудников';
+                    this.options = null;
+                });
+        }
+        return this.options;
+    }
+
+    render(employees) {
+        this.select.options[0].textContent = 'Выберите сотрудника...';
+        const fragment = document.createDocumentFragment();
+        employees.forEach(emp => fragment.appendChild(new Option(emp.label, emp.id)));
+        this.select.appendChild(fragment);
     }
 }
 
@@ -227,6 +259,11 @@ function sanitizeInput(input) {
 document.addEventListener('DOMContentLoaded', function() {
     new EmployeeFilter();
 
+    const assignModal = document.getElementById('assignEmployeeModal');
+    if (assignModal) {
+        new EmployeeAssignPicker(assignModal);
+    }
+
     // Защита от CSRF - добавление токена к формам
     const forms = document.querySelectorAll('form');
     forms.forEach(form => {
@@ -241,8 +278,10 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
     });
+});
 
-    // Защита от внедрения кода в текстовые поля
+// Защита от внедрения кода в текстовые поля
+document.addEventListener('DOMContentLoaded', function() {
     const textareas = document.querySelectorAll('textarea, input[type="text"]');
     textareas.forEach(field => {
         field.addEventListener('input', function(e) {
@@ -254,52 +293,4 @@ document.addEventListener('DOMContentLoaded', function() {
             e.target.value = value;
         });
     });
-
-    // Обработка вкладок для сохранения состояния
-    const repairTabs = document.getElementById('repairsTabs');
-    if (repairTabs) {
-        repairTabs.addEventListener('shown.bs.tab', function (e) {
-            // Сохраняем активную вкладку в sessionStorage
-            sessionStorage.setItem('activeRepairTab', e.target.getAttribute('id'));
-        });
-
-        // Восстанавливаем активную вкладку при загрузке
-        const activeTab = sessionStorage.getItem('activeRepairTab');
-        if (activeTab) {
-            const tabElement = document.getElementById(activeTab);
-            if (tabElement) {
-                new bootstrap.Tab(tabElement).show();
-            }
-        }
-    }
 });
-
-// Функция для обновления информации о ремонте
-function updateRepairInfo(repairId) {
-    const repairInfo = document.getElementById('repairInfo');
-    const repairDetails = document.getElementById('repairDetails');
-
-    if (!repairId) {
-        repairInfo.style.display = 'none';
-        return;
-    }
-
-    // Получаем информацию из data-атрибутов выбранного option
-    const selectedOption = document.querySelector(`#repair_id option[value="${repairId}"]`);
-    if (selectedOption) {
-        const description = selectedOption.getAttribute('data-description');
-        const car = selectedOption.getAttribute('data-car');
-        const cost = selectedOption.getAttribute('data-cost');
-
-        repairDetails.innerHTML = `
-            <div><strong>Автомобиль:</strong> ${sanitizeInput(car)}</div>
-            <div><strong>Описание:</strong> ${sanitizeInput(description)}</div>
-            <div><strong>Стоимость работ:</strong> ${parseFloat(cost || 0).toLocaleString('ru-RU')} ₽</div>
-        `;
-        repairInfo.style.display = 'block';
-    }
-}
-
-// Глобальные функции для использования в HTML
-window.updateRepairInfo = updateRepairInfo;
-window.sanitizeInput = sanitizeInput;
\ No newline at end of file
@@ -0,0 +1,32 @@
+function updateRepairInfo(repairId) {
+    const repairInfo = document.getElementById('repairInfo');
+    const repairDetails = document.getElementById('repairDetails');
+
+    if (!repairId) {
+        repairInfo.style.display = 'none';
+        return;
+    }
+
+    // Получаем информацию из data-атрибутов выбранного option
+    const selectedOption = document.querySelector(`#repair_id option[value="${repairId}"]`);
+    if (selectedOption) {
+        const description = selectedOption.getAttribute('data-description');
+        const car = selectedOption.getAttribute('data-car');
+        const cost = selectedOption.getAttribute('data-cost');
+
+        repairDetails.innerHTML = `
+            <div><strong>Автомобиль:</strong> ${car}</div>
+            <div><strong>Описание:</strong> ${description}</div>
+            <div><strong>Стоимость работ:</strong> ${parseFloat(cost).toLocaleString('ru-RU')} ₽</div>
+        `;
+        repairInfo.style.display = 'block';
+    }
+}
+
+// Инициализация при загрузке
+document.addEventListener('DOMContentLoaded', function() {
+    const repairSelect = document.getElementById('repair_id');
+    if (repairSelect.value) {
+        updateRepairInfo(repairSelect.value);
+    }
+});
@@ -0,0 +1,130 @@
+import hashlib
+from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.sqlite import insert
+from . import db
+from .models import Employee, TableVersion
+
+
+# Денормализованные счётчики: запись, которая меняет только их, увеличивает
+# версию "<таблица>_counters", а не версию самой таблицы. Справочники с именами
+# и должностями тогда не перестраиваются при каждом назначении сотрудника
+COUNTER_COLUMNS = {
+    Employee.__tablename__: frozenset({"active_repairs_count", "completed_repairs_count"}),
+}
+
+# Параметр выполнения запроса: какие версии увеличить вместо версии его таблицы
+VERSIONED_TABLES_OPTION = "versioned_tables"
+
+
+def counters_version(table):
+    """Имя версии счётчиков таблицы (в table_version, без таблицы в схеме)"""
+    return f"{table}_counters"
+
+
+def _changed_tables(session):
+    """Таблицы, которые затрагивает текущий flush"""
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        mapper = state.mapper
+        if obj in session.dirty and obj not in session.deleted:
+            changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+            counters = COUNTER_COLUMNS.get(mapper.local_table.name)
+            if counters and changed and changed <= counters:
+                tables.add(counters_version(mapper.local_table.name))
+                continue
+        # dirty бывает и при изменении только коллекций — саму строку тогда не трогаем
+        if obj in session.new or obj in session.deleted or session.is_modified(obj, include_collections=False):
+            tables.update(table.name for table in mapper.tables)
+        for relationship in mapper.relationships:
+            if relationship.secondary is None:
+                continue
+            # при удалении строки её связи многие-ко-многим удаляются вместе с ней
+            if obj in session.deleted or state.attrs[relationship.key].history.has_changes():
+                tables.add(relationship.secondary.name)
+    tables.discard(TableVersion.__tablename__)
+    return tables
+
+
+def bump_versions(tables, connection=None):
+    """Увеличить счётчики изменений таблиц в текущей транзакции
+
+    Вызывается автоматически для записей через сессию ORM; при записи
+    напрямую через соединение (Core, executemany) её нужно вызвать явно.
+    """
+    tables = sorted(set(tables) - {TableVersion.__tablename__})
+    if not tables:
+        return
+    if connection is None:
+        connection = db.session.connection()
+    now = datetime.utcnow()
+    stmt = insert(TableVersion.__table__).values(
+        [{'table_name': table, 'version': 1, 'updated_at': now} for table in tables]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={'version': TableVersion.version + 1, 'updated_at': stmt.excluded.updated_at},
+    )
+    connection.execute(stmt)
+    _forget_request_versions()
+
+
+def table_versions():
+    """Текущие версии всех таблиц: {имя таблицы: версия}
+
+    Внутри запроса читаются из базы один раз (одним SELECT) и хранятся в g.
+    """
+    if has_app_context() and 'table_versions' in g:
+        return g.table_versions
+    versions = dict(db.session.query(TableVersion.table_name, TableVersion.version).all())
+    if has_app_context():
+        g.table_versions = versions
+    return versions
+
+
+def versions_key(tables):
+    """Кортеж версий указанных таблиц (0 — таблица ещё не менялась)"""
+    versions = table_versions()
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def versions_etag(tables, *parts):
+    """ETag по версиям таблиц и дополнительным частям ответа (например, списку id)"""
+    payload = "|".join(
+        [",".join(f"{table}:{version}" for table, version in zip(tables, versions_key(tables)))]
+        + [str(part) for part in parts]
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def _forget_request_versions():
+    if has_app_context():
+        g.pop('table_versions', None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_after_flush(session, flush_context):
+    tables = _changed_tables(session)
+    if tables:
+        bump_versions(tables, session.connection())
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _bump_on_bulk_write(orm_execute_state):
+    # query.delete(), query.update() и session.execute(table.insert()/delete())
+    # идут мимо flush, поэтому таблицу берём прямо из выражения
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tables = orm_execute_state.execution_options.get(VERSIONED_TABLES_OPTION)
+        if tables is None:
+            table = getattr(orm_execute_state.statement, 'table', None)
+            tables = [table.name] if table is not None and getattr(table, 'name', None) else []
+        if tables:
+            bump_versions(tables, orm_execute_state.session.connection())
+
+
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def _reset_cached_versions(session):
+    _forget_request_versions()
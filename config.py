@@ -3,7 +3,84 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
-    # правильный путь к базе SQLite
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'autoservice.db')}"
+    # правильный путь к базе SQLite (instance/, как у Flask-SQLAlchemy);
+    # другую базу можно указать через переменную окружения DATABASE_URL
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'instance', 'autoservice.db')}"
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev_secret_key")
+
+    # Фильтр сотрудников по индексу в памяти вместо SQL на каждый запрос
+    EMPLOYEE_FILTER_INDEX = True
+    # Потоковая отдача страниц-списков (владельцы, автомобили, сотрудники, запчасти)
+    STREAM_LIST_PAGES = True
+    # Асинхронные view (aiosqlite) для /api/employees/filter и /repair_info/<id>
+    ASYNC_JSON_API = os.environ.get("ASYNC_JSON_API", "0") == "1"
+
+    # Production-сервер (flask serve): адрес, воркеры (0 — по числу ядер),
+    # потоки на воркер и перезапуск воркера после N запросов
+    SERVER_BIND = os.environ.get("SERVER_BIND", "0.0.0.0:5001")
+    SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0))
+    SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 4))
+    SERVER_MAX_REQUESTS = 1000
+    SERVER_MAX_REQUESTS_JITTER = 100
+    SERVER_TIMEOUT = 60
+    SERVER_GRACEFUL_TIMEOUT = 30
+
+    # Учёт SQL по запросам: заголовок Server-Timing и журнал N+1 —
+    # одинаковый с точностью до параметров запрос чаще SQL_REPEAT_THRESHOLD раз
+    SQL_INSTRUMENTATION = True
+    SQL_REPEAT_THRESHOLD = 10
+    # Панель /debug/queries с последними запросами процесса (только для разработки)
+    DEBUG_QUERIES_PANEL = os.environ.get("DEBUG_QUERIES_PANEL", "0") == "1"
+
+    # Профилирование отдельных запросов (cProfile + сэмплер стеков):
+    # по заголовку X-Profile: <PROFILE_TOKEN> или для всех запросов к путям
+    # из PROFILE_PATHS (через запятую). Без токена и путей выключено.
+    # Профили пишутся в PROFILE_DIR (по умолчанию instance/profiles)
+    PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+    PROFILE_PATHS = [path for path in os.environ.get("PROFILE_PATHS", "").split(",") if path]
+    PROFILE_DIR = os.environ.get("PROFILE_DIR")
+    PROFILE_SAMPLE_INTERVAL = 0.001
+    PROFILE_KEEP = 200
+
+    # Метрики Prometheus на /metrics. Каждый воркер раз в METRICS_FLUSH_INTERVAL
+    # секунд пишет снимок в METRICS_DIR (по умолчанию instance/metrics),
+    # /metrics складывает снимки всех воркеров. Нужен заголовок
+    # Authorization: Bearer <METRICS_TOKEN>; без токена /metrics отвечает 404,
+    # если не задан METRICS_PUBLIC=1
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = 1.0
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+    METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "0") == "1"
+
+    # Кэш байт-кода шаблонов Jinja на диске (TEMPLATE_CACHE_DIR, по умолчанию
+    # instance/jinja-cache): новый процесс не компилирует шаблоны заново
+    TEMPLATE_BYTECODE_CACHE = True
+    TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR")
+    # Компилировать все шаблоны при создании приложения — для WSGI-серверов
+    # кроме flask serve (он прогревает мастер-процесс перед fork сам)
+    STARTUP_WARMUP = os.environ.get("STARTUP_WARMUP", "0") == "1"
+
+    # Собранная статика (flask build-assets): минифицированные файлы с хэшем
+    # в имени и сжатые копии .gz/.br, по умолчанию instance/assets
+    ASSETS_DIR = os.environ.get("ASSETS_DIR")
+
+    # Фоновые задачи (jobs): потоков-исполнителей в каждом процессе
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+
+    # PRAGMA для каждого нового соединения SQLite. В режиме WAL запись
+    # не блокирует читателей, synchronous=NORMAL в WAL не теряет
+    # целостность при сбое, busy_timeout ждёт освобождения блокировки
+    # вместо ошибки "database is locked"
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+        "cache_size": -64000,  # 64 МБ
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
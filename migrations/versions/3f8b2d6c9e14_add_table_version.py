@@ -0,0 +1,29 @@
+"""Add table version counters
+
+Revision ID: 3f8b2d6c9e14
+Revises: 7c2e4f9a1b3d
+Create Date: 2026-10-18 14:05:17.482903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8b2d6c9e14'
+down_revision = '7c2e4f9a1b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_version',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_version')
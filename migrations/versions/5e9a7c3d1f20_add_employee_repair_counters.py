@@ -0,0 +1,43 @@
+"""Add employee repair counters
+
+Revision ID: 5e9a7c3d1f20
+Revises: 3f8b2d6c9e14
+Create Date: 2026-10-18 16:40:08.219354
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a7c3d1f20'
+down_revision = '3f8b2d6c9e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_repairs_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('completed_repairs_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Начальные значения счётчиков по существующим назначениям
+    op.execute("""
+        UPDATE employee SET
+            active_repairs_count = (
+                SELECT count(*) FROM repair_employees
+                JOIN repair ON repair.id = repair_employees.repair_id
+                WHERE repair_employees.employee_id = employee.id AND repair.completion_date IS NULL
+            ),
+            completed_repairs_count = (
+                SELECT count(*) FROM repair_employees
+                JOIN repair ON repair.id = repair_employees.repair_id
+                WHERE repair_employees.employee_id = employee.id AND repair.completion_date IS NOT NULL
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.drop_column('completed_repairs_count')
+        batch_op.drop_column('active_repairs_count')
@@ -0,0 +1,52 @@
+"""Add foreign key and sort indexes
+
+Revision ID: 7c2e4f9a1b3d
+Revises: 1d3d5b5236d4
+Create Date: 2026-10-18 10:12:41.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e4f9a1b3d'
+down_revision = '1d3d5b5236d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_car_owner_id', 'car', ['owner_id'], unique=False)
+    op.create_index('ix_service_request_car_id', 'service_request', ['car_id'], unique=False)
+    op.create_index('ix_service_request_request_date_id', 'service_request', ['request_date', 'id'], unique=False)
+    op.create_index('ix_repair_request_id', 'repair', ['request_id'], unique=False)
+    op.create_index('ix_repair_completion_date_id', 'repair', ['completion_date', 'id'], unique=False)
+    op.create_index('ix_spare_part_repair_id', 'spare_part', ['repair_id'], unique=False)
+    op.create_index('ix_spare_part_installed_date_id', 'spare_part', ['installed_date', 'id'], unique=False)
+    op.create_index('ix_employee_name', 'employee', ['last_name', 'first_name', 'id'], unique=False)
+    op.create_index('ix_employee_position', 'employee', ['position'], unique=False)
+    op.create_index('ix_employee_schedule', 'employee', ['schedule'], unique=False)
+    op.create_index('ix_completed_work_car_id', 'completed_work', ['car_id'], unique=False)
+    op.create_index('ix_completed_work_repair_id', 'completed_work', ['repair_id'], unique=False)
+    op.create_index('ix_completed_work_completion_date_id', 'completed_work', ['completion_date', 'id'], unique=False)
+    op.create_index('ix_repair_employees_employee_id', 'repair_employees', ['employee_id', 'repair_id'], unique=False)
+    # Обновляем статистику планировщика SQLite после создания индексов
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    op.drop_index('ix_repair_employees_employee_id', table_name='repair_employees')
+    op.drop_index('ix_completed_work_completion_date_id', table_name='completed_work')
+    op.drop_index('ix_completed_work_repair_id', table_name='completed_work')
+    op.drop_index('ix_completed_work_car_id', table_name='completed_work')
+    op.drop_index('ix_employee_schedule', table_name='employee')
+    op.drop_index('ix_employee_position', table_name='employee')
+    op.drop_index('ix_employee_name', table_name='employee')
+    op.drop_index('ix_spare_part_installed_date_id', table_name='spare_part')
+    op.drop_index('ix_spare_part_repair_id', table_name='spare_part')
+    op.drop_index('ix_repair_completion_date_id', table_name='repair')
+    op.drop_index('ix_repair_request_id', table_name='repair')
+    op.drop_index('ix_service_request_request_date_id', table_name='service_request')
+    op.drop_index('ix_service_request_car_id', table_name='service_request')
+    op.drop_index('ix_car_owner_id', table_name='car')
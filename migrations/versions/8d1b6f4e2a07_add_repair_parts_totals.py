@@ -0,0 +1,40 @@
+"""Add repair parts totals
+
+Revision ID: 8d1b6f4e2a07
+Revises: 5e9a7c3d1f20
+Create Date: 2026-10-18 17:22:51.604718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1b6f4e2a07'
+down_revision = '5e9a7c3d1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('repair', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parts_total', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('parts_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Начальные значения по существующим запчастям
+    op.execute("""
+        UPDATE repair SET
+            parts_total = (
+                SELECT coalesce(sum(spare_part.cost * spare_part.quantity), 0.0)
+                FROM spare_part WHERE spare_part.repair_id = repair.id
+            ),
+            parts_count = (
+                SELECT count(*) FROM spare_part WHERE spare_part.repair_id = repair.id
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('repair', schema=None) as batch_op:
+        batch_op.drop_column('parts_count')
+        batch_op.drop_column('parts_total')
@@ -0,0 +1,27 @@
+"""Add completed work pagination key index
+
+Revision ID: c7f1a3e9d2b6
+Revises: b4e2d8a6c1f3
+Create Date: 2026-10-18 21:40:12.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f1a3e9d2b6'
+down_revision = 'b4e2d8a6c1f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Выражение должно совпадать с pagination.sort_key(), иначе SQLite не использует индекс
+    op.create_index('ix_completed_work_completion_key_id', 'completed_work',
+                    [sa.text("coalesce(completion_date, '0001-01-01')"), 'id'], unique=False)
+    op.execute('ANALYZE completed_work')
+
+
+def downgrade():
+    op.drop_index('ix_completed_work_completion_key_id', table_name='completed_work')
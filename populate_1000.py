@@ -261,6 +261,12 @@ def populate_1000_records():
         db.session.commit()
         print(f"✅ Назначено {assignments_count} связей сотрудник-ремонт")
 
+        # Связи добавлялись через ORM в обход Employee.adjust_repair_counters —
+        # пересчитываем денормализованные счётчики ремонтов одним UPDATE
+        fixed = Employee.reconcile_repair_counters()
+        db.session.commit()
+        print(f"✅ Пересчитаны счётчики ремонтов: {fixed} сотрудников")
+
         # -------- Запчасти (1000) --------
         print("🔩 Создаем 1000 запчастей...")
         spares = []
@@ -282,7 +288,13 @@ def populate_1000_records():
         if spares:
             db.session.bulk_save_objects(spares)
         db.session.commit()
+
+        # bulk_save_objects не обновляет Repair.parts_total / parts_count —
+        # пересчитываем сумму и число запчастей ремонтов одним UPDATE
+        fixed = Repair.reconcile_parts()
+        db.session.commit()
         print("✅ 1000 запчастей создано")
+        print(f"✅ Пересчитаны суммы запчастей: {fixed} ремонтов")
 
         # -------- Выполненные работы (1000) --------
         print("✅ Создаем выполненные работы...")
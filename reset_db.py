@@ -10,10 +10,14 @@ def reset_database():
     app = create_app()
 
     with app.app_context():
-        # Удаляем старую базу если существует
-        db_path = 'autoservice.db'
+        # Удаляем старую базу если существует (путь из конфигурации приложения)
+        db_path = db.engine.url.database
+        db.engine.dispose()
         if os.path.exists(db_path):
-            os.remove(db_path)
+            # в режиме WAL рядом с базой лежат файлы журнала
+            for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
             print("🗑️ Удалена старая база данных")
 
         # Создаем все таблицы
@@ -64,6 +68,10 @@ def add_test_data():
         )
         db.session.add(owner)
 
+        db.session.commit()
+        # Денормализованные счётчики согласуются с repair_employees и spare_part
+        Employee.reconcile_repair_counters()
+        Repair.reconcile_parts()
         db.session.commit()
         print("✅ Тестовые данные добавлены")
 
@@ -0,0 +1,49 @@
+import pytest
+from config import Config
+from autoservice_app import create_app, db
+from autoservice_app.datasets import build_dataset
+from autoservice_app.employee_index import employee_index
+from autoservice_app.reference_cache import ReferenceCache
+
+
+def make_app(database_path, **overrides):
+    """Приложение на отдельной базе SQLite без побочных файлов в instance/"""
+    settings = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database_path}",
+        "METRICS_ENABLED": False,
+        "TEMPLATE_BYTECODE_CACHE": False,
+        "ASSETS_DIR": str(database_path.parent / "assets"),
+        **overrides,
+    }
+    # Кэши процесса привязаны к версиям таблиц, а у каждой тестовой базы они начинаются заново
+    employee_index.invalidate()
+    ReferenceCache._values.clear()
+    return create_app(type("TestConfig", (Config,), settings))
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Пустая база со схемой по моделям"""
+    app = make_app(tmp_path / "test.db")
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def seeded_app(tmp_path):
+    """База с детерминированным набором данных (datasets.build_dataset)"""
+    path = tmp_path / "seeded.db"
+    build_dataset(str(path), rows=60)
+    app = make_app(path)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
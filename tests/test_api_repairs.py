@@ -0,0 +1,50 @@
+from autoservice_app import db
+from autoservice_app.diagnostics import StatementRecorder
+from autoservice_app.models import Repair
+from autoservice_app.routes import REPAIRS_BATCH_MAX_IDS
+
+
+def _repair_ids(app, count):
+    with app.app_context():
+        return [repair_id for repair_id, in db.session.query(Repair.id).order_by(Repair.id).limit(count)]
+
+
+def test_batch_matches_single_requests(seeded_app):
+    client = seeded_app.test_client()
+    ids = _repair_ids(seeded_app, 5)[::-1]
+    missing = 999999
+
+    with seeded_app.app_context(), StatementRecorder() as recorder:
+        response = client.get("/api/repairs", query_string={"ids": ",".join(map(str, ids + [missing]))})
+    data = response.get_json()
+    assert response.status_code == 200
+    # порядок — как в запросе; число SQL не зависит от размера пакета
+    assert [repair["id"] for repair in data["repairs"]] == ids
+    assert data["missing"] == [missing]
+    assert recorder.count <= 5
+    for repair in data["repairs"]:
+        assert repair == client.get(f"/repair_info/{repair['id']}").get_json()
+
+
+def test_batch_conditional_get(seeded_app):
+    client = seeded_app.test_client()
+    ids = _repair_ids(seeded_app, 3)
+    url = "/api/repairs?" + "&".join(f"ids={repair_id}" for repair_id in ids)
+    etag = client.get(url).headers["ETag"]
+
+    with seeded_app.app_context(), StatementRecorder() as recorder:
+        cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert not any("FROM repair " in statement for statement, _ in recorder.statements)
+    # другой набор id — другой ETag
+    assert client.get(url + "&ids=999999").headers["ETag"] != etag
+
+    with seeded_app.app_context():
+        db.session.get(Repair, ids[0]).cost += 1
+        db.session.commit()
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_batch_rejects_bad_ids(client):
+    assert client.get("/api/repairs?ids=1,x").status_code == 400
+    assert client.get("/api/repairs?ids=" + ",".join(map(str, range(1, REPAIRS_BATCH_MAX_IDS + 2)))).status_code == 400
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import pytest
+from autoservice_app.assets import MANIFEST_FILE, asset_url, assets_directory, build_assets, minify_css, minify_js
+
+
+@pytest.mark.parametrize("source, expected", [
+    # деление, а не регулярное выражение
+    ("var a = b / c / d; // деление\nvar r = /ab+c/gi.test(s);",
+     "var a = b / c / d;\nvar r = /ab+c/gi.test(s);"),
+    ("var re = /[/]/; var x = 4 / 2;", "var re = /[/]/; var x = 4 / 2;"),
+    ("if (ok) return /\\d+/.test(v);", "if (ok) return /\\d+/.test(v);"),
+    ("var t = typeof /x/;", "var t = typeof /x/;"),
+    ("x = y /* комментарий */ / z", "x = y / z"),
+    # // и /* внутри строк и шаблонных строк — не комментарии
+    ("var u = 'http://example.com'; var c = \"/* нет */\"; // да",
+     "var u = 'http://example.com'; var c = \"/* нет */\";"),
+    ("const s = `сумма: ${ items.map(i => `${i.name} // ${i.cost}` ).join(', ') } /* нет */`;",
+     "const s = `сумма: ${ items.map(i => `${i.name} // ${i.cost}` ).join(', ') } /* нет */`;"),
+    ("const html = `<td>\n    ${ {a: 1}.a }\n</td>`;", "const html = `<td>\n    ${ {a: 1}.a }\n</td>`;"),
+])
+def test_minify_js_keeps_literals(source, expected):
+    assert minify_js(source) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "let a = 1\nlet b = a\n++b",
+    "function f() {\n    return\n    value\n}",
+    "a = b\n(c || d).e()",
+    "x = a\n/ 2 /\nb",
+])
+def test_minify_js_keeps_newlines_for_asi(source):
+    # перевод строки меняет смысл кода при автоматической расстановке ";"
+    assert [line.strip() for line in minify_js(source).split("\n")] == \
+           [line.strip() for line in source.split("\n")]
+
+
+def test_minify_js_collapses_comments_and_indentation():
+    source = "/* заголовок */\nfunction f(a) {\n\n    // шаг\n    return a   +   1;\n}\n"
+    assert minify_js(source) == "function f(a) {\nreturn a + 1;\n}"
+
+
+def test_minify_css():
+    source = "a > b { color : red ; }\n/* комментарий */\n.b::after { content: \"/* ; } \" ; }"
+    assert minify_css(source) == 'a>b{color :red}.b::after{content:"/* ; } "}'
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="нужен node")
+def test_minified_static_scripts_parse(app, tmp_path):
+    for name in ("js/repairs.js", "js/spares.js"):
+        with open(os.path.join(app.static_folder, name), encoding="utf-8") as f:
+            path = tmp_path / os.path.basename(name)
+            path.write_text(minify_js(f.read()), encoding="utf-8")
+        result = subprocess.run(["node", "--check", str(path)], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+def _manifest(app):
+    with open(os.path.join(assets_directory(app), MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_build_assets_is_stable_and_fingerprinted(app):
+    first = build_assets(app)
+    manifest = _manifest(app)
+    second = build_assets(app)
+    assert second == first
+    assert _manifest(app) == manifest
+
+    for source, built in manifest.items():
+        base, extension = os.path.splitext(source)
+        assert re.fullmatch(re.escape(base) + r"\.[0-9a-f]{12}" + re.escape(extension), built)
+        assert os.path.isfile(os.path.join(assets_directory(app), built))
+    assert {"css/style.css", "css/repairs.css", "js/repairs.js", "js/spares.js"} <= set(manifest)
+
+
+def test_build_assets_clean_removes_stale_files(app):
+    build_assets(app)
+    stale = os.path.join(assets_directory(app), "js", "old.0123456789ab.js")
+    with open(stale, "w") as f:
+        f.write("x")
+    build_assets(app)
+    assert os.path.exists(stale)
+    build_assets(app, clean=True)
+    assert not os.path.exists(stale)
+    assert os.path.isfile(os.path.join(assets_directory(app), _manifest(app)["js/repairs.js"]))
+
+
+def test_asset_url_and_route(app):
+    client = app.test_client()
+    with app.test_request_context():
+        assert asset_url("js/repairs.js") == "/static/js/repairs.js"
+    build_assets(app)
+    with app.test_request_context():
+        url = asset_url("js/repairs.js")
+    assert url == "/assets/" + _manifest(app)["js/repairs.js"]
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.content_encoding == "gzip"
+    assert "immutable" in response.headers["Cache-Control"]
+    response.close()
+    assert client.get("/assets/../config.py").status_code == 404
+
+    page = client.get("/repairs").get_data(as_text=True)
+    head = page.split("</head>")[0]
+    for name in ("css/style.css", "css/repairs.css"):
+        assert f'href="/assets/{_manifest(app)[name]}"' in head
@@ -0,0 +1,35 @@
+from pathlib import Path
+from autoservice_app import db
+from autoservice_app.models import Repair
+from conftest import make_app
+
+
+def _async_app(seeded_app):
+    path = Path(seeded_app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///"))
+    return make_app(path, ASYNC_JSON_API=True, EMPLOYEE_FILTER_INDEX=False)
+
+
+def test_async_repair_info_matches_sync(seeded_app):
+    async_app = _async_app(seeded_app)
+    with seeded_app.app_context():
+        repair_id = db.session.query(db.func.min(Repair.id)).scalar()
+    for url in (f"/repair_info/{repair_id}", "/repair_info/999999"):
+        expected = seeded_app.test_client().get(url)
+        response = async_app.test_client().get(url)
+        assert response.status_code == expected.status_code
+        assert response.get_json() == expected.get_json()
+
+
+def test_async_filter_error_is_logged(seeded_app, monkeypatch, caplog):
+    async_app = _async_app(seeded_app)
+
+    def broken(**args):
+        raise RuntimeError("нет соединения")
+
+    monkeypatch.setattr("autoservice_app.async_views.employee_filter_statement", broken)
+    response = async_app.test_client().get("/api/employees/filter")
+    assert response.status_code == 500
+    assert response.get_json()["employees"] == []
+    record, = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert record.getMessage() == "Ошибка фильтрации сотрудников"
+    assert record.exc_info[1].args == ("нет соединения",)
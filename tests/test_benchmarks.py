@@ -0,0 +1,56 @@
+import sqlite3
+from autoservice_app import db
+from autoservice_app.benchmarks import NOISE_MS, compare_with_baseline, run_route_benchmarks
+from autoservice_app.datasets import build_dataset
+from autoservice_app.diagnostics import iter_get_routes
+
+
+def _dump(path):
+    # table_version хранит время записи, остальное должно совпадать байт в байт
+    with sqlite3.connect(path) as connection:
+        lines = [line for line in connection.iterdump() if '"table_version" VALUES' not in line]
+    connection.close()
+    return lines
+
+
+def test_dataset_is_deterministic(tmp_path):
+    build_dataset(str(tmp_path / "a.db"), rows=30)
+    build_dataset(str(tmp_path / "b.db"), rows=30)
+    build_dataset(str(tmp_path / "c.db"), rows=30, seed=7)
+    assert _dump(tmp_path / "a.db") == _dump(tmp_path / "b.db")
+    assert _dump(tmp_path / "a.db") != _dump(tmp_path / "c.db")
+
+
+def _route(**metrics):
+    return {"status": 200, "ms": 10.0, "statements": 3, "orm_rows": 50, "peak_kb": 1000, **metrics}
+
+
+def test_compare_with_baseline():
+    baseline = {"1000": {"main.works": _route(), "main.cars": _route()}}
+
+    same = {"1000": {"main.works": _route(ms=10.0 + NOISE_MS / 2), "main.cars": _route(statements=2)}}
+    assert compare_with_baseline(same, baseline) == []
+
+    worse = {"1000": {"main.works": _route(statements=4, ms=40.0), "main.cars": _route(status=500),
+                      "main.new": _route()}}
+    regressions = compare_with_baseline(worse, baseline)
+    assert len(regressions) == 3
+    assert "main.works (1000 строк): statements 3 -> 4" in regressions
+    assert "main.works (1000 строк): ms 10.0 -> 40.0" in regressions
+    assert "main.cars (1000 строк): HTTP 200 -> 500" in regressions
+
+
+def test_route_benchmarks_cover_every_get_route(seeded_app):
+    path = seeded_app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///")
+    with seeded_app.app_context():
+        results = run_route_benchmarks(path, repeat=1)
+        endpoints = {endpoint for endpoint, _ in iter_get_routes(seeded_app)}
+    assert set(results) == endpoints
+    for endpoint, result in results.items():
+        assert result["status"] < 400, endpoint
+        assert result["statements"] >= 0 and result["orm_rows"] >= 0 and result["peak_kb"] > 0
+    # повторный прогон на той же базе воспроизводит счётчики
+    with seeded_app.app_context():
+        again = run_route_benchmarks(path, repeat=1)
+        db.engine.dispose()
+    assert compare_with_baseline({"60": again}, {"60": results}, threshold=100) == []
@@ -0,0 +1,68 @@
+from collections import Counter
+from autoservice_app import db
+from autoservice_app.bulk_delete import bulk_delete
+from autoservice_app.models import CompletedWork, Employee, Repair, ServiceRequest, SparePart, repair_employees
+from autoservice_app.table_versions import counters_version, versions_key
+
+
+def _requests_with_dependants(limit):
+    """Обращения, у ремонтов которых есть запчасти, работы и сотрудники (активные и завершённые)"""
+    with_spares = db.select(SparePart.repair_id)
+    with_works = db.select(CompletedWork.repair_id)
+    with_employees = db.select(repair_employees.c.repair_id)
+    ids = set()
+    for completed in (True, False):
+        status = Repair.completion_date.isnot(None) if completed else Repair.completion_date.is_(None)
+        ids.update(db.session.execute(
+            db.select(Repair.request_id).where(
+                status, Repair.id.in_(with_spares), Repair.id.in_(with_employees),
+                *([Repair.id.in_(with_works)] if completed else []),
+            ).distinct().limit(limit)
+        ).scalars())
+    return sorted(ids)
+
+
+def test_bulk_delete_requests_leaves_no_orphans(seeded_app):
+    with seeded_app.app_context():
+        request_ids = _requests_with_dependants(limit=4)
+        repair_ids = db.session.execute(
+            db.select(Repair.id).where(Repair.request_id.in_(request_ids))).scalars().all()
+        assert len(request_ids) >= 4
+        assert Employee.reconcile_repair_counters() == 0
+
+        # сколько активных и завершённых ремонтов снимется с каждого сотрудника
+        released = Counter()
+        for employee_id, completion_date in db.session.execute(
+            db.select(repair_employees.c.employee_id, Repair.completion_date)
+            .join(Repair, Repair.id == repair_employees.c.repair_id)
+            .where(Repair.id.in_(repair_ids))
+        ):
+            released[employee_id, completion_date is None] += 1
+        assert {active for _, active in released} == {True, False}
+        counters_before = {emp.id: (emp.active_repairs_count, emp.completed_repairs_count)
+                           for emp in Employee.query}
+        employee_version, counters_version_before = versions_key(["employee", counters_version("employee")])
+
+        deleted, _ = bulk_delete(ServiceRequest, ServiceRequest.id.in_(request_ids), chunk_size=3)
+        assert deleted["service_request"] == len(request_ids)
+        assert deleted["repair"] == len(repair_ids)
+        assert deleted["spare_part"] > 0 and deleted["completed_work"] > 0 and deleted["repair_employees"] > 0
+
+        assert db.session.execute(db.text("PRAGMA foreign_key_check")).fetchall() == []
+        assert Repair.query.filter(Repair.id.in_(repair_ids)).count() == 0
+        assert SparePart.query.filter(SparePart.repair_id.in_(repair_ids)).count() == 0
+        assert CompletedWork.query.filter(CompletedWork.repair_id.in_(repair_ids)).count() == 0
+        assert db.session.execute(db.select(db.func.count()).select_from(repair_employees).where(
+            repair_employees.c.repair_id.in_(repair_ids))).scalar() == 0
+
+        for emp in Employee.query:
+            active, completed = counters_before[emp.id]
+            assert (emp.active_repairs_count, emp.completed_repairs_count) == (
+                active - released[emp.id, True], completed - released[emp.id, False])
+        assert Employee.reconcile_repair_counters() == 0
+        assert Repair.reconcile_parts() == 0
+
+        # изменились только счётчики сотрудников: справочники по таблице employee остаются в кэше
+        employee_after, counters_after = versions_key(["employee", counters_version("employee")])
+        assert employee_after == employee_version
+        assert counters_after > counters_version_before
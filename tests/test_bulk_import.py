@@ -0,0 +1,77 @@
+from autoservice_app import db
+from autoservice_app.bulk_import import import_records
+from autoservice_app.models import Repair, ServiceRequest
+from test_repair_parts import _make_repairs
+
+
+def test_import_rejects_orphan_references(app):
+    with app.app_context():
+        _make_repairs(count=1)
+        request_id = ServiceRequest.query.one().id
+        errors = []
+        result = import_records("repairs", [
+            {"id": 100, "request_id": request_id, "description": "Замена масла", "cost": "900"},
+            {"id": 101, "request_id": request_id + 1000, "description": "Без обращения"},
+        ], errors=lambda line, message: errors.append((line, message)))
+
+        assert result["inserted"] == 1
+        assert result["skipped"] == 1
+        assert result["fk_violations"] == 0
+        assert errors == [(2, f"нет записи для request_id={request_id + 1000}")]
+        assert db.session.get(Repair, 101) is None
+
+        orphans = db.session.execute(db.text("PRAGMA foreign_key_check")).fetchall()
+        assert orphans == []
+
+
+def test_import_rejects_orphan_assignments(app):
+    with app.app_context():
+        repair_id = _make_repairs(count=1)[0]
+        result = import_records("repair_employees", [
+            {"repair_id": repair_id, "employee_id": 999},
+        ])
+        assert result["inserted"] == 0
+        assert result["skipped"] == 1
+
+
+def test_foreign_key_check_removes_remaining_orphans(app, monkeypatch):
+    # родитель исчез между построением множеств ключей и вставкой
+    monkeypatch.setattr("autoservice_app.bulk_import._reference_keys", lambda table: {})
+    with app.app_context():
+        _make_repairs(count=1)
+        request_id = ServiceRequest.query.one().id
+        result = import_records("repairs", [
+            {"id": 200, "request_id": request_id, "description": "Есть обращение"},
+            {"id": 201, "request_id": request_id + 1000, "description": "Нет обращения"},
+        ])
+        assert result["inserted"] == 1
+        assert result["fk_violations"] == 1
+        assert db.session.get(Repair, 201) is None
+        assert db.session.get(Repair, 200) is not None
+
+
+def test_existing_orphans_are_reported_not_deleted(app, monkeypatch):
+    monkeypatch.setattr("autoservice_app.bulk_import._reference_keys", lambda table: {})
+    with app.app_context():
+        _make_repairs(count=1)
+        request_id = ServiceRequest.query.one().id
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA foreign_keys = OFF")
+            connection.exec_driver_sql(
+                "INSERT INTO repair (id, request_id, description, cost) VALUES (50, ?, 'Старая', 0)",
+                (request_id + 1000,),
+            )
+            connection.commit()
+
+        # id 10 ниже прежнего максимума, и строка 50 попадает в диапазон загрузки,
+        # но она нарушала ключ ещё до импорта
+        result = import_records("repairs", [
+            {"id": 10, "request_id": request_id, "description": "Новая"},
+            {"id": 60, "request_id": request_id + 2000, "description": "Новая без обращения"},
+        ])
+        assert result["inserted"] == 1
+        assert result["fk_violations"] == 1
+        assert result["fk_preexisting"] == 1
+        assert db.session.get(Repair, 50) is not None
+        assert db.session.get(Repair, 60) is None
+        assert db.session.get(Repair, 10) is not None
@@ -0,0 +1,48 @@
+from autoservice_app import db
+from autoservice_app.models import Owner
+
+
+def test_etag_round_trip(seeded_app):
+    client = seeded_app.test_client()
+    first = client.get("/owners")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    cached = client.get("/owners", headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert cached.get_data() == b""
+
+    with seeded_app.app_context():
+        owner = Owner.query.first()
+        owner.phone = "+79990001122"
+        db.session.commit()
+    changed = client.get("/owners", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_pending_flash_is_not_hidden_by_304(seeded_app):
+    client = seeded_app.test_client()
+    etag = client.get("/owners").headers["ETag"]
+    with client.session_transaction() as session:
+        session["_flashes"] = [("success", "Владелец добавлен")]
+
+    response = client.get("/owners", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Владелец добавлен" in response.get_data(as_text=True)
+    # flash показан — следующий запрос снова совпадает с прежним ETag
+    assert client.get("/owners", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_if_modified_since_alone_gets_full_page(seeded_app):
+    client = seeded_app.test_client()
+    with seeded_app.app_context():
+        # запись через приложение заводит строку table_version, а с ней Last-Modified
+        Owner.query.first().phone = "+79990001133"
+        db.session.commit()
+    first = client.get("/owners")
+    assert first.headers["Last-Modified"]
+
+    response = client.get("/owners", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert response.status_code == 200
+    assert response.get_data() == first.get_data()
@@ -0,0 +1,112 @@
+import itertools
+from pathlib import Path
+import pytest
+from autoservice_app import db
+from autoservice_app.datasets import build_dataset
+from autoservice_app.employee_index import employee_index
+from autoservice_app.models import Employee
+from conftest import make_app
+
+
+@pytest.fixture(scope="module")
+def apps(tmp_path_factory):
+    """Два приложения на одной базе: фильтр по индексу в памяти и по SQL"""
+    path = tmp_path_factory.mktemp("employees") / "seeded.db"
+    build_dataset(str(path), rows=60)
+    indexed = make_app(path, EMPLOYEE_FILTER_INDEX=True, ASYNC_JSON_API=False)
+    plain = make_app(path, EMPLOYEE_FILTER_INDEX=False, ASYNC_JSON_API=False)
+    with plain.app_context():
+        # в наборе данных у сотрудников мало ремонтов — часть делаем занятыми
+        for employee in Employee.query.filter(Employee.id % 4 == 0):
+            employee.active_repairs_count = Employee.BUSY_THRESHOLD + 1
+        db.session.commit()
+    yield indexed, plain
+    for app in (indexed, plain):
+        with app.app_context():
+            db.engine.dispose()
+
+
+def _filter(app, **params):
+    response = app.test_client().get("/api/employees/filter", query_string=params)
+    assert response.status_code == 200
+    data = response.get_json()
+    return [emp["id"] for emp in data["employees"]], data["has_more"], data["count"]
+
+
+def _filter_values(app):
+    with app.app_context():
+        employees = Employee.query.order_by(Employee.id).all()
+        positions = sorted({emp.position for emp in employees})
+        schedules = sorted({emp.schedule for emp in employees})
+        busy = sum(emp.active_repairs_count > Employee.BUSY_THRESHOLD for emp in employees)
+        name = employees[0].last_name
+    assert len(employees) >= 20 and 0 < busy < len(employees)
+    # короткий запрос (n-граммы), длинный (триграммы + проверка) и без совпадений
+    searches = ["", name[:2], name[:5].lower(), "zzz"]
+    return searches, ["", positions[0]], ["", schedules[0]]
+
+
+def test_index_matches_sql_for_all_filter_combinations(apps):
+    # поиск по имени без учёта регистра, в том числе кириллицы, в обоих вариантах
+    indexed, plain = apps
+    searches, positions, schedules = _filter_values(plain)
+    combinations = itertools.product(
+        searches, positions, schedules, ["", "junior", "middle", "senior"], ["", "free", "busy"],
+        [(100, 0), (3, 3), (7, 20)],
+    )
+    for search, position, schedule, experience, availability, (limit, offset) in combinations:
+        params = dict(search=search, position=position, schedule=schedule, experience=experience,
+                      availability=availability, limit=limit, offset=offset)
+        ids, has_more, count = _filter(indexed, **params)
+        expected_ids, expected_has_more, expected_count = _filter(plain, **params)
+        assert (ids, has_more, count) == (expected_ids, expected_has_more, expected_count), params
+
+
+def test_async_sql_matches_index(apps):
+    indexed, plain = apps
+    path = Path(plain.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///"))
+    async_app = make_app(path, EMPLOYEE_FILTER_INDEX=False, ASYNC_JSON_API=True)
+    searches, positions, _ = _filter_values(plain)
+    for search in searches + ["%", "_"]:
+        for availability in ("", "busy"):
+            params = dict(search=search, position=positions[1], availability=availability, limit=5)
+            assert _filter(async_app, **params)[:2] == _filter(indexed, **params)[:2], params
+
+
+def test_total_is_reported_past_the_last_page(apps):
+    indexed, plain = apps
+    path = Path(plain.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///"))
+    async_app = make_app(path, EMPLOYEE_FILTER_INDEX=False, ASYNC_JSON_API=True)
+    with plain.app_context():
+        matching = Employee.query.filter(Employee.active_repairs_count > Employee.BUSY_THRESHOLD).count()
+    assert matching > 0
+    for app in (indexed, plain, async_app):
+        assert _filter(app, availability="busy", offset=matching + 10) == ([], False, matching)
+        assert _filter(app, search="zzz", offset=5) == ([], False, 0)
+
+
+def test_index_rebuilds_after_version_bump(apps):
+    indexed, plain = apps
+    with plain.app_context():
+        employee = Employee.query.order_by(Employee.id).first()
+        employee_id, name = employee.id, employee.last_name
+    before = _filter(indexed, search=name, limit=500)[0]
+    assert employee_id in before
+
+    with plain.app_context():
+        employee = db.session.get(Employee, employee_id)
+        employee.last_name = "Щукин"
+        employee.active_repairs_count = Employee.BUSY_THRESHOLD + 5
+        db.session.add(Employee(last_name="Щукина", first_name="Анна", birth_date=employee.birth_date,
+                                address="ул. Мира, 2", phone="+79990000200", position=employee.position,
+                                salary=40000, experience=1, schedule=employee.schedule))
+        db.session.commit()
+    version = employee_index._version
+
+    ids = _filter(indexed, search="щук", availability="busy")[0]
+    assert employee_index._version != version
+    assert ids == [employee_id]
+    assert employee_id not in _filter(indexed, search=name, limit=500)[0]
+    assert len(_filter(indexed, search="Щукин")[0]) == 2
+    for params in (dict(search="щук"), dict(availability="busy", limit=500), dict(experience="junior")):
+        assert _filter(indexed, **params)[:2] == _filter(plain, **params)[:2]
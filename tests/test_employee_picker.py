@@ -0,0 +1,36 @@
+import re
+from autoservice_app import db
+from autoservice_app.models import Employee, Repair
+
+
+def test_repairs_page_has_one_employee_picker(seeded_app):
+    client = seeded_app.test_client()
+    html = client.get("/repairs").get_data(as_text=True)
+    with seeded_app.app_context():
+        active = Repair.query.filter(Repair.completion_date.is_(None)).count()
+        employees = {emp.id: emp.full_name for emp in Employee.query}
+    assert active > 0
+
+    # одна форма назначения на страницу, в строках — только кнопки
+    assert html.count('name="employee_id"') == 1
+    assert html.count('data-bs-target="#assignEmployeeModal"') == active
+    assert html.count('data-action="/assign_employee/') == active
+    # сотрудники в <option> не выводятся, список приходит отдельным запросом
+    option_texts = re.findall(r"<option[^>]*>([^<]*)</option>", html)
+    assert not any(name in text for name in employees.values() for text in option_texts)
+
+    options = client.get("/api/employees/options").get_json()["employees"]
+    assert sorted(option["id"] for option in options) == sorted(employees)
+    assert all(option["label"].startswith(employees[option["id"]]) for option in options)
+
+
+def test_assign_from_shared_picker(seeded_app):
+    client = seeded_app.test_client()
+    with seeded_app.app_context():
+        repair = Repair.query.filter(Repair.completion_date.is_(None)).first()
+        employee = Employee.query.filter(~Employee.repairs.any(Repair.id == repair.id)).first()
+        repair_id, employee_id = repair.id, employee.id
+    response = client.post(f"/assign_employee/{repair_id}", data={"employee_id": employee_id})
+    assert response.status_code == 302
+    with seeded_app.app_context():
+        assert employee_id in [emp.id for emp in db.session.get(Repair, repair_id).employees]
@@ -0,0 +1,103 @@
+import json
+import subprocess
+import sys
+import time
+from autoservice_app import db
+from autoservice_app.jobs import JobRunner
+from autoservice_app.models import Job
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _wait_finished(app, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            if job.is_finished:
+                return job
+        time.sleep(0.02)
+    raise AssertionError(f"задача {job_id} не завершилась")
+
+
+def test_queued_job_of_dead_worker_is_resumed(app, monkeypatch):
+    monkeypatch.setitem(JobRunner._registry, "echo", lambda context, value: {"value": value})
+    with app.app_context():
+        job = Job(kind="echo", status=Job.QUEUED, params=json.dumps({"value": 7}), worker_pid=_dead_pid())
+        running = Job(kind="echo", status=Job.RUNNING, params="{}", worker_pid=job.worker_pid)
+        db.session.add_all([job, running])
+        db.session.commit()
+        job_id, running_id = job.id, running.id
+
+    assert JobRunner.resume_queued(app) == 1
+    # второй процесс ту же задачу уже не заберёт
+    assert JobRunner.resume_queued(app) == 0
+
+    job = _wait_finished(app, job_id)
+    assert job.status == Job.SUCCEEDED
+    assert json.loads(job.result) == {"value": 7}
+    with app.app_context():
+        assert JobRunner.get(running_id).status == Job.FAILED
+
+
+def test_status_poll_resumes_queued_job(app, monkeypatch):
+    monkeypatch.setitem(JobRunner._registry, "echo", lambda context: "ok")
+    with app.app_context():
+        job = Job(kind="echo", status=Job.QUEUED, params="{}", worker_pid=_dead_pid())
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    response = app.test_client().get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.get_json()["status"] in (Job.QUEUED, Job.RUNNING, Job.SUCCEEDED)
+    assert _wait_finished(app, job_id).status == Job.SUCCEEDED
+
+
+def test_cleanup_works_shows_job_link(app):
+    client = app.test_client()
+    response = client.post("/cleanup-works", follow_redirects=True)
+    assert response.status_code == 200
+    with app.app_context():
+        job_id = db.session.query(db.func.max(Job.id)).scalar()
+    assert f'href="/jobs/{job_id}"' in response.get_data(as_text=True)
+    _wait_finished(app, job_id)
+
+
+def test_failed_job_is_logged(app, monkeypatch, caplog):
+    def fail(context):
+        raise RuntimeError("нет места на диске")
+
+    monkeypatch.setitem(JobRunner._registry, "fail", fail)
+    with app.app_context():
+        job_id = JobRunner.submit("fail").id
+    job = _wait_finished(app, job_id)
+    assert job.status == Job.FAILED and job.error == "нет места на диске"
+    record, = [r for r in caplog.records if r.name == "autoservice_app.jobs"]
+    assert record.levelname == "ERROR" and f"fail #{job_id}" in record.getMessage()
+    assert record.exc_info is not None
+
+
+def test_cleanup_submit_error_is_logged(app, monkeypatch, caplog):
+    def broken(kind, **params):
+        raise RuntimeError("база заблокирована")
+
+    monkeypatch.setattr(JobRunner, "submit", broken)
+    response = app.test_client().post("/cleanup-works", follow_redirects=True)
+    assert "Ошибка при запуске очистки старых записей" in response.get_data(as_text=True)
+    record, = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert record.getMessage() == "Ошибка запуска очистки"
+    assert record.exc_info is not None
+
+
+def test_flash_on_streamed_page_is_shown_once(app):
+    assert app.config["STREAM_LIST_PAGES"]
+    client = app.test_client()
+    form = {"last_name": "Иванов", "first_name": "Иван", "phone": "123"}
+    response = client.post("/owners", data=form, follow_redirects=True)
+    assert "Неверный формат номера телефона" in response.get_data(as_text=True)
+    assert "Неверный формат номера телефона" not in client.get("/owners").get_data(as_text=True)
@@ -0,0 +1,87 @@
+import os
+import threading
+import pytest
+from werkzeug.test import EnvironBuilder
+from werkzeug.wsgi import FileWrapper
+from autoservice_app import db
+from autoservice_app.assets import build_assets
+from autoservice_app.metrics import Metrics
+from conftest import make_app
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    def create(**overrides):
+        app = make_app(tmp_path / "metrics.db", METRICS_ENABLED=True,
+                       METRICS_DIR=str(tmp_path / "metrics"), **overrides)
+        with app.app_context():
+            db.create_all()
+        return app
+    yield create
+    # фоновый поток записи переживает тест — каталог снимков ему больше не нужен
+    Metrics.configure(None, 1.0)
+
+
+def test_metrics_hidden_without_token(metrics_app):
+    assert metrics_app().test_client().get("/metrics").status_code == 404
+
+
+def test_metrics_public_only_when_enabled_explicitly(metrics_app):
+    response = metrics_app(METRICS_PUBLIC=True).test_client().get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE autoservice_http_requests_total counter" in response.get_data(as_text=True)
+
+
+def test_metrics_token(metrics_app):
+    client = metrics_app(METRICS_TOKEN="секрет-1").test_client()
+    # метрики запроса записываются при закрытии тела ответа
+    client.get("/").close()
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer другой"}).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer секрет-1"})
+    assert response.status_code == 200
+    assert 'autoservice_http_requests_total{endpoint="main.index",method="GET",status="200"}' in \
+        response.get_data(as_text=True)
+
+
+def test_file_responses_are_not_wrapped(metrics_app):
+    app = metrics_app(METRICS_PUBLIC=True)
+    built = build_assets(app)["js/repairs.js"]
+    environ = EnvironBuilder(path=f"/assets/{built['file']}").get_environ()
+    environ["wsgi.file_wrapper"] = FileWrapper
+    statuses = []
+
+    body = app.wsgi_app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        # сервер сам отдаёт файл через sendfile(), поэтому обёртки быть не должно
+        assert isinstance(body, FileWrapper)
+        assert b"".join(body) and statuses == ["200 OK"]
+    finally:
+        body.close()
+
+    text = app.test_client().get("/metrics").get_data(as_text=True)
+    assert 'autoservice_http_response_size_bytes_sum{endpoint="assets.asset"} ' + str(built["size"]) in text
+
+
+def test_concurrent_flush_keeps_snapshot_valid(metrics_app):
+    app = metrics_app(METRICS_PUBLIC=True)
+    app.test_client().get("/").close()
+    errors = []
+
+    def flush():
+        try:
+            for _ in range(50):
+                Metrics.flush()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=flush) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    directory = app.config["METRICS_DIR"]
+    assert errors == []
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    assert Metrics.collect()["counters"]
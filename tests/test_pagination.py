@@ -0,0 +1,168 @@
+import base64
+import json
+import re
+from datetime import date, datetime
+from html import unescape
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from autoservice_app import db
+from autoservice_app.models import CompletedWork, Repair, ServiceRequest
+from autoservice_app.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_paginate
+from autoservice_app.routes import PAGE_SIZE
+from test_repair_parts import _make_repairs
+
+
+def _token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    values = [date(2026, 3, 1), datetime(2026, 3, 1, 12, 30), 42, "текст", 1.5]
+    token = encode_cursor(values, "next")
+    assert "=" not in token
+    assert decode_cursor(token) == ("next", values)
+    assert decode_cursor(encode_cursor([7], "prev")) == ("prev", [7])
+
+
+@pytest.mark.parametrize("token", [
+    "", None, "zzz", "!!!", _token(["up", [1]]), _token(["next", 1]),
+    _token(["next", [[1, 2], 3]]), _token(["next", [{"x": 1}]]), _token(["next", [{"d": "вчера"}]]),
+    _token({"next": [1]}),
+])
+def test_decode_rejects_garbage(token):
+    assert decode_cursor(token) is None
+
+
+TAMPERED = [
+    "zzz",
+    _token(["next", [[1, 2], 3]]),
+    _token(["next", [5]]),                     # не та длина ключа
+    _token(["next", ["2026-01-01", 5]]),      # строка вместо даты
+    _token(["prev", [{"d": "2026-01-01"}, "5"]]),
+    _token(["next", [{"d": "2026-01-01"}, True]]),
+]
+
+
+@pytest.mark.parametrize("token", TAMPERED)
+@pytest.mark.parametrize("url", ["/works?cursor=", "/repairs?completed_cursor=", "/api/works?cursor=",
+                                 "/requests?cursor=", "/api/requests?cursor="])
+def test_tampered_cursor_is_bad_request(client, url, token):
+    response = client.get(url + token)
+    assert response.status_code == 400
+    if url.startswith("/api/"):
+        assert response.get_json() == {"error": "Неверный курсор страницы"}
+
+
+def _make_works():
+    """Работы с повторяющимися датами и без даты завершения"""
+    repair_id = _make_repairs(count=1)[0]
+    car_id = db.session.get(Repair, repair_id).request.car_id
+    dates = [date(2026, 1, 5), None, date(2026, 1, 5), date(2026, 2, 1), None,
+             date(2025, 12, 31), date(2026, 1, 5), None, date(2026, 2, 1), date(2025, 6, 1), None]
+    works = [CompletedWork(car_id=car_id, repair_id=repair_id, total_cost=100.0 + i, completion_date=day)
+             for i, day in enumerate(dates)]
+    db.session.add_all(works)
+    db.session.commit()
+    # ORM подставляет default=utcnow вместо None, поэтому NULL записывается отдельно
+    db.session.execute(db.update(CompletedWork).where(
+        CompletedWork.id.in_([work.id for work, day in zip(works, dates) if day is None])
+    ).values(completion_date=None))
+    db.session.commit()
+    db.session.expire_all()
+    assert CompletedWork.query.filter(CompletedWork.completion_date.is_(None)).count() == 4
+    works = CompletedWork.query.all()
+    return [work.id for work in sorted(works, key=lambda w: (w.completion_date or date.min, w.id), reverse=True)]
+
+
+@pytest.mark.parametrize("per_page", [1, 3, 4, 11, 20])
+def test_traversal_without_gaps_or_duplicates(app, per_page):
+    columns = [CompletedWork.completion_date, CompletedWork.id]
+    with app.app_context():
+        expected = _make_works()
+
+        pages, cursor = [], None
+        while True:
+            page = keyset_paginate(CompletedWork.query, columns, cursor, per_page)
+            pages.append([work.id for work in page.items])
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        assert [work_id for ids in pages for work_id in ids] == expected
+        assert all(len(ids) == per_page for ids in pages[:-1])
+
+        # обратно по prev-курсорам — те же страницы в обратном порядке
+        back = [pages[-1]]
+        while page.has_prev:
+            page = keyset_paginate(CompletedWork.query, columns, page.prev_cursor, per_page)
+            back.append([work.id for work in page.items])
+        assert back[::-1] == pages
+
+
+def test_api_works_reaches_works_without_date(client, app):
+    with app.app_context():
+        expected = _make_works()
+    seen, url = [], "/api/works?limit=4"
+    while url:
+        data = client.get(url).get_json()
+        seen.extend(item["id"] for item in data["items"])
+        url = f"/api/works?limit=4&cursor={data['next_cursor']}" if data["next_cursor"] else None
+    assert seen == expected
+
+
+def test_invalid_cursor_from_keyset_paginate(app):
+    with app.app_context():
+        with pytest.raises(InvalidCursor):
+            keyset_paginate(ServiceRequest.query, [ServiceRequest.request_date, ServiceRequest.id], "zzz")
+
+
+def _next_links(html):
+    """Адреса активных ссылок «Вперед» на странице, по порядку"""
+    links = re.findall(r'<li class="page-item ([^"]*)">\s*<a class="page-link" href="([^"]*)">\s*Вперед', html)
+    return [unescape(href) for state, href in links if "disabled" not in state]
+
+
+def test_repairs_lists_page_independently(client, app):
+    with app.app_context():
+        repair_ids = _make_repairs(count=PAGE_SIZE + 5)
+        car_id = db.session.get(Repair, repair_ids[0]).request.car_id
+        db.session.add_all([CompletedWork(car_id=car_id, repair_id=repair_ids[0], total_cost=100.0,
+                                          completion_date=date(2026, 1, 1 + i % 28))
+                            for i in range(PAGE_SIZE + 5)])
+        db.session.commit()
+
+    # у каждого списка своя навигация вверху и внизу
+    active_next, _, completed_next, _ = _next_links(client.get("/repairs").get_data(as_text=True))
+    assert "completed_cursor" not in active_next and "cursor=" in active_next
+
+    second = client.get(active_next).get_data(as_text=True)
+    completed_next, = {link for link in _next_links(second) if "completed_cursor" in link}
+    args = parse_qs(urlsplit(completed_next).query)
+    assert set(args) == {"cursor", "completed_cursor"}
+    assert args["cursor"] == parse_qs(urlsplit(active_next).query)["cursor"]
+
+    # листание завершённых не сбрасывает страницу активных
+    both = client.get(completed_next).get_data(as_text=True)
+    assert _active_ids(both) == _active_ids(second) != _active_ids(client.get("/repairs").get_data(as_text=True))
+
+
+def _active_ids(html):
+    return re.findall(r'data-repair-id="(\d+)"', html)
+
+
+def test_requests_keyset_pages(client, app):
+    with app.app_context():
+        repair_ids = _make_repairs(count=1)
+        car_id = db.session.get(Repair, repair_ids[0]).request.car_id
+        db.session.add_all([ServiceRequest(car_id=car_id, request_date=date(2026, 2, 1 + i % 28),
+                                           issues=f"Обращение {i}")
+                            for i in range(PAGE_SIZE * 2 + 5)])
+        db.session.commit()
+        expected = [str(req.id) for req in ServiceRequest.query.order_by(
+            ServiceRequest.request_date.desc(), ServiceRequest.id.desc())]
+
+    seen, url = [], "/requests"
+    while url:
+        html = client.get(url).get_data(as_text=True)
+        seen.extend(re.findall(r'<td>(\d+)</td>', html))
+        url = next(iter(_next_links(html)), None)
+    assert seen == expected
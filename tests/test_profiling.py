@@ -0,0 +1,48 @@
+import os
+import pstats
+import pytest
+from autoservice_app import db
+from autoservice_app.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, _start_profile
+from conftest import make_app
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    app = make_app(tmp_path / "test.db", PROFILE_TOKEN="секрет-123".encode().hex(),
+                   PROFILE_DIR=str(tmp_path / "profiles"))
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _get(app, headers=None):
+    response = app.test_client().get("/owners", headers=headers or {})
+    response.close()
+    return response
+
+
+def test_profile_written_only_with_token(profiled_app):
+    directory = profiled_app.config["PROFILE_DIR"]
+    token = profiled_app.config["PROFILE_TOKEN"]
+
+    for headers in ({}, {PROFILE_HEADER: "неверный"}, {PROFILE_HEADER: token[:-1]}):
+        response = _get(profiled_app, headers)
+        assert response.status_code == 200
+        assert PROFILE_ID_HEADER not in response.headers
+    assert not os.path.exists(directory)
+
+    response = _get(profiled_app, {PROFILE_HEADER: token})
+    name = response.headers[PROFILE_ID_HEADER]
+    assert "main.owners" in name
+    assert sorted(os.listdir(directory)) == [name + ".folded", name + ".prof"]
+    stats = pstats.Stats(os.path.join(directory, name + ".prof"))
+    assert any(function == "owners" for _, _, function in stats.stats)
+
+
+def test_profiling_off_without_token(app):
+    assert not app.config["PROFILE_TOKEN"] and not app.config["PROFILE_PATHS"]
+    # без токена и путей обработчики не регистрируются вовсе
+    assert _start_profile not in app.before_request_funcs.get(None, [])
+    assert PROFILE_ID_HEADER not in _get(app, {PROFILE_HEADER: ""}).headers
@@ -0,0 +1,39 @@
+import pytest
+from autoservice_app import db
+from autoservice_app.datasets import build_dataset
+from autoservice_app.diagnostics import ROUTE_QUERY_BUDGETS, check_query_budgets
+from conftest import make_app
+from autoservice_app.models import Employee, Repair, ServiceRequest
+
+
+def test_seeded_dataset_is_not_trivial(seeded_app):
+    # на паре строк N+1 не отличить от пакетной загрузки
+    with seeded_app.app_context():
+        assert ServiceRequest.query.count() >= 10
+        assert Repair.query.count() >= 10
+        assert Employee.query.count() >= 10
+        assert db.session.query(Repair).filter(Repair.employees.any()).count() >= 5
+
+
+@pytest.fixture(scope="module")
+def budget_results(tmp_path_factory):
+    # один прогон всех страниц на модуль: набор данных строится несколько секунд
+    path = tmp_path_factory.mktemp("budgets") / "seeded.db"
+    build_dataset(str(path), rows=60)
+    app = make_app(path)
+    results = {endpoint: (url, status, count, budget)
+               for endpoint, url, status, count, budget in check_query_budgets(app)}
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+
+def test_every_budgeted_route_is_checked(budget_results):
+    assert set(budget_results) == set(ROUTE_QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(ROUTE_QUERY_BUDGETS))
+def test_route_within_query_budget(budget_results, endpoint):
+    url, status, count, budget = budget_results[endpoint]
+    assert status < 400, url
+    assert count <= budget, f"{url}: {count} запросов при бюджете {budget}"
@@ -0,0 +1,29 @@
+from autoservice_app import db
+from autoservice_app.diagnostics import explain_full_scans
+
+
+def _leading_columns(table):
+    """Первые колонки всех индексов таблицы (включая автоиндексы ключей)"""
+    indexes = db.session.execute(db.text(f'PRAGMA index_list("{table}")')).fetchall()
+    return {
+        db.session.execute(db.text(f'PRAGMA index_info("{index[1]}")')).fetchall()[0][2]
+        for index in indexes
+    }
+
+
+def test_every_foreign_key_is_indexed(app):
+    with app.app_context():
+        for table in db.metadata.sorted_tables:
+            leading = _leading_columns(table.name)
+            for fk in table.foreign_keys:
+                assert fk.parent.name in leading, f"{table.name}.{fk.parent.name} без индекса"
+
+
+def test_explain_full_scans(seeded_app):
+    with seeded_app.app_context():
+        assert explain_full_scans("SELECT * FROM car WHERE brand = ?", ("Lada",)) == {"car"}
+        assert explain_full_scans("SELECT * FROM car WHERE owner_id = ?", (1,)) == set()
+        assert explain_full_scans("SELECT c.id FROM car AS c WHERE c.brand = ?", ("Lada",)) == {"car"}
+        # SELECT без FROM даёт в плане SCAN CONSTANT ROW — это не таблица
+        assert explain_full_scans("SELECT (SELECT max(id) FROM car)", ()) == set()
+
@@ -0,0 +1,74 @@
+from datetime import date
+from autoservice_app import db
+from autoservice_app.employee_index import INDEX_TABLES
+from autoservice_app.models import Employee, Repair
+from autoservice_app.reference_cache import ReferenceCache
+from autoservice_app.table_versions import versions_key
+from test_repair_parts import _make_repairs
+
+
+def _make_employee(phone="+79990000100", position="Механик"):
+    employee = Employee(last_name="Сидоров", first_name="Иван", birth_date=date(1990, 1, 1),
+                        address="ул. Ленина, 1", phone=phone, position=position,
+                        salary=50000, experience=5, schedule="5/2")
+    db.session.add(employee)
+    db.session.commit()
+    return employee.id
+
+
+def _versions(app):
+    with app.app_context():
+        return ReferenceCache.version("employee_options"), versions_key(INDEX_TABLES)
+
+
+def test_counter_updates_keep_employee_options_cached(app, client):
+    with app.app_context():
+        repair_id = _make_repairs(count=1)[0]
+        employee_id = _make_employee()
+
+    first = client.get("/api/employees/options")
+    etag = first.headers["ETag"]
+    options_version, index_version = _versions(app)
+
+    client.post(f"/assign_employee/{repair_id}", data={"employee_id": employee_id})
+    client.get(f"/complete/{repair_id}")
+    with app.app_context():
+        assert db.session.get(Employee, employee_id).completed_repairs_count == 1
+        assert db.session.get(Repair, repair_id).completion_date is not None
+
+    # назначение и завершение меняют только счётчики: справочник и его ETag прежние,
+    # а индекс сотрудников (фильтр занятости) перестраивается
+    new_options_version, new_index_version = _versions(app)
+    assert new_options_version == options_version
+    assert new_index_version != index_version
+    assert client.get("/api/employees/options", headers={"If-None-Match": etag}).status_code == 304
+
+    with app.app_context():
+        assert Employee.reconcile_repair_counters() == 0
+        employee = db.session.get(Employee, employee_id)
+        employee.completed_repairs_count = 5
+        db.session.commit()
+        assert _versions(app)[0] == options_version
+        assert Employee.reconcile_repair_counters() == 1
+        db.session.commit()
+    assert _versions(app)[0] == options_version
+
+
+def test_profile_changes_refresh_employee_options(app, client):
+    with app.app_context():
+        employee_id = _make_employee()
+    etag = client.get("/api/employees/options").headers["ETag"]
+
+    with app.app_context():
+        db.session.get(Employee, employee_id).position = "Электрик"
+        db.session.commit()
+    response = client.get("/api/employees/options", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Электрик" in response.get_data(as_text=True)
+
+    etag = response.headers["ETag"]
+    with app.app_context():
+        _make_employee(phone="+79990000101", position="Диагност")
+    response = client.get("/api/employees/options", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Диагност" in response.get_data(as_text=True)
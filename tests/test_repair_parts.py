@@ -0,0 +1,61 @@
+from datetime import date
+from autoservice_app import db
+from autoservice_app.models import Car, Owner, Repair, ServiceRequest, SparePart
+
+
+def _spares_sum(repair_id):
+    return db.session.query(
+        db.func.coalesce(db.func.sum(SparePart.cost * SparePart.quantity), 0.0)
+    ).filter(SparePart.repair_id == repair_id).scalar()
+
+
+def _make_repairs(count=3):
+    owner = Owner(last_name="Петров", first_name="Петр", phone="+79990000001")
+    car = Car(number="A001AA", brand="Lada", release_date=date(2015, 1, 1), owner=owner)
+    request = ServiceRequest(car=car, request_date=date(2026, 1, 1), issues="Диагностика")
+    repairs = [Repair(request=request, description=f"Ремонт {i}", cost=1000.0 * (i + 1)) for i in range(count)]
+    db.session.add_all(repairs)
+    db.session.commit()
+    return [repair.id for repair in repairs]
+
+
+def test_reconcile_parts_after_bulk_seed(app):
+    with app.app_context():
+        repair_ids = _make_repairs()
+        # как populate_1000.py: bulk_save_objects не обновляет parts_total / parts_count
+        db.session.bulk_save_objects([
+            SparePart(repair_id=repair_id, name="Фильтр", number=f"SP-{repair_id}-{n}",
+                      cost=150.5 * (n + 1), quantity=n + 1, installed_date=date(2026, 1, 2))
+            for repair_id in repair_ids[:2] for n in range(3)
+        ])
+        db.session.commit()
+
+        assert Repair.reconcile_parts() == 2
+        db.session.commit()
+
+        for repair in Repair.query.all():
+            assert repair.parts_total == _spares_sum(repair.id)
+            assert repair.parts_count == SparePart.query.filter_by(repair_id=repair.id).count()
+            assert repair.total_with_parts == repair.cost + _spares_sum(repair.id)
+        # гибридное выражение в SQL даёт то же, что и Python
+        sql_totals = dict(db.session.query(Repair.id, Repair.total_with_parts).all())
+        assert sql_totals == {repair.id: repair.total_with_parts for repair in Repair.query.all()}
+        assert Repair.reconcile_parts() == 0
+
+
+def test_spare_routes_keep_parts_total(app, client):
+    with app.app_context():
+        repair_id = _make_repairs(1)[0]
+
+    for number, cost, quantity in (("SP-1", "120.0", "2"), ("SP-2", "99.9", "3")):
+        client.post("/spares", data={"repair_id": repair_id, "name": "Колодка", "number": number,
+                                     "cost": cost, "quantity": quantity})
+    with app.app_context():
+        spare_id = SparePart.query.filter_by(number="SP-1").one().id
+    client.post(f"/delete_spare/{spare_id}")
+
+    with app.app_context():
+        repair = db.session.get(Repair, repair_id)
+        assert repair.parts_count == 1
+        assert abs(repair.parts_total - _spares_sum(repair_id)) < 0.005
+        assert abs(repair.total_with_parts - (repair.cost + 99.9 * 3)) < 0.005
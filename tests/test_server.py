@@ -0,0 +1,52 @@
+import logging
+from sqlalchemy.engine import Engine
+from autoservice_app import db
+from autoservice_app.jobs import JobRunner
+from autoservice_app.server import AutoserviceServer, default_workers, server_options
+from conftest import make_app
+
+
+class FakeWorker:
+    log = logging.getLogger("test.gunicorn.worker")
+
+
+def test_server_options_from_config():
+    config = {"SERVER_BIND": "127.0.0.1:8000", "SERVER_WORKERS": 0, "SERVER_THREADS": 4,
+              "SERVER_MAX_REQUESTS": 500}
+    options = server_options(config)
+    assert options["bind"] == "127.0.0.1:8000"
+    assert options["workers"] == default_workers()
+    assert options["max_requests"] == 500
+    assert options["preload_app"] is True
+    assert options["worker_class"] == "gthread"
+
+    # параметры команды важнее конфигурации, None — «не задан»
+    options = server_options(config, workers=3, threads=1, bind=None)
+    assert (options["workers"], options["threads"], options["bind"]) == (3, 1, "127.0.0.1:8000")
+    assert options["worker_class"] == "sync"
+
+
+def test_gunicorn_config_and_post_fork(app, monkeypatch):
+    server = AutoserviceServer(app, server_options(app.config, workers=2, threads=2))
+    assert server.cfg.workers == 2
+    assert server.cfg.worker_class_str == "gthread"
+    assert server.cfg.preload_app is True
+    assert server.load() is app
+
+    disposed, resumed = [], []
+    monkeypatch.setattr(Engine, "dispose", lambda engine, close=True: disposed.append(close))
+    monkeypatch.setattr(JobRunner, "resume_queued", classmethod(lambda cls, app: resumed.append(app) or 0))
+    server.cfg.post_fork(None, FakeWorker())
+    # пул мастера забывается без закрытия его соединений
+    assert disposed == [False]
+    assert resumed == [app]
+
+
+def test_post_fork_without_job_table(tmp_path, caplog):
+    app = make_app(tmp_path / "empty.db")
+    server = AutoserviceServer(app, server_options(app.config, workers=1))
+    with caplog.at_level(logging.WARNING, logger=FakeWorker.log.name):
+        server.cfg.post_fork(None, FakeWorker())
+    assert "Ожидающие задачи не проверены" in caplog.text
+    with app.app_context():
+        db.engine.dispose()
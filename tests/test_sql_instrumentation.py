@@ -0,0 +1,46 @@
+import re
+from autoservice_app import db
+from autoservice_app.models import Owner
+from autoservice_app.sql_instrumentation import normalize_statement
+
+
+def test_normalize_statement():
+    assert normalize_statement("SELECT * FROM car WHERE id IN (?, ?, ?) AND number = 'A001AA'\n  LIMIT 10") == \
+        "SELECT * FROM car WHERE id IN (?...) AND number = ? LIMIT ?"
+
+
+def test_server_timing_header(client):
+    response = client.get("/owners")
+    timings = response.headers.getlist("Server-Timing")
+    sql = re.fullmatch(r'sql;dur=([\d.]+);desc="(\d+) SQL"', timings[0])
+    app = re.fullmatch(r"app;dur=([\d.]+)", timings[1])
+    assert sql and app
+    assert int(sql.group(2)) >= 1
+    assert float(sql.group(1)) <= float(app.group(1))
+
+
+def test_repeated_query_is_logged(app, caplog):
+    threshold = app.config["SQL_REPEAT_THRESHOLD"]
+
+    def owner_lookups():
+        # N+1: отдельный запрос на каждый id
+        for owner_id in range(threshold + 2):
+            db.session.get(Owner, owner_id + 1)
+        return "ok"
+
+    def single_lookup():
+        db.session.get(Owner, 1)
+        return "ok"
+
+    app.add_url_rule("/test/n-plus-one", view_func=owner_lookups)
+    app.add_url_rule("/test/single", view_func=single_lookup)
+    client = app.test_client()
+
+    client.get("/test/single")
+    assert not [r for r in caplog.records if "N+1" in r.getMessage()]
+
+    client.get("/test/n-plus-one")
+    record, = [r for r in caplog.records if "N+1" in r.getMessage()]
+    assert record.levelname == "WARNING"
+    assert f"GET /test/n-plus-one: запрос выполнен {threshold + 2} раз" in record.getMessage()
+    assert "FROM owner" in record.getMessage()
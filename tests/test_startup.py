@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import click
+from conftest import make_app
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cli_setup_skipped_outside_cli(tmp_path):
+    app = make_app(tmp_path / "test.db")
+    assert "migrate" not in app.extensions
+    assert "import-data" not in app.cli.commands
+    assert "serve" not in app.cli.commands
+
+
+def test_cli_setup_under_click_context(tmp_path):
+    with click.Context(click.Command("flask")):
+        app = make_app(tmp_path / "test.db")
+    assert "migrate" in app.extensions
+    assert {"import-data", "serve", "startup-report"} <= set(app.cli.commands)
+
+
+def test_wsgi_app_does_not_import_alembic(tmp_path):
+    script = (
+        "import sys\n"
+        "from autoservice_app import create_app\n"
+        "create_app()\n"
+        "print(sorted(name for name in ('alembic', 'flask_migrate', 'autoservice_app.commands')"
+        " if name in sys.modules))\n"
+    )
+    # всё, что процесс пишет на диск, — во временный каталог, а не в instance/
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'test.db'}", METRICS_ENABLED="0",
+               TEMPLATE_CACHE_DIR=str(tmp_path / "jinja-cache"), ASSETS_DIR=str(tmp_path / "assets"))
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
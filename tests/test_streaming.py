@@ -0,0 +1,45 @@
+from functools import partial
+from pathlib import Path
+import pytest
+from autoservice_app import db, routes
+from conftest import make_app
+
+
+LIST_PAGES = ["/owners", "/cars", "/spares", "/employees"]
+
+
+@pytest.fixture
+def plain_app(seeded_app):
+    path = Path(seeded_app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///"))
+    app = make_app(path, STREAM_LIST_PAGES=False)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _chunks(app, url):
+    """Ответ view до WSGI: (отдан ли потоком, фрагменты тела)"""
+    with app.test_request_context(url):
+        response = app.full_dispatch_request()
+        chunks = [chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in response.response]
+        response.close()
+    return response.is_streamed, chunks
+
+
+@pytest.mark.parametrize("url", LIST_PAGES)
+def test_streamed_page_matches_rendered_page(seeded_app, plain_app, url):
+    assert seeded_app.config["STREAM_LIST_PAGES"]
+    streamed, streamed_chunks = _chunks(seeded_app, url)
+    rendered, rendered_chunks = _chunks(plain_app, url)
+    assert streamed and not rendered
+    assert b"".join(streamed_chunks) == b"".join(rendered_chunks)
+    assert seeded_app.test_client().get(url).mimetype == "text/html"
+
+
+def test_stream_is_sent_in_buffered_chunks(seeded_app, monkeypatch):
+    # на 60 строках страница меньше STREAM_BUFFER_SIZE — берём буфер поменьше
+    size = 2048
+    monkeypatch.setattr(routes, "_buffered", partial(routes._buffered, size=size))
+    _, chunks = _chunks(seeded_app, "/employees")
+    assert len(chunks) > 2
+    assert all(len(chunk.decode()) >= size for chunk in chunks[:-1])
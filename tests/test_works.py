@@ -0,0 +1,35 @@
+import re
+from datetime import date
+from autoservice_app import db
+from autoservice_app.helpers import ViewHelper
+from autoservice_app.models import CompletedWork, Repair
+from autoservice_app.routes import PAGE_SIZE
+from test_repair_parts import _make_repairs
+
+
+def _compact(html):
+    return re.sub(r"\s+", " ", html)
+
+
+def test_works_totals_cover_every_page(client, app):
+    count = PAGE_SIZE + 7
+    costs = [100.0 + 10 * i for i in range(count)]
+    with app.app_context():
+        repair_id = _make_repairs(count=1)[0]
+        car_id = db.session.get(Repair, repair_id).request.car_id
+        db.session.add_all([CompletedWork(car_id=car_id, repair_id=repair_id, total_cost=cost,
+                                          completion_date=date(2026, 1, 1 + i % 28))
+                            for i, cost in enumerate(costs)])
+        db.session.commit()
+
+    html = _compact(client.get("/works").get_data(as_text=True))
+    assert f"Показано {PAGE_SIZE} из {count}" in html
+    assert f"Всего: {count}" in html
+    # итоги по всей истории, а не по первой странице
+    assert ViewHelper.format_currency(sum(costs)) in html
+    assert f"Средний чек: {ViewHelper.format_currency(sum(costs) / count)}" in html
+
+
+def test_works_without_history(client):
+    html = _compact(client.get("/works").get_data(as_text=True))
+    assert "Всего: 0" in html